@@ -1,5 +1,6 @@
 import json
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime, date
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -11,17 +12,56 @@ from typing import List, Optional, Dict, Any
 
 # Import existing services
 from app.services.data_fetcher import fetch_ticker_data, fetch_company_info, fetch_news, fetch_options_sentiment, fetch_analyst_actions, fetch_sector_benchmark, fetch_social_news, fetch_fundamentals_batch
-from app.services.technicals import calculate_technicals, get_latest_signals, calculate_risk_metrics
-from app.services.ai_analyst import analyze_sentiment, identify_competitors
+from app.services.technicals import calculate_technicals, get_latest_signals, calculate_risk_metrics, get_multi_timeframe_signals
+from app.services.ai_analyst import analyze_sentiment
+from app.services.competitors import get_competitors, load_competitor_map, refresh_competitor_seeds, refine_competitors, REFINE_INTERVAL
 from app.services.scorer import calculate_score, calculate_hedge_fund_score
 from app.services.discovery import fetch_market_buzz, analyze_market_trends
 from app.services.scanner import get_sp500_tickers, scan_market
 from app.services.backtester import run_beast_backtest
-from app.services.macro import calculate_macro_correlations, get_doomsday_score
-from app.services.commodities import analyze_commodity, get_commodity_list
-from app.services.strategic import get_strategic_analysis, get_magic_formula_list
+from app.services.macro import calculate_macro_correlations, get_doomsday_score, get_macro_alignment, refresh_macro_alignment, load_macro_alignment
+from app.services.commodities import analyze_commodity, get_commodity_list, get_commodity_overview
+from app.services.strategic import get_strategic_analysis, get_magic_formula_list, get_verdict_leaderboard, refresh_verdict_leaderboard, LEADERBOARD_TTL
+from app.services.snapshot import get_ticker_snapshot
+from app.services.rs_rating import get_rs_rating, refresh_rs_ratings, load_rs_ratings
+from app.services.intraday import intraday_store, run_intraday_poller, POLL_PERIODS
+from app.services.jobs import run_daily, run_every, run_background
+from app.services import http_provider
+from app.services.news_store import load_news_store, poll_watched, save_news_store, NEWS_POLL_INTERVAL
+from app.services.cache import get_cache_stats
+from app.services.providers import get_provider_status
 
-app = FastAPI(title="Ticker Analyzer Pro API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background refresh loops
+    tasks = [
+        asyncio.create_task(run_intraday_poller()),
+        # Universe x macro table after the US close (22:00 UTC)
+        asyncio.create_task(run_daily(refresh_macro_alignment, 22)),
+        # Universe RS ratings from the day's closes
+        asyncio.create_task(run_daily(refresh_rs_ratings, 22)),
+        # Index-wide Rocket & Moat verdicts
+        asyncio.create_task(run_every(refresh_verdict_leaderboard, LEADERBOARD_TTL)),
+        # Competitor map: sector/industry seeds nightly, LLM refinement trickles in
+        asyncio.create_task(run_daily(refresh_competitor_seeds, 22)),
+        asyncio.create_task(run_every(refine_competitors, REFINE_INTERVAL)),
+        # Incremental news polling for recently analyzed tickers
+        asyncio.create_task(run_every(poll_watched, NEWS_POLL_INTERVAL, run_now=False)),
+    ]
+    load_news_store()
+    if load_macro_alignment() is None:
+        tasks.append(asyncio.create_task(run_background(refresh_macro_alignment)))
+    if load_rs_ratings() is None:
+        tasks.append(asyncio.create_task(run_background(refresh_rs_ratings)))
+    if not load_competitor_map():
+        tasks.append(asyncio.create_task(run_background(refresh_competitor_seeds)))
+    yield
+    for task in tasks:
+        task.cancel()
+    save_news_store()
+    http_provider.close()
+
+app = FastAPI(title="Ticker Analyzer Pro API", lifespan=lifespan)
 
 # CORS configuration
 app.add_middleware(
@@ -36,6 +76,14 @@ app.add_middleware(
 def health_check():
     return {"status": "active", "version": "2.0.0"}
 
+@app.get("/api/cache/stats")
+def cache_stats_endpoint():
+    return get_cache_stats()
+
+@app.get("/api/providers/status")
+def provider_status_endpoint():
+    return get_provider_status()
+
 def convert_numpy(obj):
     if isinstance(obj, np.integer):
         return int(obj)
@@ -75,10 +123,22 @@ async def strategic_discovery_endpoint():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/strategic/leaderboard")
+async def strategic_leaderboard_endpoint(sector: Optional[str] = None, label: Optional[str] = None, min_score: Optional[int] = None, limit: int = 50):
+    try:
+        result = await asyncio.to_thread(get_verdict_leaderboard, sector, label, min_score, limit)
+        return convert_numpy(result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/commodities")
 def get_commodities():
     return get_commodity_list()
 
+@app.get("/api/commodities/overview")
+async def get_commodity_overview_endpoint():
+    return convert_numpy(await asyncio.to_thread(get_commodity_overview))
+
 @app.get("/api/commodities/{commodity_id}")
 async def get_commodity_analysis_endpoint(commodity_id: str):
     result = await analyze_commodity(commodity_id)
@@ -95,6 +155,56 @@ async def doomsday_clock_endpoint():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+class IntradayBar(BaseModel):
+    time: str
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float = 0
+
+@app.post("/api/intraday/{ticker}/bars")
+def push_intraday_bars(ticker: str, bars: List[IntradayBar], interval: str = "1m"):
+    if interval not in POLL_PERIODS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {list(POLL_PERIODS)}")
+    added = intraday_store.push(ticker, interval, [b.model_dump() for b in bars])
+    return {"ticker": ticker.upper(), "interval": interval, "added": added}
+
+@app.get("/api/intraday/{ticker}")
+async def intraday_signals_endpoint(ticker: str, interval: str = "1m", bars: int = 120):
+    """Latest intraday signals from the symbol's ring buffer (polled on demand)."""
+    ticker = ticker.upper().strip()
+    if interval not in POLL_PERIODS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {list(POLL_PERIODS)}")
+    await asyncio.to_thread(intraday_store.poll, ticker, interval)
+    df = intraday_store.frame(ticker, interval)
+    if df is None:
+        raise HTTPException(status_code=404, detail="No intraday data")
+    df_tech = await asyncio.to_thread(calculate_technicals, df, None, bars)
+    chart_df = df_tech.reset_index()
+    chart_df['time'] = chart_df['Date'].dt.strftime('%Y-%m-%dT%H:%M:%S%z')
+    return convert_numpy({
+        "ticker": ticker,
+        "interval": interval,
+        "signals": get_latest_signals(df_tech),
+        "chart_data": chart_df.replace({np.nan: None}).to_dict(orient="records")
+    })
+
+@app.get("/api/macro/alignment/{ticker}")
+def macro_alignment_endpoint(ticker: str):
+    return convert_numpy(get_macro_alignment(ticker.upper().strip()))
+
+@app.get("/api/rs/{ticker}")
+def rs_rating_endpoint(ticker: str):
+    return convert_numpy(get_rs_rating(ticker.upper().strip()))
+
+@app.post("/api/macro/alignment/refresh")
+async def macro_alignment_refresh_endpoint():
+    table = await asyncio.to_thread(refresh_macro_alignment)
+    if table is None:
+        raise HTTPException(status_code=503, detail="Macro alignment refresh failed")
+    return {"tickers": len(table)}
+
 @app.get("/api/stream/analyze/{ticker}")
 async def stream_analysis(ticker: str, request: Request):
     """
@@ -108,12 +218,18 @@ async def stream_analysis(ticker: str, request: Request):
             if await request.is_disconnected(): return
             yield {"event": "progress", "data": json.dumps({"percent": 10, "status": f"Fetching data for {ticker}..."})}
             
-            df = await asyncio.to_thread(fetch_ticker_data, ticker)
+            snapshot = await asyncio.to_thread(get_ticker_snapshot, ticker)
+            df = snapshot.history("1y")
             if df is None or df.empty:
-                yield {"event": "error", "data": json.dumps({"error": f"Ticker {ticker} not found or Yahoo Finance rate limited (429)."})}
+                yahoo = get_provider_status()["yahoo"]
+                if yahoo["state"] == "open":
+                    error = f"Yahoo Finance is rate limiting us. Retrying automatically in {yahoo['retry_in']}s."
+                else:
+                    error = f"Ticker {ticker} not found or Yahoo Finance rate limited (429)."
+                yield {"event": "error", "data": json.dumps({"error": error})}
                 return
 
-            info = await asyncio.to_thread(fetch_company_info, ticker)
+            info = snapshot.company_info()
             
             # Step 2: Technicals
             if await request.is_disconnected(): return
@@ -122,6 +238,8 @@ async def stream_analysis(ticker: str, request: Request):
             sector_df = await asyncio.to_thread(fetch_sector_benchmark, info.get("sector", "Unknown"))
             df_tech = await asyncio.to_thread(calculate_technicals, df, sector_df)
             signals = get_latest_signals(df_tech)
+            # Higher timeframes are resampled from the full 2y snapshot frame (no extra fetch)
+            mtf_signals = await asyncio.to_thread(get_multi_timeframe_signals, snapshot.history("2y"), sector_df, ("1wk", "1mo"))
             risk_metrics = calculate_risk_metrics(df)
             
             # Step 2.5: Macro Alpha Hunter
@@ -160,7 +278,9 @@ async def stream_analysis(ticker: str, request: Request):
                 "bb_upper": f"${signals.get('bb_upper', 0):.2f}",
                 "vwap_weekly": f"${signals.get('vwap_weekly', 0):.2f}",
                 "volume": f"{signals.get('volume', 0):,}",
-                "volume_ratio": f"{signals.get('volume_ratio', 1.0):.1f}x"
+                "volume_ratio": f"{signals.get('volume_ratio', 1.0):.1f}x",
+                "weekly_trend": mtf_signals.get("1wk", {}).get("trend", "N/A"),
+                "monthly_trend": mtf_signals.get("1mo", {}).get("trend", "N/A")
             }
 
             ai_result = await asyncio.to_thread(analyze_sentiment, ticker, headlines, social_news, tech_context)
@@ -169,7 +289,7 @@ async def stream_analysis(ticker: str, request: Request):
             if await request.is_disconnected(): return
             yield {"event": "progress", "data": json.dumps({"percent": 90, "status": "Identifying competitors & Finalizing..."})}
             
-            peers = await asyncio.to_thread(identify_competitors, ticker)
+            peers = get_competitors(ticker) # Map lookup only; the LLM refines it in the background
             peer_data = []
             if peers:
                 peer_list = [ticker] + peers
@@ -208,13 +328,15 @@ async def stream_analysis(ticker: str, request: Request):
                 },
                 "ai_analysis": ai_result,
                 "signals": signals,
+                "mtf_signals": mtf_signals,
                 "news": headlines,
                 "social": social_news,
                 "peers": peer_data,
                 "analyst_actions": analyst_actions,
                 "chart_data": chart_json,
                 "options_data": options_data,
-                "macro_correlations": macro_corrs
+                "macro_correlations": macro_corrs,
+                "rs_rating": get_rs_rating(ticker)
             }
             
             clean_payload = convert_numpy(payload)
@@ -234,9 +356,9 @@ async def discovery_feed(sector: Optional[str] = None):
     return await get_combined_discovery(sector=sector)
 
 @app.get("/api/scanner")
-async def scanner_feed(filter_strong_buy: bool = False, signal: Optional[str] = None):
+async def scanner_feed(filter_strong_buy: bool = False, signal: Optional[str] = None, min_rs: Optional[int] = None, sort_by: str = "Market Cap"):
     # tickers param is no longer needed since scan_market handles the S&P 500 internally now
-    df = await asyncio.to_thread(scan_market, signal=signal)
+    df = await asyncio.to_thread(scan_market, signal=signal, min_rs=min_rs, sort_by=sort_by)
     
     if filter_strong_buy:
         df = df[df['Recommendation'] == 'Strong Buy']
@@ -247,12 +369,13 @@ async def scanner_feed(filter_strong_buy: bool = False, signal: Optional[str] =
 async def get_backtest(ticker: str):
     ticker = ticker.upper().strip()
     try:
-        # Fetch 2 years of data for backtesting (allows for SMA200 warmup)
-        df = await asyncio.to_thread(fetch_ticker_data, ticker, period="2y")
+        # 2 years of data for backtesting (allows for SMA200 warmup), shared snapshot
+        snapshot = await asyncio.to_thread(get_ticker_snapshot, ticker)
+        df = snapshot.history("2y")
         if df is None or df.empty:
             raise HTTPException(status_code=404, detail="Ticker data not found")
             
-        info = await asyncio.to_thread(fetch_company_info, ticker)
+        info = snapshot.company_info()
         
         # Use a neutral sentiment for historical if not available
         result = await asyncio.to_thread(run_beast_backtest, ticker, df, info)
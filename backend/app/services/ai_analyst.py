@@ -3,12 +3,18 @@ from openai import OpenAI
 from dotenv import load_dotenv
 import json
 import re
+from app.services.providers import call_provider
+from app.services.headlines import compact_headlines
 
 load_dotenv()
 
 API_KEY = os.getenv("OPENROUTER_API_KEY")
 MODEL = os.getenv("OPENROUTER_MODEL", "tngtech/deepseek-r1t-chimera:free")
 
+# Prompt token budgets for pasted headlines (near-duplicates are collapsed first)
+NEWS_TOKEN_BUDGET = 600
+SOCIAL_TOKEN_BUDGET = 200
+
 client = OpenAI(
     base_url="https://openrouter.ai/api/v1",
     api_key=API_KEY,
@@ -68,11 +74,12 @@ def analyze_sentiment(ticker, headlines, social_news=None, technical_signals=Non
             "recommended_action": "Wait for more data."
         }
 
-    news_text = "\n".join([f"- {h}" for h in headlines])
+    news_text = "\n".join([f"- {h}" for h in compact_headlines(headlines, NEWS_TOKEN_BUDGET)])
     
     social_text = ""
-    if social_news:
-        social_text = "\nSOCIAL MEDIA PULSE:\n" + "\n".join([f"- {s}" for s in social_news])
+    social_lines = compact_headlines(social_news, SOCIAL_TOKEN_BUDGET, exclude=headlines)
+    if social_lines:
+        social_text = "\nSOCIAL MEDIA PULSE:\n" + "\n".join([f"- {s}" for s in social_lines])
     
     # Format technical context for the AI
     tech_context = ""
@@ -94,6 +101,10 @@ def analyze_sentiment(ticker, headlines, social_news=None, technical_signals=Non
         - SMA 200: {technical_signals.get('sma_200', 'N/A')}
         - Bollinger Bands: {technical_signals.get('bb_lower', 'N/A')} - {technical_signals.get('bb_upper', 'N/A')}
         - Weekly VWAP: {technical_signals.get('vwap_weekly', 'N/A')}
+        
+        HIGHER TIMEFRAMES:
+        - Weekly Trend: {technical_signals.get('weekly_trend', 'N/A')}
+        - Monthly Trend: {technical_signals.get('monthly_trend', 'N/A')}
         """
 
     prompt = f"""
@@ -130,7 +141,7 @@ def analyze_sentiment(ticker, headlines, social_news=None, technical_signals=Non
     """
 
     try:
-        completion = client.chat.completions.create(
+        completion = call_provider("openrouter", client.chat.completions.create,
             model=MODEL,
             messages=[
                 {"role": "system", "content": "You are a professional financial strategy engine. Output valid JSON only."},
@@ -157,7 +168,7 @@ def analyze_sentiment(ticker, headlines, social_news=None, technical_signals=Non
 def identify_competitors(ticker):
     prompt = f"Identify 3 direct publicly traded competitors for {ticker}. Return ONLY a JSON list of tickers. Example: [\"AMD\", \"INTC\", \"GOOGL\"]"
     try:
-        completion = client.chat.completions.create(
+        completion = call_provider("openrouter", client.chat.completions.create,
             model=MODEL,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.1,
@@ -174,7 +185,7 @@ def analyze_commodity_strategy(commodity_name, technical_signals, macro_context,
     """
     news_text = "No recent news."
     if news:
-        news_text = "\n".join([f"- {h}" for h in news])
+        news_text = "\n".join([f"- {h}" for h in compact_headlines(news, NEWS_TOKEN_BUDGET)])
 
     tech_context = ""
     if technical_signals:
@@ -248,7 +259,7 @@ def analyze_commodity_strategy(commodity_name, technical_signals, macro_context,
     """
 
     try:
-        completion = client.chat.completions.create(
+        completion = call_provider("openrouter", client.chat.completions.create,
             model=MODEL,
             messages=[
                 {"role": "system", "content": "You are a commodities expert. Output valid JSON only."},
@@ -270,6 +281,7 @@ def analyze_commodity_strategy(commodity_name, technical_signals, macro_context,
             "supply_demand_analysis": "Error in analysis.",
             "geopolitical_risks": "N/A",
             "macro_outlook": "N/A",
-            "action_plan": "Action Plan unavailable due to AI error."
+            "action_plan": "Action Plan unavailable due to AI error.",
+            "ai_error": True
         }
 
@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from app.services.technicals import calculate_technicals, get_latest_signals
 from app.services.scorer import calculate_score
+from app.services.kernels import simulate_trades, REASON_TREND_BREAK, REASON_PARABOLIC, REASON_STOP_LOSS, REASON_OPEN
 
 def run_beast_backtest(ticker, df_historical, info, ai_sentiment_score=50):
     """
@@ -14,11 +15,6 @@ def run_beast_backtest(ticker, df_historical, info, ai_sentiment_score=50):
     # 1. Calculate technicals for the entire period
     df = calculate_technicals(df_historical)
     
-    trades = []
-    in_position = False
-    entry_price = 0
-    entry_date = None
-    
     # Veteran Settings
     BUY_THRESHOLD = 60 # Lowered from 65 for historical parity
     SELL_SCORE_TRIGGER = 40
@@ -26,64 +22,40 @@ def run_beast_backtest(ticker, df_historical, info, ai_sentiment_score=50):
     start_idx = 200 if len(df) > 250 else 30 # Fallback if less than 1 year
     
     print(f"--- Starting Veteran Backtest for {ticker} ---")
+    # Use neutral AI and Options for historical speed
+    mock_ai = {"sentiment_score": ai_sentiment_score}
+
+    # Score every bar first (signals only read the latest two rows),
+    # then hand the numeric bar loop to the compute kernel
+    scores = np.full(len(df), np.nan)
     for i in range(start_idx, len(df)):
-        current_row = df.iloc[:i+1]
-        signals = get_latest_signals(current_row)
-        
-        # Use neutral AI and Options for historical speed
-        mock_ai = {"sentiment_score": ai_sentiment_score}
-        
-        # Calculate historical score
-        score, sb = calculate_score(signals, info, mock_ai, options_data=None)
-        
-        curr_price = df.iloc[i]['Close']
-        curr_date = df.index[i]
-        
-        # Veteran Trend Filter (Fallback to SMA50 if SMA200 not available)
-        sma200 = df.iloc[i].get('SMA_200', df.iloc[i]['SMA_50'])
-        sma50 = df.iloc[i]['SMA_50']
-        rsi = df.iloc[i]['RSI_14']
+        signals = get_latest_signals(df.iloc[max(0, i-1):i+1])
+        scores[i], _ = calculate_score(signals, info, mock_ai, options_data=None)
 
-        if not in_position:
-            # BUY LOGIC: High Score + Bullish Trend (Price > SMA200) + Not Overbought
-            if score >= BUY_THRESHOLD and curr_price > sma200 and rsi < 70:
-                print(f"  [BUY] {curr_date.date()} at ${curr_price:.2f} (Score: {score}, Trend: Bullish)")
-                in_position = True
-                entry_price = curr_price
-                entry_date = curr_date
-        
-        elif in_position:
-            # SELL LOGIC: 
-            # 1. Score Collapse AND Trend Breakdown (Price < SMA50)
-            # 2. Parabolic Climax (RSI > 80) regardless of score
-            # 3. Stop Loss (10% drop)
-            
-            trend_broken = curr_price < sma50
-            score_collapse = score <= SELL_SCORE_TRIGGER
-            parabolic = rsi > 80
-            stop_loss = curr_price < (entry_price * 0.90)
-            
-            if (score_collapse and trend_broken) or parabolic or stop_loss:
-                exit_price = curr_price
-                profit_pct = (exit_price - entry_price) / entry_price
-                reason = "Trend Break" if trend_broken else ("Parabolic" if parabolic else "Stop Loss")
-                print(f"  [SELL] {curr_date.date()} at ${exit_price:.2f} (Profit: {profit_pct*100:.2f}%, Reason: {reason})")
-                trades.append({
-                    "entry_date": str(entry_date.date()),
-                    "exit_date": str(curr_date.date()),
-                    "entry_price": float(entry_price),
-                    "exit_price": float(exit_price),
-                    "return": float(profit_pct)
-                })
-                in_position = False
+    # Veteran Trend Filter (Fallback to SMA50 if SMA200 not available)
+    sma200 = df['SMA_200'] if 'SMA_200' in df.columns else df['SMA_50']
+    entries, exits, reasons = simulate_trades(
+        df['Close'].values, df['SMA_50'].values, sma200.values, df['RSI_14'].values,
+        scores, start_idx, BUY_THRESHOLD, SELL_SCORE_TRIGGER
+    )
 
-    if in_position:
-        exit_price = df.iloc[-1]['Close']
+    reason_labels = {REASON_TREND_BREAK: "Trend Break", REASON_PARABOLIC: "Parabolic", REASON_STOP_LOSS: "Stop Loss"}
+    trades = []
+    for entry_i, exit_i, reason in zip(entries, exits, reasons):
+        entry_price = df['Close'].iloc[entry_i]
+        entry_date = df.index[entry_i]
+        exit_price = df['Close'].iloc[exit_i]
         profit_pct = (exit_price - entry_price) / entry_price
-        print(f"  [FINAL CLOSE] at ${exit_price:.2f} (Profit: {profit_pct*100:.2f}%)")
+        print(f"  [BUY] {entry_date.date()} at ${entry_price:.2f} (Score: {int(scores[entry_i])}, Trend: Bullish)")
+        if reason == REASON_OPEN:
+            print(f"  [FINAL CLOSE] at ${exit_price:.2f} (Profit: {profit_pct*100:.2f}%)")
+            exit_date = "Open"
+        else:
+            exit_date = str(df.index[exit_i].date())
+            print(f"  [SELL] {exit_date} at ${exit_price:.2f} (Profit: {profit_pct*100:.2f}%, Reason: {reason_labels[reason]})")
         trades.append({
             "entry_date": str(entry_date.date()),
-            "exit_date": "Open",
+            "exit_date": exit_date,
             "entry_price": float(entry_price),
             "exit_price": float(exit_price),
             "return": float(profit_pct)
@@ -0,0 +1,209 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from app.services.jobs import spawn_background
+
+_MISSING = object()
+
+# Local persistence for tables and snapshots that should survive restarts
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data"))
+
+def data_path(name):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with per-entry expiry and LRU eviction.
+    """
+
+    def __init__(self, ttl=300, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict() # key -> (expires_at, stored_at, value)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.time():
+                return default
+            self._data.move_to_end(key)
+            return entry[2]
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        if callable(ttl): ttl = ttl() # e.g. market-calendar expiry, resolved at store time
+        with self._lock:
+            self._data[key] = (now + ttl, now, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def age(self, key):
+        """Seconds since `key` was stored (expired entries included), or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            return None if entry is None else time.time() - entry[1]
+
+    def get_or_set(self, key, fn, ttl=None, ttl_for=None):
+        """
+        Single-flight: concurrent misses on one key run `fn` once.
+        `ttl_for(value)` picks the TTL from the result when given.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                value = fn()
+                if value is not None:
+                    self.set(key, value, ttl_for(value) if ttl_for else ttl)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+def ttl_cache(ttl=300, maxsize=256):
+    """
+    Memoizes a function for `ttl` seconds (or `ttl()` seconds, evaluated when
+    storing) keyed on its arguments. None results are not cached. The cache is exposed as `fn.cache`.
+    """
+    def decorator(fn):
+        cache = TTLCache(ttl=ttl, maxsize=maxsize)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            return cache.get_or_set(key, lambda: fn(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+def _is_empty(value):
+    return value is None or (isinstance(value, (dict, list)) and not value)
+
+# name -> SWRCache, for the stats endpoint
+SWR_CACHES = {}
+
+class SWRCache:
+    """
+    Stale-while-revalidate cache. Entries younger than `soft_ttl` are served
+    as is; between `soft_ttl` and `hard_ttl` they are served immediately while
+    one background-priority thread refreshes them; older entries block on a reload.
+    Either TTL may be a callable of the key, evaluated when storing.
+    Empty results (None, {}, []) are never stored; when a reload comes back
+    empty the last value is served instead (stale-if-error).
+    """
+
+    def __init__(self, soft_ttl=30, hard_ttl=600, maxsize=1024):
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict() # key -> (soft_expires_at, hard_expires_at, value)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._refreshing = set()
+        self._stats = {"hit": 0, "stale": 0, "miss": 0, "stale_error": 0, "refresh_errors": 0}
+
+    def _store(self, key, value):
+        soft = self.soft_ttl(key) if callable(self.soft_ttl) else self.soft_ttl
+        hard = self.hard_ttl(key) if callable(self.hard_ttl) else self.hard_ttl
+        now = time.time()
+        with self._lock:
+            self._data[key] = (now + soft, now + max(soft, hard), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def _refresh(self, key, fn):
+        try:
+            value = fn()
+            if not _is_empty(value):
+                self._store(key, value)
+        except Exception as e:
+            print(f"Background refresh failed for {key}: {e}")
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_set(self, key, fn):
+        with self._lock:
+            entry = self._data.get(key)
+            now = time.time()
+            if entry is not None and now < entry[1]:
+                self._data.move_to_end(key)
+                if now < entry[0]:
+                    self._stats["hit"] += 1
+                    return entry[2]
+                self._stats["stale"] += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    spawn_background(self._refresh, key, fn)
+                return entry[2]
+            self._stats["miss"] += 1
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Single-flight reload on a miss or past the hard TTL
+        with key_lock:
+            with self._lock:
+                entry = self._data.get(key)
+            if entry is not None and time.time() < entry[0]:
+                value = entry[2]
+            else:
+                value = fn()
+                if not _is_empty(value):
+                    self._store(key, value)
+                elif entry is not None:
+                    # Provider failing or circuit open: an expired value beats none
+                    with self._lock:
+                        self._stats["stale_error"] += 1
+                    value = entry[2]
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
+
+    def stats(self):
+        with self._lock:
+            total = self._stats["hit"] + self._stats["stale"] + self._stats["miss"]
+            return {**self._stats, "size": len(self._data),
+                    "hit_rate": round((self._stats["hit"] + self._stats["stale"]) / total, 3) if total else None}
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+def swr_cache(soft_ttl=30, hard_ttl=600, maxsize=1024, key=None):
+    """
+    Stale-while-revalidate memoizer. `key(*args, **kwargs)` overrides the
+    cache key (for arguments that are unhashable or do not change the result).
+    Empty results are not cached. The cache is exposed as `fn.cache`.
+    """
+    def decorator(fn):
+        cache = SWRCache(soft_ttl=soft_ttl, hard_ttl=hard_ttl, maxsize=maxsize)
+        SWR_CACHES[fn.__name__] = cache
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            return cache.get_or_set(k, lambda: fn(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+def get_cache_stats():
+    return {name: cache.stats() for name, cache in SWR_CACHES.items()}
@@ -1,7 +1,8 @@
 import asyncio
 import pandas as pd
 import numpy as np
-from app.services.data_fetcher import fetch_ticker_data, fetch_news
+from app.services.data_fetcher import fetch_price_history_batch, fetch_news
+from app.services.cache import TTLCache, ttl_cache
 from app.services.technicals import calculate_technicals, get_latest_signals
 from app.services.ai_analyst import analyze_commodity_strategy
 
@@ -30,75 +31,37 @@ MACRO_INDICATORS = {
     "Real Yields (TIP)": "TIP"     # TIPS ETF (Inverse of Real Yields)
 }
 
-async def analyze_commodity(commodity_id):
-    config = COMMODITY_MAP.get(commodity_id.lower())
-    if not config:
-        return {"error": "Invalid commodity ID"}
+# Indicators read by the veteran score, the AI context and AdvancedChart
+COMMODITY_COLUMNS = (
+    "RSI_14", "ADX", "SMA_50", "SMA_200", "VWAP_Weekly", "BB_Upper", "BB_Lower",
+    "MACD_Hist", "SQZ_ON", "SQZ_MOM", "SMI", "SMI_SIGNAL"
+)
 
-    ticker = config["ticker"]
-    display_name = config["name"]
+# Intermarket ratio legs: Copper, Gold, Silver
+RATIO_TICKERS = ["HG=F", "GC=F", "SI=F"]
 
-    # Fetch Data in Parallel
-    # We need specific tickers for ratios: Copper, Gold, Silver
-    ratio_tickers = ["HG=F", "GC=F", "SI=F"]
-    
-    # 1. Fetch Target Commodity + News
-    tasks = [
-        asyncio.to_thread(fetch_ticker_data, ticker),
-        asyncio.to_thread(fetch_news, ticker),
-    ]
-    
-    # 2. Fetch Macro Indicators
-    macro_keys = list(MACRO_INDICATORS.keys())
-    for key in macro_keys:
-        tasks.append(asyncio.to_thread(fetch_ticker_data, MACRO_INDICATORS[key]))
+SNAPSHOT_TTL = 900
+STRATEGY_TTL = 3600
+_strategy_cache = TTLCache(ttl=STRATEGY_TTL, maxsize=64)
 
-    # 3. Fetch Ratio Components (if not already fetched as target or macro)
-    for rt in ratio_tickers:
-        if rt != ticker: # Avoid duplicate fetch
-            tasks.append(asyncio.to_thread(fetch_ticker_data, rt))
+def _latest(df, default):
+    return df["Close"].iloc[-1] if df is not None else default
 
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # Unpack Results
-    df = results[0]
-    news = results[1] if isinstance(results[1], list) else []
-    
-    macro_data = {}
-    result_idx = 2
-    for key in macro_keys:
-        val = results[result_idx]
-        macro_data[key] = val if isinstance(val, pd.DataFrame) and not val.empty else None
-        result_idx += 1
-        
-    ratio_data = {}
-    for rt in ratio_tickers:
-        if rt == ticker:
-            ratio_data[rt] = df
-        else:
-            val = results[result_idx]
-            ratio_data[rt] = val if isinstance(val, pd.DataFrame) and not val.empty else None
-            result_idx += 1
-
-    if df is None or df.empty:
-        return {"error": f"No data found for {display_name}"}
-
-    # Technicals
-    df = calculate_technicals(df)
-    signals = get_latest_signals(df)
-    
-    # --- VETERAN ANALYTICS ENGINE ---
-    
+def calculate_macro_regime(macro_data, ratio_data):
+    """
+    Commodity-independent half of the veteran engine: liquidity, real
+    yields, intermarket ratios and logistics. Identical for every commodity.
+    """
     # 1. Liquidity & Macro
-    dxy_val = macro_data["USD Index"]["Close"].iloc[-1] if macro_data["USD Index"] is not None else 100
-    move_val = macro_data["MOVE Index"]["Close"].iloc[-1] if macro_data["MOVE Index"] is not None else 100
-    tip_price = macro_data["Real Yields (TIP)"]["Close"].iloc[-1] if macro_data["Real Yields (TIP)"] is not None else 100
+    dxy_val = _latest(macro_data["USD Index"], 100)
+    move_val = _latest(macro_data["MOVE Index"], 100)
+    tip_price = _latest(macro_data["Real Yields (TIP)"], 100)
     tip_trend = "Rising" if macro_data["Real Yields (TIP)"] is not None and tip_price > macro_data["Real Yields (TIP)"]["Close"].rolling(20).mean().iloc[-1] else "Falling"
     
     # 2. Ratios
-    copper_price = ratio_data["HG=F"]["Close"].iloc[-1] if ratio_data["HG=F"] is not None else 0
-    gold_price = ratio_data["GC=F"]["Close"].iloc[-1] if ratio_data["GC=F"] is not None else 0
-    silver_price = ratio_data["SI=F"]["Close"].iloc[-1] if ratio_data["SI=F"] is not None else 0
+    copper_price = _latest(ratio_data["HG=F"], 0)
+    gold_price = _latest(ratio_data["GC=F"], 0)
+    silver_price = _latest(ratio_data["SI=F"], 0)
     
     # Copper/Gold (Growth vs Fear) - Scaled for readability (lbs vs oz)
     # Market standard is usually just Price/Price, but Copper is ~4 and Gold ~2000. 
@@ -112,10 +75,19 @@ async def analyze_commodity(commodity_id):
     bcom_trend = "Bullish" if macro_data["BCOM Index"] is not None and macro_data["BCOM Index"]["Close"].iloc[-1] > macro_data["BCOM Index"]["Close"].shift(20).iloc[-1] else "Bearish"
     
     # 4. Logistics
-    bdry_val = macro_data["Baltic Dry"]["Close"].iloc[-1] if macro_data["Baltic Dry"] is not None else 0
-    
+    bdry_val = _latest(macro_data["Baltic Dry"], 0)
+
+    return {
+        "dxy_val": dxy_val, "move_val": move_val, "tip_trend": tip_trend,
+        "cg_ratio": cg_ratio, "gs_ratio": gs_ratio, "bcom_trend": bcom_trend, "bdry_val": bdry_val,
+        "carbon": _latest(macro_data["Carbon Credits"], 0),
+        "ten_year": _latest(macro_data["10Y Yield"], None)
+    }
+
+def calculate_veteran_score(display_name, signals, regime):
     # --- SCORING MODEL (0-100) ---
     score = 50 # Base
+    dxy_val, move_val, tip_trend, gs_ratio = regime["dxy_val"], regime["move_val"], regime["tip_trend"], regime["gs_ratio"]
     
     # DXY Filter (Inverse)
     if dxy_val < 98: score += 20 # Strong Buy Signal
@@ -143,57 +115,126 @@ async def analyze_commodity(commodity_id):
     if signals.get("rsi", 50) < 30: score += 10 # Oversold
 
     # Cap Score
-    score = max(0, min(100, score))
+    return max(0, min(100, score))
+
+def _build_commodity_entry(commodity_id, config, df, regime, dxy_df):
+    display_name = config["name"]
+
+    # Technicals (only the 150-bar chart window and latest signals are used)
+    df = calculate_technicals(df, tail=150, columns=COMMODITY_COLUMNS)
+    signals = get_latest_signals(df)
+
+    score = calculate_veteran_score(display_name, signals, regime)
+    move_val, dxy_val = regime["move_val"], regime["dxy_val"]
     
     veteran_metrics = {
         "score": score,
         "dxy_level": round(dxy_val, 2),
         "move_index": round(move_val, 2),
-        "real_yield_trend": tip_trend, # Rising Price = Falling Yields
-        "copper_gold_ratio": round(cg_ratio, 2),
-        "gold_silver_ratio": round(gs_ratio, 2),
-        "baltic_dry": round(bdry_val, 2),
-        "carbon_credits": round(macro_data["Carbon Credits"]["Close"].iloc[-1], 2) if macro_data["Carbon Credits"] is not None else 0
+        "real_yield_trend": regime["tip_trend"], # Rising Price = Falling Yields
+        "copper_gold_ratio": round(regime["cg_ratio"], 2),
+        "gold_silver_ratio": round(regime["gs_ratio"], 2),
+        "baltic_dry": round(regime["bdry_val"], 2),
+        "carbon_credits": round(regime["carbon"], 2)
     }
 
     # Macro Context for AI (Enhanced)
     macro_context = {
         "dxy_correlation": "N/A", # Keep existing if needed or recalculate
-        "inflation_outlook": "High" if macro_data["10Y Yield"] is not None and macro_data["10Y Yield"]['Close'].iloc[-1] > 4.0 else "Moderate",
+        "inflation_outlook": "High" if regime["ten_year"] is not None and regime["ten_year"] > 4.0 else "Moderate",
         "veteran_data": veteran_metrics,
         "market_regime": "Risk-On" if move_val < 100 and dxy_val < 100 else "Risk-Off"
     }
 
     # Calculate Correlations (Legacy support + extra)
-    if macro_data["USD Index"] is not None:
-        common_idx = df.index.intersection(macro_data["USD Index"].index)
+    if dxy_df is not None:
+        common_idx = df.index.intersection(dxy_df.index)
         if len(common_idx) > 20:
-            corr = df.loc[common_idx, "Close"].tail(60).corr(macro_data["USD Index"].loc[common_idx, "Close"].tail(60))
+            corr = df.loc[common_idx, "Close"].tail(60).corr(dxy_df.loc[common_idx, "Close"].tail(60))
             macro_context["dxy_correlation"] = f"{corr:.2f}"
 
-    # AI Analysis
-    strategy = await asyncio.to_thread(analyze_commodity_strategy, display_name, signals, macro_context, news)
-    
     # Format Chart Data
     chart_df = df.reset_index().tail(150)
     chart_df['time'] = chart_df['Date'].dt.strftime('%Y-%m-%d')
     chart_df.rename(columns={'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'value'}, inplace=True)
     chart_data = chart_df.replace({np.nan: None}).to_dict(orient="records")
-    
-    # Inject Score into Strategy Verdict if needed, or just pass it alongside
-    strategy["relevance_score"] = score # Override AI score with Veteran Math Score for consistency
 
     return {
         "id": commodity_id,
         "name": display_name,
-        "ticker": ticker,
+        "ticker": config["ticker"],
         "price": signals.get("close"),
         "technicals": signals,
-        "strategy": strategy,
         "chart_data": chart_data,
         "macro_context": macro_context,
         "veteran_metrics": veteran_metrics # Send to frontend
     }
 
+@ttl_cache(ttl=SNAPSHOT_TTL, maxsize=1)
+def get_commodity_snapshot():
+    """
+    Technicals and veteran scores for every commodity in one pass. The macro
+    and ratio legs are identical for all of them, so everything is pulled in
+    a single batch download per refresh window.
+    """
+    symbols = [c["ticker"] for c in COMMODITY_MAP.values()] + list(MACRO_INDICATORS.values()) + RATIO_TICKERS
+    frames = fetch_price_history_batch(symbols, period="1y")
+    if not frames:
+        return None
+
+    macro_data = {key: frames.get(sym) for key, sym in MACRO_INDICATORS.items()}
+    ratio_data = {sym: frames.get(sym) for sym in RATIO_TICKERS}
+    regime = calculate_macro_regime(macro_data, ratio_data)
+
+    entries = {}
+    for commodity_id, config in COMMODITY_MAP.items():
+        df = frames.get(config["ticker"])
+        if df is None or df.empty:
+            continue
+        try:
+            entries[commodity_id] = _build_commodity_entry(commodity_id, config, df, regime, macro_data["USD Index"])
+        except Exception as e:
+            print(f"Commodity snapshot failed for {commodity_id}: {e}")
+    return {"as_of": pd.Timestamp.now(tz="UTC"), "commodities": entries}
+
+def get_commodity_overview():
+    """Scores for every commodity from the shared snapshot (no AI step)."""
+    snapshot = get_commodity_snapshot()
+    if snapshot is None:
+        return []
+    return [
+        {
+            "id": e["id"], "name": e["name"], "ticker": e["ticker"], "price": e["price"],
+            "score": e["veteran_metrics"]["score"], "rsi": e["technicals"].get("rsi"),
+            "market_regime": e["macro_context"]["market_regime"]
+        }
+        for e in snapshot["commodities"].values()
+    ]
+
+async def analyze_commodity(commodity_id):
+    config = COMMODITY_MAP.get(commodity_id.lower())
+    if not config:
+        return {"error": "Invalid commodity ID"}
+    commodity_id = commodity_id.lower()
+
+    snapshot = await asyncio.to_thread(get_commodity_snapshot)
+    entry = snapshot["commodities"].get(commodity_id) if snapshot else None
+    if entry is None:
+        return {"error": f"No data found for {config['name']}"}
+
+    # AI Analysis, cached per snapshot so repeat views skip the LLM
+    cache_key = (commodity_id, snapshot["as_of"])
+    strategy = _strategy_cache.get(cache_key)
+    if strategy is None:
+        news = await asyncio.to_thread(fetch_news, config["ticker"])
+        strategy = await asyncio.to_thread(analyze_commodity_strategy, entry["name"], entry["technicals"], entry["macro_context"], news)
+        # Inject Score into Strategy Verdict if needed, or just pass it alongside
+        strategy["relevance_score"] = entry["veteran_metrics"]["score"] # Override AI score with Veteran Math Score for consistency
+        # The error flag only steers caching; it is not part of the response
+        if not strategy.pop("ai_error", False):
+            _strategy_cache.set(cache_key, strategy)
+
+    return {**entry, "strategy": strategy}
+
 def get_commodity_list():
-    return [{"id": k, "name": v["name"]} for k, v in COMMODITY_MAP.items()]
\ No newline at end of file
+    return [{"id": k, "name": v["name"]} for k, v in COMMODITY_MAP.items()]
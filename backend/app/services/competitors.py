@@ -0,0 +1,143 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+from app.services.cache import data_path
+from app.services.ai_analyst import identify_competitors
+from app.services.universe import get_universe_snapshot, peek_universe_snapshot
+
+# Persistent ticker -> peers map. Competitor sets move on the order of
+# quarters, so the analysis path only reads it; the LLM refines it offline.
+COMPETITOR_FILE = "competitors.pkl"
+PEER_COUNT = 3
+LLM_TTL = 90 * 86400   # LLM peers are re-asked about once a quarter
+SEED_TTL = 7 * 86400   # Sector/industry seeds follow the universe weekly
+REFINE_INTERVAL = 60   # Seconds between background refinement passes
+REFINE_BATCH = 10      # LLM calls per pass
+REFINE_DAILY_BUDGET = 20 # LLM calls per UTC day for tickers no analysis asked for
+REFINE_RETRY = 86400   # Wait before re-asking after an unusable LLM answer
+
+_competitors = {"map": {}, "saved_at": None, "budget": {"day": None, "used": 0}}
+_pending = set() # Tickers an analysis asked for, refined first
+_lock = threading.Lock()
+
+def seed_competitors(universe, n=PEER_COUNT):
+    """
+    {ticker: peers} from the universe snapshot: the `n` constituents of the
+    same industry closest in market cap (log scale), topped up from the sector.
+    """
+    caps = np.log(universe["market_cap"].astype("float64").clip(lower=1)).fillna(0.0)
+    seeds = {}
+    for level in ("industry", "sector"):
+        for _, group in caps.groupby(universe[level].fillna("Unknown")):
+            if len(group) < 2:
+                continue
+            names = group.index.to_numpy()
+            dist = np.abs(group.to_numpy()[:, None] - group.to_numpy()[None, :])
+            np.fill_diagonal(dist, np.inf)
+            order = np.argsort(dist, axis=1, kind="stable")
+            for i, ticker in enumerate(names):
+                peers = seeds.setdefault(ticker, [])
+                for j in order[i, :len(names) - 1]:
+                    if len(peers) >= n: break
+                    if names[j] not in peers: peers.append(str(names[j]))
+    return seeds
+
+def _save():
+    try:
+        pd.to_pickle(_competitors, data_path(COMPETITOR_FILE))
+    except Exception as e:
+        print(f"Could not persist competitor map: {e}")
+
+def load_competitor_map():
+    """Warm start from the persisted map."""
+    try:
+        _competitors.update(pd.read_pickle(data_path(COMPETITOR_FILE)))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Could not load competitor map: {e}")
+    return _competitors["map"]
+
+def _is_stale(entry, now):
+    ttl = LLM_TTL if entry["source"] == "llm" else SEED_TTL
+    return now - entry["updated_at"] > ttl
+
+def refresh_competitor_seeds():
+    """Background job: (re)seeds every universe ticker that has no LLM peers yet."""
+    universe = get_universe_snapshot()
+    if universe is None or universe.empty:
+        return None
+    now = time.time()
+    seeds = seed_competitors(universe)
+    with _lock:
+        current = _competitors["map"]
+        for ticker, peers in seeds.items():
+            entry = current.get(ticker)
+            if entry is None or (entry["source"] == "seed" and _is_stale(entry, now)):
+                current[ticker] = {**(entry or {}), "peers": peers, "source": "seed", "updated_at": now}
+        _competitors["saved_at"] = now
+        _save()
+    return current
+
+def refine_competitors(batch=REFINE_BATCH):
+    """
+    Background job: asks the LLM for the peers of up to `batch` tickers that
+    analyses asked for. Other seeds and expired LLM entries share a small
+    daily budget (REFINE_DAILY_BUDGET); the rest keep their seeds.
+    An unusable answer keeps the current peers and is retried after REFINE_RETRY.
+    """
+    now = time.time()
+    with _lock:
+        todo = sorted(_pending)[:batch]
+        _pending.difference_update(todo)
+        budget = _competitors.setdefault("budget", {"day": None, "used": 0})
+        today = time.strftime("%Y-%m-%d", time.gmtime(now))
+        if budget["day"] != today:
+            budget.update(day=today, used=0)
+        spare = min(batch - len(todo), REFINE_DAILY_BUDGET - budget["used"])
+        if spare > 0:
+            backlog = [t for t, e in _competitors["map"].items()
+                       if t not in todo and now - e.get("tried_at", 0) > REFINE_RETRY
+                       and (e["source"] == "seed" or _is_stale(e, now))][:spare]
+            budget["used"] += len(backlog)
+            todo += backlog
+    if not todo:
+        return 0
+    for ticker in todo:
+        peers = [str(p).strip().upper() for p in identify_competitors(ticker) if isinstance(p, str) and p.strip()]
+        peers = [p for p in dict.fromkeys(peers) if p != ticker][:PEER_COUNT]
+        with _lock:
+            entry = _competitors["map"].get(ticker) or {"peers": [], "source": "seed", "updated_at": 0}
+            entry["tried_at"] = time.time()
+            if peers:
+                entry.update({"peers": peers, "source": "llm", "updated_at": time.time()})
+            _competitors["map"][ticker] = entry
+    with _lock:
+        _competitors["saved_at"] = time.time()
+        _save()
+    return len(todo)
+
+def get_competitors(ticker):
+    """
+    Peers for `ticker` from the map; never calls the LLM. Unknown tickers get
+    a seed from the loaded universe (when it has one) and are queued for
+    background refinement, so the next analysis sees LLM peers.
+    """
+    with _lock:
+        entry = _competitors["map"].get(ticker)
+        if entry is not None:
+            now = time.time()
+            if (entry["source"] == "seed" or _is_stale(entry, now)) and now - entry.get("tried_at", 0) > REFINE_RETRY:
+                _pending.add(ticker)
+            return list(entry["peers"])
+        _pending.add(ticker)
+
+    universe = peek_universe_snapshot()
+    if universe is None or ticker not in universe.index:
+        return []
+    same = universe[universe["industry"] == universe.at[ticker, "industry"]]
+    peers = seed_competitors(same).get(ticker, [])
+    with _lock:
+        _competitors["map"].setdefault(ticker, {"peers": peers, "source": "seed", "updated_at": time.time()})
+    return peers
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from app.services.cache import ttl_cache
+from app.services.universe import get_universe_snapshot, universe_ttl
+
+# Universe snapshot fields kept as cross-sectional statistics
+METRICS = ["pe", "forward_pe", "peg", "roe", "roi", "roa", "debt_eq", "insider_trans", "inst_trans",
+           "perf_half", "perf_year", "beta", "rsi", "recom"]
+STATS = ("value", "pct", "sector_pct", "sector_z")
+
+def compute_cross_section(universe, metrics=METRICS):
+    """
+    Per-ticker table with, for every metric: the raw value, its percentile in
+    the universe, its percentile within the sector and its sector z-score.
+    Columns are (stat, metric); percentiles are ascending (1.0 = highest value).
+    """
+    metrics = [m for m in metrics if m in universe.columns]
+    values = universe[metrics].astype("float64")
+    sector = universe["sector"].fillna("Unknown")
+
+    groups = values.groupby(sector)
+    std = groups.transform("std").replace(0, np.nan)
+    table = pd.concat({
+        "value": values,
+        "pct": values.rank(pct=True),
+        "sector_pct": groups.rank(pct=True),
+        "sector_z": (values - groups.transform("mean")) / std
+    }, axis=1).astype("float32")
+    table["sector"] = sector
+    return table
+
+@ttl_cache(ttl=universe_ttl, maxsize=1)
+def get_cross_section_table():
+    universe = get_universe_snapshot()
+    if universe is None or universe.empty:
+        return None
+    return compute_cross_section(universe)
+
+def _lookup(ticker, stat, metric):
+    table = get_cross_section_table()
+    if table is None or ticker not in table.index or (stat, metric) not in table.columns:
+        return None
+    value = table.at[ticker, (stat, metric)]
+    return float(value) if np.isfinite(value) else None
+
+def get_percentile(ticker, metric, within_sector=False):
+    """Percentile (0-1) of `metric` for `ticker` in the universe or its sector."""
+    return _lookup(ticker, "sector_pct" if within_sector else "pct", metric)
+
+def get_sector_zscore(ticker, metric):
+    """Standard deviations of `metric` from the sector mean."""
+    return _lookup(ticker, "sector_z", metric)
+
+def get_cross_section(ticker, metrics=METRICS):
+    """{metric: {value, pct, sector_pct, sector_z}} for one ticker, {} when not in the universe."""
+    table = get_cross_section_table()
+    if table is None or ticker not in table.index:
+        return {}
+    row = table.loc[ticker]
+    out = {}
+    for metric in metrics:
+        if ("value", metric) not in row.index:
+            continue
+        out[metric] = {stat: (round(float(row[(stat, metric)]), 3) if np.isfinite(row[(stat, metric)]) else None) for stat in STATS}
+    return out
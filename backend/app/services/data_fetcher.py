@@ -2,11 +2,40 @@ import os
 import pandas as pd
 import numpy as np
 import yfinance as yf
-from finvizfinance.quote import finvizfinance
 from finvizfinance.news import News
 from duckduckgo_search import DDGS
 import time
 import random
+from concurrent.futures import ThreadPoolExecutor
+from app.services.cache import TTLCache, ttl_cache, swr_cache
+from app.services.market_calendar import market_ttl
+from app.services.providers import call_provider, remember_missing, is_known_missing, TickerNotFound, CircuitOpenError, QueueTimeout
+from app.services.jobs import context_submit, priority
+from app.services import http_provider
+from app.services.universe import lookup_universe_rows
+from app.services import news_store
+
+def price_ttl(interval="1d"):
+    """Market-calendar expiry for price bars: intraday bars go stale fast, daily bars hold overnight."""
+    return market_ttl("intraday" if interval.endswith(("m", "h")) else "prices")
+
+# Per-symbol history frames shared by the batch panel fetchers
+price_cache = TTLCache(ttl=price_ttl, maxsize=2048)
+
+# Statements change once a quarter: refreshed daily while filings land, else held to the next quarter end
+REPORTING_WINDOW_DAYS = 45
+statement_cache = TTLCache(ttl=86400, maxsize=1024)
+
+# Finviz failures that justify asking Yahoo instead: breaker open, no provider
+# slot, HTTP errors and network errors (curl errors are OSErrors). A
+# TickerNotFound never does: the symbol is as unknown on Yahoo.
+FALLBACK_ERRORS = (CircuitOpenError, QueueTimeout, http_provider.HTTPStatusError, OSError)
+
+# One process-wide pool for peer fan-out (Finviz concurrency is capped by its bulkhead)
+peer_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="peers")
+# One process-wide pool for company-info sub-fetches (VIX, rotation, Yahoo statements).
+# Only leaf calls are submitted to it, so a saturated pool never waits on itself.
+info_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="company-info")
 
 def retry_with_backoff(fn, *args, retries=3, backoff_in_seconds=2, **kwargs):
     for i in range(retries):
@@ -17,28 +46,79 @@ def retry_with_backoff(fn, *args, retries=3, backoff_in_seconds=2, **kwargs):
             sleep_time = (backoff_in_seconds * (2 ** i)) + random.uniform(0, 1)
             time.sleep(sleep_time)
 
+@swr_cache(soft_ttl=lambda key: price_ttl(key[2]), hard_ttl=900, maxsize=1024, key=lambda ticker_symbol, period="1y", interval="1d": (ticker_symbol, period, interval))
 def fetch_ticker_data(ticker_symbol, period="1y", interval="1d"):
     """
-    Fetches historical OHLCV data using yfinance.
-    Note: yfinance is used ONLY for price history to avoid 401/429 errors.
+    Fetches historical OHLCV data from the Yahoo chart endpoint over the
+    pooled async session (same frame as yfinance's Ticker.history).
     """
+    if is_known_missing("yahoo", ticker_symbol, "chart"):
+        return None
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        df = ticker.history(period=period, interval=interval)
+        df = http_provider.run(http_provider.yahoo_chart, ticker_symbol, period=period, interval=interval)
+        # Empty windows are normal (intraday off hours, transient hiccups): not remembered
         if df is None or df.empty:
             return None
         return df
+    except TickerNotFound:
+        remember_missing("yahoo", ticker_symbol, "chart")
+        return None
     except Exception as e:
         print(f"Error fetching price history for {ticker_symbol}: {e}")
         return None
 
+def fetch_price_history_batch(symbols, period="1y", interval="1d", ttl=None):
+    """
+    Returns {symbol: OHLCV DataFrame} for many symbols. Cached symbols are
+    served from price_cache; the rest are pulled in ONE yf.download call.
+    """
+    frames = {}
+    missing = []
+    for s in dict.fromkeys(symbols):
+        df = price_cache.get((s, period, interval))
+        if df is None: missing.append(s)
+        else: frames[s] = df
+
+    if missing:
+        try:
+            raw = call_provider("yahoo", yf.download, missing, period=period, interval=interval, group_by="ticker",
+                                auto_adjust=True, threads=True, progress=False)
+            for s in missing:
+                if isinstance(raw.columns, pd.MultiIndex):
+                    if s not in raw.columns.get_level_values(0): continue
+                    df = raw[s]
+                else:
+                    df = raw # Single symbol download
+                df = df.dropna(how="all")
+                if not df.empty:
+                    frames[s] = df
+                    price_cache.set((s, period, interval), df, ttl if ttl is not None else price_ttl(interval))
+        except Exception as e:
+            print(f"Batch price download failed for {missing}: {e}")
+    return frames
+
+def fetch_price_panel(symbols, period="1y", interval="1d", field="Close", ttl=None):
+    """
+    Aligned price panel (dates x symbols) for `field`, forward-filled across
+    calendar gaps between exchanges (futures, indices, crypto).
+    """
+    frames = fetch_price_history_batch(symbols, period=period, interval=interval, ttl=ttl)
+    if not frames:
+        return pd.DataFrame()
+    # Mixed exchanges report in different timezones; align on the trading date
+    series = {s: df[field].set_axis(pd.DatetimeIndex(df.index.date, name="Date")).groupby(level=0).last() for s, df in frames.items()}
+    return pd.DataFrame(series, columns=[s for s in dict.fromkeys(symbols) if s in series]).sort_index().ffill()
+
 def fetch_company_info_fallback(symbol):
     """
     Fallback method to fetch company info using yfinance when Finviz fails.
+    Symbols Yahoo's chart endpoint already answered 404 for get {} unasked.
     """
+    if is_known_missing("yahoo", symbol, "chart"):
+        return {}
     try:
         t = yf.Ticker(symbol)
-        info = t.info
+        info = call_provider("yahoo", lambda: t.info)
         
         # Map YF data to our schema
         current_price = info.get('currentPrice') or info.get('regularMarketPrice') or info.get('previousClose')
@@ -105,19 +185,112 @@ def fetch_company_info_fallback(symbol):
             "monthly_burn": None,
             "vix_level": fetch_vix_level(),
             "sector_rotation": fetch_sector_rotation(info.get('sector', 'Unknown')), 
-            "news_velocity": 0.5 # Default
+            "news_velocity": _news_velocity(symbol)
         }
     except Exception as e:
         print(f"YFinance Fallback Error for {symbol}: {e}")
         return {}
 
-def fetch_company_info(symbol):
+def finviz_quote(symbol):
+    """
+    Finviz quote page behind the Finviz circuit breaker. Raises TickerNotFound
+    (remembered for a few minutes) when Finviz has no such symbol.
+    """
+    if is_known_missing("finviz", symbol, "quote"):
+        raise TickerNotFound(symbol)
+
+    try:
+        return http_provider.run(http_provider.finviz_quote_page, symbol)
+    except TickerNotFound:
+        remember_missing("finviz", symbol, "quote")
+        raise
+
+def fetch_finviz_fundamentals(symbol):
+    """
+    Raw Finviz quote-page fundamentals dict (one scrape). The page's news
+    table is fed to the news store, so fetch_news needs no second scrape.
+    """
+    quote = finviz_quote(symbol)
+    fund = quote.ticker_fundament()
+    try:
+        news_store.ingest(symbol, quote.ticker_news())
+    except Exception as e:
+        print(f"News ingest failed for {symbol}: {e}")
+    return fund
+
+def statements_ttl(now=None):
+    """
+    Seconds cached statements stay fresh: one day during the reporting window
+    after a quarter end, otherwise until the next quarter closes.
+    """
+    now = pd.Timestamp(now or pd.Timestamp.now(tz="UTC"))
+    if now.tz is not None:
+        now = now.tz_convert("UTC").tz_localize(None)
+    quarter = now.to_period("Q")
+    last_end = quarter.start_time - pd.Timedelta(seconds=1)
+    if now - last_end < pd.Timedelta(days=REPORTING_WINDOW_DAYS):
+        return 86400
+    return max(86400, (quarter.end_time - now).total_seconds())
+
+def build_statement_metrics(symbol, with_info=True):
+    """
+    yfinance Altman Z, cash runway/burn and total liabilities from the latest
+    statements. `.info` (Altman Z only) is skipped when `with_info` is False.
+    """
+    t = yf.Ticker(symbol)
+    info_f = context_submit(info_pool, call_provider, "yahoo", lambda: t.info.get('altmanZScore')) if with_info else None
+    bs_f = context_submit(info_pool, call_provider, "yahoo", lambda: t.balance_sheet)
+    cf_f = context_submit(info_pool, call_provider, "yahoo", lambda: t.cashflow)
+    metrics = {"altman_z": None, "months_runway": None, "monthly_burn": None, "total_liab": None}
+    if info_f is not None:
+        try: metrics["altman_z"] = info_f.result()
+        except Exception as e: print(f"Yahoo info failed for {symbol}: {e}")
+    try:
+        bs = bs_f.result()
+        cf = cf_f.result()
+    except Exception as e:
+        # Not cached: a failed pull must not stick for a whole quarter
+        print(f"Statement download failed for {symbol}: {e}")
+        return None
+    try:
+        # 1. Cash Runway Calculation
+        if not bs.empty:
+            # Robust search for cash
+            cash_items = ['Cash And Cash Equivalents', 'Other Short Term Investments', 'Cash Financial Assets']
+            total_liquidity = sum([bs.loc[item].iloc[0] for item in cash_items if item in bs.index])
+
+            if not cf.empty:
+                # Operating Cash Flow (Annual)
+                ocf = cf.loc['Operating Cash Flow'].iloc[0] if 'Operating Cash Flow' in cf.index else 0
+                if ocf < 0:
+                    metrics["monthly_burn"] = abs(ocf) / 12
+                    if metrics["monthly_burn"] > 0:
+                        metrics["months_runway"] = total_liquidity / metrics["monthly_burn"]
+
+            # Input for the Altman Z proxy (market cap is applied live)
+            metrics["total_liab"] = bs.loc['Total Liabilities Net Minority Interest'].iloc[0] if 'Total Liabilities Net Minority Interest' in bs.index else 1
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        print(f"Statement parsing failed for {symbol}: {e}")
+    return metrics
+
+def fetch_statement_metrics(symbol, with_info=True):
+    """Statement-derived metrics, cached per symbol on the quarterly cycle."""
+    return statement_cache.get_or_set((symbol, with_info), lambda: build_statement_metrics(symbol, with_info), ttl=statements_ttl())
+
+# Keyed on the symbol only: a passed-in `fund` is just a pre-scraped input
+@swr_cache(soft_ttl=lambda key: market_ttl("quote"), hard_ttl=600, maxsize=512, key=lambda symbol, fund=None: symbol)
+def fetch_company_info(symbol, fund=None):
     """
     Fetches high-conviction decision data from Finviz with robust parsing.
+    Pass an already scraped `fund` dict to skip the Finviz request.
+    Yahoo statements are only pulled for inputs Finviz does not carry.
     """
     try:
-        stock = finvizfinance(symbol)
-        fund = stock.ticker_fundament()
+        # Started up front; it does not depend on the Finviz page
+        vix_f = context_submit(info_pool, fetch_vix_level)
+        if fund is None:
+            fund = fetch_finviz_fundamentals(symbol)
+        rotation_f = context_submit(info_pool, fetch_sector_rotation, fund.get('Sector', 'Unknown'))
         
         # Parse numeric helper
         def p(val):
@@ -145,64 +318,47 @@ def fetch_company_info(symbol):
         # D: Market Cap / Total Liabilities
         # E: Sales / Total Assets
         
-        altman_z = None
-        try:
-            # Finviz sometimes lists Altman Z-Score directly in fundamental keys
-            altman_z = p(fund.get('Altman Z-Score'))
-            if altman_z is None:
-                # Fallback to yfinance proxy for Z-Score
-                ticker = yf.Ticker(symbol)
-                altman_z = ticker.info.get('altmanZScore')
-        except: pass
-
-        # Altman Z-Score calculation removed heavy news velocity logic
-        # news_velocity = len(stock.ticker_news()) / 48  <- REMOVED FOR SPEED
-        news_velocity = 0.5 # Default static value
+        # Finviz sometimes lists Altman Z-Score directly in fundamental keys
+        altman_z = p(fund.get('Altman Z-Score'))
 
         # Extract PEG, Price, and FCF for logic and return
         peg = p(fund.get('PEG'))
         price = p(fund.get('Price'))
         fcf_yield = (1 / p(fund.get('P/FCF'))) if p(fund.get('P/FCF')) else None
 
+        # Yahoo statements only feed the runway/burn/Altman fallbacks below;
+        # .info is only asked for when Finviz has no Altman Z of its own
+        statements = {}
+        if peg is None or fcf_yield is None or altman_z is None:
+            statements = fetch_statement_metrics(symbol, with_info=altman_z is None) or {}
+        if altman_z is None:
+            # Fallback to yfinance proxy for Z-Score
+            altman_z = statements.get('altman_z')
+
+        # Headlines per hour from the local news store
+        news_velocity = _news_velocity(symbol)
+
         # BIOTECH / GROWTH METRICS (General Fallback for N/A Quality)
         months_runway = None
         monthly_burn = None
         
         # General fallback: If standard metrics are missing (common for new IPOs/Growth), dig deeper
         if peg is None or fcf_yield is None or altman_z is None:
-            try:
-                t = yf.Ticker(symbol)
-                bs = t.balance_sheet
-                cf = t.cashflow
-                
-                # 1. Cash Runway Calculation
-                if not bs.empty:
-                    # Robust search for cash
-                    cash_items = ['Cash And Cash Equivalents', 'Other Short Term Investments', 'Cash Financial Assets']
-                    total_liquidity = sum([bs.loc[item].iloc[0] for item in cash_items if item in bs.index])
+            months_runway = statements.get('months_runway')
+            monthly_burn = statements.get('monthly_burn')
+
+            # Altman Z Manual Proxy (Simplified for missing data)
+            # Z = 1.2(Working Cap/Assets) + 1.4(Retained Earnings/Assets) + 3.3(EBIT/Assets) + 0.6(MV Equity/Liab) + 1.0(Sales/Assets)
+            total_liab = statements.get('total_liab')
+            if altman_z is None and total_liab is not None:
+                try:
+                    mkt_cap = p(fund.get('Market Cap')) or (price * p(fund.get('Shs Outstand')) if price else 0)
                     
-                    if not cf.empty:
-                        # Operating Cash Flow (Annual)
-                        ocf = cf.loc['Operating Cash Flow'].iloc[0] if 'Operating Cash Flow' in cf.index else 0
-                        if ocf < 0:
-                            monthly_burn = abs(ocf) / 12
-                            if monthly_burn > 0:
-                                months_runway = total_liquidity / monthly_burn
-                                
-                    # 2. Altman Z Manual Proxy (Simplified for missing data)
-                    # Z = 1.2(Working Cap/Assets) + 1.4(Retained Earnings/Assets) + 3.3(EBIT/Assets) + 0.6(MV Equity/Liab) + 1.0(Sales/Assets)
-                    if altman_z is None and not bs.empty:
-                        try:
-                            total_assets = bs.loc['Total Assets'].iloc[0] if 'Total Assets' in bs.index else 1
-                            total_liab = bs.loc['Total Liabilities Net Minority Interest'].iloc[0] if 'Total Liabilities Net Minority Interest' in bs.index else 1
-                            mkt_cap = p(fund.get('Market Cap')) or (price * p(fund.get('Shs Outstand')) if price else 0)
-                            
-                            # Simple proxy for Altman Z if data is sparse: 
-                            # Focus on Solvency: Market Cap / Total Liabilities
-                            if total_liab > 0 and mkt_cap:
-                                altman_z = (mkt_cap / total_liab) * 0.6 + 1.0 # Base shift
-                        except: pass
-            except: pass
+                    # Simple proxy for Altman Z if data is sparse: 
+                    # Focus on Solvency: Market Cap / Total Liabilities
+                    if total_liab > 0 and mkt_cap:
+                        altman_z = (mkt_cap / total_liab) * 0.6 + 1.0 # Base shift
+                except: pass
 
         # Map Numeric Rec (1.0-5.0) to Granular Text
         recom_val = p(fund.get('Recom'))
@@ -247,17 +403,26 @@ def fetch_company_info(symbol):
             "months_runway": months_runway,
             "monthly_burn": monthly_burn,
             # Edge Engine
-            "vix_level": fetch_vix_level(),
-            "sector_rotation": fetch_sector_rotation(fund.get('Sector', 'Unknown')), 
+            "vix_level": vix_f.result(),
+            "sector_rotation": rotation_f.result(), 
             "news_velocity": news_velocity
         }
-    except Exception as e:
+    except FALLBACK_ERRORS as e:
+        # An open Finviz breaker lands here without a request, so the fallback
+        # is the only upstream call while Finviz is down
         print(f"Finviz Error for {symbol}: {e}. Switching to YFinance fallback.")
         return fetch_company_info_fallback(symbol)
+    except TickerNotFound:
+        print(f"{symbol} is not listed on Finviz")
+        return {}
+    except Exception as e:
+        print(f"Finviz Error for {symbol}: {e}")
+        return {}
 
+@ttl_cache(ttl=lambda: market_ttl("vix"), maxsize=1)
 def fetch_vix_level():
     try:
-        vix = finvizfinance('^VIX')
+        vix = finviz_quote('^VIX')
         return float(vix.ticker_fundament().get('Price', 20.0))
     except: return 20.0
 
@@ -273,9 +438,10 @@ def fetch_sector_rotation(sector_name):
         etf = sector_map.get(sector_name)
         if not etf: return "Neutral"
         
-        # Compare 1mo return of ETF vs SPY
-        s_data = yf.Ticker(etf).history(period="1mo")["Close"]
-        m_data = yf.Ticker("SPY").history(period="1mo")["Close"]
+        # Compare 1mo return of ETF vs SPY (one batched, cached download)
+        panel = fetch_price_panel([etf, "SPY"], period="1mo")
+        s_data = panel[etf].dropna()
+        m_data = panel["SPY"].dropna()
         
         s_ret = (s_data.iloc[-1] / s_data.iloc[0]) - 1
         m_ret = (m_data.iloc[-1] / m_data.iloc[0]) - 1
@@ -287,18 +453,16 @@ def fetch_sector_rotation(sector_name):
     except: return "Neutral"
 
 def fetch_news(symbol, limit=10):
-    """Fetches real-time news for a symbol using Finviz."""
+    """Latest headlines for a symbol from the local news store (Finviz feed, polled incrementally)."""
     try:
-        stock = finvizfinance(symbol)
-        news_df = stock.ticker_news()
-        if news_df.empty: return []
-        
-        results = []
-        for _, row in news_df.head(limit).iterrows():
-            results.append(f"[{row['Date']}] {row['Title']} (Source: {row['Link']})")
-        return results
+        news_store.ensure_fresh(symbol)
+        return [news_store.format_headline(item) for item in news_store.get_news(symbol, limit=limit)]
     except: return []
 
+def _news_velocity(symbol):
+    velocity = news_store.news_velocity(symbol)
+    return 0.5 if velocity is None else velocity # Neutral default before the first poll
+
 def fetch_sector_benchmark(sector_name):
     # Sector mapping same as before
     sector_map = {
@@ -310,6 +474,7 @@ def fetch_sector_benchmark(sector_name):
     etf = sector_map.get(sector_name, "SPY")
     return fetch_ticker_data(etf)
 
+@swr_cache(soft_ttl=lambda key: market_ttl("fundamentals"), hard_ttl=3600, maxsize=1024)
 def fetch_fundamentals_lean(symbol):
     """
     Lightweight fetcher for competitor/peer data.
@@ -319,7 +484,7 @@ def fetch_fundamentals_lean(symbol):
         # Use yfinance for speed in batch fetches if possible, 
         # but stick to the established patterns.
         # Actually, let's use finvizfinance but only for the fundamentals.
-        stock = finvizfinance(symbol)
+        stock = finviz_quote(symbol)
         fund = stock.ticker_fundament()
         
         def p(val):
@@ -331,40 +496,52 @@ def fetch_fundamentals_lean(symbol):
                 return float(clean)
             except: return None
 
-        recom_val = p(fund.get('Recom'))
-        recommendation = "hold"
-        if recom_val:
-            if recom_val <= 1.5: recommendation = "strong_buy"
-            elif recom_val <= 2.5: recommendation = "buy"
-            elif recom_val > 3.5: recommendation = "sell"
-
         return {
             "Ticker": symbol,
             "Price": p(fund.get('Price')),
             "P/E": p(fund.get('P/E')),
             "Mkt Cap": p(fund.get('Market Cap')),
-            "Rec": recommendation
+            "Rec": recommendation_label(p(fund.get('Recom')))
         }
     except:
         return None
 
+def recommendation_label(recom_val):
+    """Finviz analyst mean (1 = strong buy .. 5 = sell) -> peer table label."""
+    recommendation = "hold"
+    if recom_val:
+        if recom_val <= 1.5: recommendation = "strong_buy"
+        elif recom_val <= 2.5: recommendation = "buy"
+        elif recom_val > 3.5: recommendation = "sell"
+    return recommendation
+
 def fetch_fundamentals_batch(tickers):
     """
-    Fetches peer data. 
-    Note: Called via asyncio.to_thread, but we can still optimize the loop.
+    Peer table for `tickers`, in order. Rows come from the universe snapshot
+    and one ticker-filtered screener query; only symbols neither returns are
+    scraped per quote, on the shared peer pool at "peers" priority.
     """
-    import concurrent.futures
-    
+    tickers = list(dict.fromkeys(tickers))
+    with priority("peers"):
+        table = lookup_universe_rows(tickers)
+        futures = {t: context_submit(peer_pool, fetch_fundamentals_lean, t) for t in tickers if t not in table.index}
+
+    num = lambda v: float(v) if pd.notna(v) else None
     data = []
-    # Use a ThreadPoolExecutor for internal parallelism if not already in one
-    # This is safe because these are I/O bound network requests.
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_ticker = {executor.submit(fetch_fundamentals_lean, t): t for t in tickers}
-        for future in concurrent.futures.as_completed(future_to_ticker):
-            ticker_data = future.result()
-            if ticker_data:
-                data.append(ticker_data)
-                
+    for t in tickers:
+        if t in futures:
+            ticker_data = futures[t].result()
+        else:
+            row = table.loc[t]
+            ticker_data = {
+                "Ticker": t,
+                "Price": num(row["price"]),
+                "P/E": num(row["pe"]),
+                "Mkt Cap": num(row["market_cap"]),
+                "Rec": recommendation_label(num(row["recom"]))
+            }
+        if ticker_data:
+            data.append(ticker_data)
     return pd.DataFrame(data)
 
 def fetch_options_sentiment(symbol):
@@ -374,4 +551,6 @@ def fetch_analyst_actions(symbol):
     return []
 
 def fetch_social_news(symbol, limit=5):
-    return fetch_news(symbol, limit=limit)
\ No newline at end of file
+    """Opinion/retail outlet headlines from the news store (no extra scrape)."""
+    items = news_store.get_news(symbol, limit=limit, sources=news_store.SOCIAL_SOURCES)
+    return [news_store.format_headline(item) for item in items]
\ No newline at end of file
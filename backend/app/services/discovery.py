@@ -3,12 +3,17 @@ import os
 from duckduckgo_search import DDGS
 from openai import OpenAI
 from dotenv import load_dotenv
+from app.services.providers import call_provider
+from app.services.headlines import compact_headlines
 
 load_dotenv()
 
 API_KEY = os.getenv("OPENROUTER_API_KEY")
 MODEL = os.getenv("OPENROUTER_MODEL", "xiaomi/mimo-v2-flash:free")
 
+# Prompt token budget for the buzz lines (near-duplicates are collapsed first)
+BUZZ_TOKEN_BUDGET = 900
+
 client = OpenAI(
     base_url="https://openrouter.ai/api/v1",
     api_key=API_KEY,
@@ -48,7 +53,7 @@ def fetch_market_buzz(sector=None):
         try:
             limit = 4 if sector and sector != "All" else 3
             for q in sector_queries[:limit]: 
-                results = ddgs.news(keywords=q, max_results=5)
+                results = call_provider("ddg", ddgs.news, keywords=q, max_results=5)
                 if results:
                     for r in results:
                         # Stricter Source Check (Implicit via targeted queries, but we can add filter)
@@ -60,7 +65,7 @@ def fetch_market_buzz(sector=None):
         # Fetch High-Signal Context
         try:
             for q in social_queries:
-                results = ddgs.text(keywords=q, max_results=5)
+                results = call_provider("ddg", ddgs.text, keywords=q, max_results=5)
                 if results:
                     for r in results:
                         title = r.get('title', '')
@@ -72,7 +77,8 @@ def fetch_market_buzz(sector=None):
         except Exception as e:
             print(f"Error fetching social buzz: {e}")
         
-    return list(set(combined_results))
+    # Exact repeats only; near-duplicates are clustered when the prompt is built
+    return list(dict.fromkeys(combined_results))
 
 def analyze_market_trends(news_list):
     """
@@ -82,7 +88,7 @@ def analyze_market_trends(news_list):
     if not news_list:
         return {"themes": []}
 
-    news_text = "\n".join(news_list[:25]) 
+    news_text = "\n".join(compact_headlines(news_list, BUZZ_TOKEN_BUDGET))
     
     prompt = f"""
     You are a Senior Wall Street Discovery Agent. Your job is to identify high-conviction, institutional-grade market themes.
@@ -123,7 +129,7 @@ def analyze_market_trends(news_list):
     """
 
     try:
-        response = client.chat.completions.create(
+        response = call_provider("openrouter", client.chat.completions.create,
             model=MODEL,
             messages=[{"role": "system", "content": "You are a JSON-only financial assistant."},
                       {"role": "user", "content": prompt}],
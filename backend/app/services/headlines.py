@@ -0,0 +1,98 @@
+import re
+import zlib
+import numpy as np
+from app.services.news_store import normalize_title
+
+# Near-duplicate headline clustering (character shingles + MinHash/LSH) and
+# per-prompt token budgets, so syndicated copies of one story cost one line.
+SHINGLE_SIZE = 4
+NUM_PERM = 64
+BANDS = 16                 # 16 bands x 4 rows: pairs above ~0.5 Jaccard collide
+SIMILARITY_THRESHOLD = 0.5 # Exact shingle Jaccard that confirms a candidate pair
+CHARS_PER_TOKEN = 4        # Rough English average, no tokenizer dependency
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(7)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+_TAG = re.compile(r"^\s*\[[^\]]*\]\s*")               # "[2026-01-02 09:30:00] " / "[Market Intelligence] "
+_SUFFIX = re.compile(r"\s*\((?:Source: )?[^()]*\)\s*$") # " (Source: https://...)" / " (Reuters)"
+_URL_SUFFIX = re.compile(r"\s*\(Source: https?://[^)]*\)\s*$")
+
+def headline_core(line):
+    """The comparable part of a headline line (no date/tag prefix, no source suffix)."""
+    return normalize_title(_SUFFIX.sub("", _TAG.sub("", line)))
+
+def shingles(text, k=SHINGLE_SIZE):
+    text = f" {text} "
+    return {text[i:i + k] for i in range(max(1, len(text) - k + 1))}
+
+def minhash(shingle_set):
+    hashes = np.fromiter((zlib.crc32(s.encode()) % _PRIME for s in shingle_set), dtype=np.uint64, count=len(shingle_set))
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def cluster_headlines(lines, threshold=SIMILARITY_THRESHOLD):
+    """
+    Groups near-duplicate lines. Returns [(representative, count)] in order
+    of first appearance; the first line of a cluster represents it (callers
+    pass newest first).
+    """
+    lines = [l for l in lines if l and l.strip()]
+    if not lines:
+        return []
+    sets = [shingles(headline_core(l)) for l in lines]
+    signatures = np.array([minhash(s) for s in sets])
+    parent = list(range(len(lines)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = NUM_PERM // BANDS
+    for band in range(BANDS):
+        buckets = {}
+        for i, sig in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+            buckets.setdefault(sig.tobytes(), []).append(i)
+        for members in buckets.values():
+            for j in members[1:]:
+                a, b = find(members[0]), find(j)
+                if a == b:
+                    continue
+                jaccard = len(sets[members[0]] & sets[j]) / len(sets[members[0]] | sets[j])
+                if jaccard >= threshold:
+                    parent[max(a, b)] = min(a, b)
+
+    clusters = {}
+    for i in range(len(lines)):
+        clusters.setdefault(find(i), []).append(i)
+    return [(lines[root], len(members)) for root, members in sorted(clusters.items())]
+
+def compact_headlines(lines, token_budget, exclude=None):
+    """
+    Prompt-ready headline lines: near-duplicates collapsed to one line with
+    a "(xN similar)" count, source URLs dropped, and cut to `token_budget`.
+    Lines that repeat anything in `exclude` (already in the prompt) are dropped.
+    """
+    exclude = list(exclude or [])
+    # Excluded lines come first, so any cluster they join is represented by one of them
+    clusters = cluster_headlines(exclude + list(lines or []))
+    out = []
+    used = 0
+    for line, count in clusters:
+        if line in exclude:
+            continue
+        text = _URL_SUFFIX.sub("", line.strip())
+        if count > 1:
+            text += f" (x{count} similar)"
+        cost = estimate_tokens(text)
+        if used + cost > token_budget:
+            break
+        out.append(text)
+        used += cost
+    return out
@@ -0,0 +1,200 @@
+import asyncio
+import threading
+from urllib.parse import urlsplit
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+from curl_cffi.requests import AsyncSession
+from finvizfinance.constants import order_dict
+from finvizfinance.quote import finvizfinance, QUOTE_URL
+from finvizfinance.screener.custom import Custom
+from app.services.jobs import current_priority
+from app.services.providers import acall_provider, TickerNotFound
+
+# Async HTTP for the hot scrapes: one event loop owns a keep-alive session per
+# host, so every worker thread shares warm TLS/HTTP2 connections instead of
+# opening its own session per request.
+IMPERSONATE = "chrome" # Browser fingerprint (HTTP/2, headers) the sites expect
+HTTP_TIMEOUT = 10
+MAX_CONNECTIONS_PER_HOST = 10
+YAHOO_CHART_URL = "https://query2.finance.yahoo.com/v8/finance/chart/{symbol}"
+SCREENER_URL = "https://finviz.com/screener.ashx"
+SCREENER_PAGE_SIZE = 20
+SCREENER_CONCURRENCY = 3 # Page requests one crawl may have in flight (or queued) at once
+DAILY_INTERVALS = ("1d", "5d", "1wk", "1mo", "3mo")
+
+_loop = None
+_loop_lock = threading.Lock()
+_sessions = {}
+
+class HTTPStatusError(Exception):
+    """Non-2xx answer from an upstream host."""
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="http-provider", daemon=True).start()
+        return _loop
+
+def _session(host):
+    # Only touched from the provider loop, so no lock is needed
+    session = _sessions.get(host)
+    if session is None:
+        session = AsyncSession(impersonate=IMPERSONATE, timeout=HTTP_TIMEOUT, max_clients=MAX_CONNECTIONS_PER_HOST)
+        _sessions[host] = session
+    return session
+
+async def _with_priority(level, fn, args, kwargs):
+    current_priority.set(level)
+    return await fn(*args, **kwargs)
+
+def _schedule(fn, *args, **kwargs):
+    # The caller's priority travels with the coroutine to the provider loop
+    coro = _with_priority(current_priority.get(), fn, args, kwargs)
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+def run(fn, *args, **kwargs):
+    """Runs coroutine function `fn` on the provider loop and waits (for sync callers)."""
+    return _schedule(fn, *args, **kwargs).result()
+
+async def arun(fn, *args, **kwargs):
+    """Awaits `fn` on the provider loop without holding a thread (for async callers)."""
+    return await asyncio.wrap_future(_schedule(fn, *args, **kwargs))
+
+async def _close_sessions():
+    for session in list(_sessions.values()):
+        await session.close()
+    _sessions.clear()
+
+def close():
+    """Closes the pooled connections (app shutdown)."""
+    if _loop is not None:
+        asyncio.run_coroutine_threadsafe(_close_sessions(), _loop).result(timeout=5)
+
+async def _get(url, params=None):
+    response = await _session(urlsplit(url).netloc).get(url, params=params)
+    if response.status_code == 404:
+        raise TickerNotFound(url)
+    if response.status_code >= 400:
+        raise HTTPStatusError(f"{response.status_code} from {url}")
+    return response
+
+async def _get_text(url, params=None):
+    return (await _get(url, params)).text
+
+async def _get_json(url, params=None):
+    return (await _get(url, params)).json()
+
+# --- Finviz ---
+
+async def finviz_quote_page(symbol):
+    """
+    Finviz quote page as a `finvizfinance` object (same parsers, same dicts),
+    fetched over the pooled session. Raises TickerNotFound for unknown symbols.
+    Fills the state `finvizfinance.__init__` would, so it relies on the
+    pinned finvizfinance version (see requirements.txt).
+    """
+    url = QUOTE_URL.format(ticker=symbol)
+    html = await acall_provider("finviz", _get_text, url)
+    quote = finvizfinance.__new__(finvizfinance)
+    quote.ticker, quote.quote_url, quote.info, quote.flag = symbol, url, {}, False
+    quote.soup = BeautifulSoup(html, "lxml")
+    if not quote._checkexist(0):
+        raise TickerNotFound(symbol)
+    quote.flag = True
+    return quote
+
+async def _screener_soup(params):
+    return BeautifulSoup(await acall_provider("finviz", _get_text, SCREENER_URL, params), "lxml")
+
+async def finviz_screener(filters_dict=None, signal="", columns=None, view=Custom, order="Ticker", ascend=True, max_pages=None, ticker=""):
+    """
+    Every page of a Finviz screener as one DataFrame, the same frame
+    `screener_view` builds. Page 1 gives the page count; the rest are fetched
+    SCREENER_CONCURRENCY at a time through the Finviz bulkhead. A failed page ends the
+    table there, like the sequential crawl did. `ticker` ("AAPL,MSFT")
+    restricts the screen to those symbols. None when nothing matches.
+    Drives finvizfinance's private page/table parsers, hence the version pin.
+    """
+    screener = view()
+    screener.set_filter(signal=signal, filters_dict=filters_dict or {}, ticker=ticker)
+    if columns:
+        screener._parse_columns(list(columns))
+    params = {**screener.request_params, "o": ("" if ascend else "-") + order_dict[order]}
+
+    first = await _screener_soup(params)
+    pages = screener._get_page(first)
+    if pages == 0:
+        return None
+    if max_pages:
+        pages = min(pages, max_pages)
+
+    # Capped so one crawl never floods the Finviz queue ahead of other callers
+    gate = asyncio.Semaphore(SCREENER_CONCURRENCY)
+    async def page_soup(page):
+        async with gate:
+            return await _screener_soup({**params, "r": (page - 1) * SCREENER_PAGE_SIZE + 1})
+    rest = await asyncio.gather(*(page_soup(page) for page in range(2, pages + 1)), return_exceptions=True)
+    df = screener._parse_table(None, first, -1)
+    for page, soup in enumerate(rest, start=2):
+        if isinstance(soup, BaseException):
+            print(f"Screener page {page} failed: {soup}")
+            break
+        df = screener._parse_table(df, soup, -1)
+    return df
+
+# --- Yahoo ---
+
+def chart_to_frame(payload, interval="1d"):
+    """
+    Yahoo chart JSON -> the frame `Ticker.history()` returns (auto-adjusted
+    OHLC, Volume, Dividends, Stock Splits, exchange-local index).
+    """
+    chart = payload.get("chart") or {}
+    if chart.get("error") or not chart.get("result"):
+        return None
+    result = chart["result"][0]
+    if not result.get("timestamp"):
+        return pd.DataFrame()
+
+    tz = result.get("meta", {}).get("exchangeTimezoneName", "UTC")
+    index = pd.to_datetime(result["timestamp"], unit="s", utc=True).tz_convert(tz)
+    daily = interval in DAILY_INTERVALS
+    if daily:
+        index = index.normalize()
+    quote = result["indicators"]["quote"][0]
+    df = pd.DataFrame({col.capitalize(): np.asarray(quote.get(col, []), dtype="float64")
+                       for col in ("open", "high", "low", "close", "volume")}, index=index)
+
+    adjclose = result["indicators"].get("adjclose")
+    if adjclose:
+        adj = np.asarray(adjclose[0]["adjclose"], dtype="float64")
+        factor = adj / df["Close"].to_numpy()
+        df[["Open", "High", "Low"]] = df[["Open", "High", "Low"]].mul(factor, axis=0)
+        df["Close"] = adj
+
+    events = result.get("events", {})
+    def event_series(name, value):
+        out = pd.Series(0.0, index=df.index)
+        for event in events.get(name, {}).values():
+            at = pd.Timestamp(event["date"], unit="s", tz="UTC").tz_convert(tz)
+            at = at.normalize() if daily else at
+            if at in out.index:
+                out[at] = value(event)
+        return out
+    df["Dividends"] = event_series("dividends", lambda e: e["amount"])
+    df["Stock Splits"] = event_series("splits", lambda e: e["numerator"] / e["denominator"])
+
+    df = df.dropna(subset=["Open", "High", "Low", "Close"], how="all")
+    df = df[~df.index.duplicated(keep="last")]
+    df["Volume"] = df["Volume"].fillna(0).astype("int64")
+    df.index.name = "Date" if daily else "Datetime"
+    return df
+
+async def yahoo_chart(symbol, period="1y", interval="1d"):
+    """OHLCV history from the Yahoo chart endpoint (see chart_to_frame)."""
+    params = {"range": period, "interval": interval, "includePrePost": "false", "events": "div,splits"}
+    payload = await acall_provider("yahoo", _get_json, YAHOO_CHART_URL.format(symbol=symbol), params)
+    return chart_to_frame(payload, interval)
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from app.services.data_fetcher import fetch_ticker_data
+from app.services.market_calendar import market_session
+
+# Bars kept per symbol/interval. 500 x 1m covers a full session plus warm-up.
+DEFAULT_CAPACITY = 500
+# Symbols followed at once; the least recently used one is dropped beyond this
+MAX_SYMBOLS = 200
+# Lookback yfinance is polled with per interval (1m data is limited to 7 days)
+POLL_PERIODS = {"1m": "1d", "5m": "5d"}
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+class BarRingBuffer:
+    """
+    Fixed-size OHLCV ring buffer. Every bar is written twice (slot i and
+    i + capacity) so the latest `capacity` bars are always one contiguous
+    slice: view() never copies, no matter how long we run. Hold `lock`
+    around view() and frame(); frame() copies so its result outlives it.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._times = np.zeros(2 * capacity, dtype="int64") # epoch ns (UTC)
+        self._data = np.zeros((len(FIELDS), 2 * capacity), dtype="float64")
+        self._head = 0 # slot the next bar goes into
+        self._count = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def last_time(self):
+        if not self._count: return None
+        return int(self._times[self._head + self.capacity - 1])
+
+    def append(self, ts, open_, high, low, close, volume):
+        """Appends a bar, or replaces the last one when `ts` repeats (bar still forming)."""
+        ts = int(pd.Timestamp(ts).value)
+        last = self.last_time
+        if last is not None and ts < last:
+            return False # Out of order
+        i = (self._head - 1) % self.capacity if ts == last else self._head
+        row = (open_, high, low, close, volume)
+        for slot in (i, i + self.capacity):
+            self._times[slot] = ts
+            self._data[:, slot] = row
+        if ts != last:
+            self._head = (self._head + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+        return True
+
+    def extend(self, df):
+        """Appends the rows of an OHLCV frame that are not older than the last bar."""
+        if df is None or df.empty: return 0
+        last = self.last_time
+        times = df.index.asi8 # epoch ns (UTC for tz-aware indexes)
+        added = 0
+        for ts, row in zip(times, df[list(FIELDS)].itertuples(index=False)):
+            if last is not None and ts < last: continue
+            added += self.append(ts, *row)
+        return added
+
+    def view(self):
+        """(times, data) read-only arrays over the live window, oldest first. No copy."""
+        end = self._head + self.capacity
+        start = end - self._count
+        times, data = self._times[start:end], self._data[:, start:end]
+        times.flags.writeable = data.flags.writeable = False
+        return times, data
+
+    def frame(self, tz="America/New_York"):
+        """
+        OHLCV DataFrame copied out of the live window. The next append
+        rewrites the oldest slot of a full window in place, so a view handed
+        past the lock would change under the reader; 5 x capacity floats are
+        cheap to copy.
+        """
+        times, data = self.view()
+        index = pd.DatetimeIndex(pd.to_datetime(times, utc=True), name="Date").tz_convert(tz)
+        return pd.DataFrame(data.T.copy(), index=index, columns=list(FIELDS), copy=False)
+
+class IntradayStore:
+    """
+    Ring buffers per (symbol, interval), fed by polling yfinance or by pushed
+    bars. Memory stays at MAX_SYMBOLS x capacity bars however long it runs.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, max_symbols=MAX_SYMBOLS):
+        self.capacity = capacity
+        self.max_symbols = max_symbols
+        self._buffers = OrderedDict()
+        self._polled = {}
+        self._lock = threading.Lock()
+
+    def buffer(self, symbol, interval="1m"):
+        # Unknown intervals would each open a new buffer
+        if interval not in POLL_PERIODS:
+            raise ValueError(f"Unsupported intraday interval: {interval}")
+        key = (symbol.upper(), interval)
+        with self._lock:
+            buf = self._buffers.get(key)
+            if buf is None:
+                buf = self._buffers[key] = BarRingBuffer(self.capacity)
+                while len(self._buffers) > self.max_symbols:
+                    old, _ = self._buffers.popitem(last=False)
+                    self._polled.pop(old, None)
+            else:
+                self._buffers.move_to_end(key)
+            return buf
+
+    def push(self, symbol, interval, bars):
+        """Accepts pushed bars: iterable of dicts with time + OHLCV keys."""
+        buf = self.buffer(symbol, interval)
+        with buf.lock:
+            return sum(buf.append(b["time"], b["open"], b["high"], b["low"], b["close"], b["volume"]) for b in bars)
+
+    def poll(self, symbol, interval="1m", min_interval=30):
+        """Pulls the latest bars from yfinance, at most once per `min_interval` seconds."""
+        key = (symbol.upper(), interval)
+        buf = self.buffer(symbol, interval)
+        with self._lock:
+            if time.time() - self._polled.get(key, 0) < min_interval:
+                return 0
+            self._polled[key] = time.time() # Claimed before fetching: one poll in flight per key
+        # Straight to yfinance: polls are already rate limited and must not lag a refresh cycle
+        df = fetch_ticker_data.__wrapped__(symbol, period=POLL_PERIODS[interval], interval=interval)
+        with buf.lock:
+            return buf.extend(df)
+
+    def frame(self, symbol, interval="1m"):
+        buf = self.buffer(symbol, interval)
+        with buf.lock:
+            return buf.frame() if len(buf) else None
+
+    def symbols(self):
+        with self._lock:
+            return list(self._buffers.keys())
+
+intraday_store = IntradayStore()
+
+async def run_intraday_poller(every=60):
+    """Background loop refreshing every followed symbol/interval."""
+    while True:
+        # No new bars outside pre-market / regular / after-hours trading
+        if market_session() == "closed":
+            await asyncio.sleep(every)
+            continue
+        for symbol, interval in intraday_store.symbols():
+            try:
+                await asyncio.to_thread(intraday_store.poll, symbol, interval, every)
+            except Exception as e:
+                print(f"Intraday poll failed for {symbol} {interval}: {e}")
+        await asyncio.sleep(every)
@@ -0,0 +1,71 @@
+import asyncio
+import contextvars
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+# Upstream work is queued by priority (see providers.Bulkhead).
+# Request handlers run as "interactive" unless they say otherwise.
+PRIORITIES = {"interactive": 0, "peers": 1, "background": 2}
+current_priority = contextvars.ContextVar("current_priority", default="interactive")
+
+@contextmanager
+def priority(level):
+    token = current_priority.set(level)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+def with_priority(level):
+    """Runs the decorated function (and the upstream calls it makes) at `level`."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with priority(level):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def context_submit(executor, fn, *args, **kwargs):
+    """executor.submit that carries the caller's priority into the worker thread."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+def spawn_background(fn, *args):
+    """Fire-and-forget daemon thread running at background priority."""
+    def run():
+        with priority("background"):
+            fn(*args)
+    threading.Thread(target=run, daemon=True).start()
+
+async def run_every(fn, seconds, *args, run_now=True):
+    """Runs a blocking job in a worker thread every `seconds`."""
+    if not run_now:
+        await asyncio.sleep(seconds)
+    while True:
+        try:
+            with priority("background"):
+                await asyncio.to_thread(fn, *args)
+        except Exception as e:
+            print(f"Job {fn.__name__} failed: {e}")
+        await asyncio.sleep(seconds)
+
+async def run_background(fn, *args):
+    """One-off blocking job at background priority (e.g. a warm-up at startup)."""
+    with priority("background"):
+        return await asyncio.to_thread(fn, *args)
+
+async def run_daily(fn, hour_utc, *args):
+    """Runs a blocking job in a worker thread once a day at `hour_utc`."""
+    while True:
+        now = datetime.now(timezone.utc)
+        next_run = now.replace(hour=hour_utc, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        await asyncio.sleep((next_run - now).total_seconds())
+        try:
+            with priority("background"):
+                await asyncio.to_thread(fn, *args)
+        except Exception as e:
+            print(f"Job {fn.__name__} failed: {e}")
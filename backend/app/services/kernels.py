@@ -0,0 +1,149 @@
+import os
+import numpy as np
+
+# Optional JIT: picked up automatically when numba is installed.
+# COMPUTE_BACKEND=numpy|numba overrides the choice.
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Exit reasons returned by simulate_trades
+REASON_TREND_BREAK, REASON_PARABOLIC, REASON_STOP_LOSS, REASON_OPEN = 0, 1, 2, 3
+
+# --- NumPy reference kernels ---
+
+def _rolling_linreg_numpy(values, length):
+    """
+    End-point of a least-squares line over each trailing window (the
+    TradingView `linreg(src, length, 0)`), NaN until the first full window.
+    """
+    out = np.full(len(values), np.nan)
+    if len(values) < length:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(values, length)
+    x = np.arange(length) - (length - 1) / 2
+    slope = windows @ x / (x @ x)
+    out[length - 1:] = windows.mean(axis=1) + slope * (length - 1) / 2
+    return out
+
+def _local_minima_numpy(values, order=2):
+    """Indices strictly lower than the `order` neighbours on each side."""
+    n = len(values)
+    if n < 2 * order + 1:
+        return np.empty(0, dtype=np.int64)
+    center = values[order:n - order]
+    mask = np.ones(len(center), dtype=bool)
+    for k in range(1, order + 1):
+        mask &= center < values[order - k:n - order - k]
+        mask &= center < values[order + k:n - order + k]
+    return np.nonzero(mask)[0].astype(np.int64) + order
+
+# --- Loop kernels (JIT-compiled when numba is available) ---
+
+def _rolling_linreg_loop(values, length):
+    n = len(values)
+    out = np.full(n, np.nan)
+    x_mean = (length - 1) / 2.0
+    sxx = 0.0
+    for j in range(length):
+        sxx += (j - x_mean) ** 2
+    for i in range(length - 1, n):
+        sy = 0.0
+        sxy = 0.0
+        for j in range(length):
+            y = values[i - length + 1 + j]
+            sy += y
+            sxy += (j - x_mean) * y
+        out[i] = sy / length + (sxy / sxx) * x_mean
+    return out
+
+def _local_minima_loop(values, order=2):
+    n = len(values)
+    out = np.empty(max(n, 0), dtype=np.int64)
+    count = 0
+    for i in range(order, n - order):
+        is_min = True
+        for k in range(1, order + 1):
+            if not (values[i] < values[i - k] and values[i] < values[i + k]):
+                is_min = False
+                break
+        if is_min:
+            out[count] = i
+            count += 1
+    return out[:count]
+
+def _simulate_trades_loop(close, sma50, sma200, rsi, score, start, buy_threshold, sell_threshold):
+    """
+    Veteran long-only bar loop. Returns (entry_idx, exit_idx, reason) arrays;
+    a position still open at the end exits on the last bar with REASON_OPEN.
+    """
+    n = len(close)
+    entries = np.empty(n, dtype=np.int64)
+    exits = np.empty(n, dtype=np.int64)
+    reasons = np.empty(n, dtype=np.int64)
+    count = 0
+    in_position = False
+    entry_idx = -1
+    entry_price = 0.0
+    for i in range(start, n):
+        price = close[i]
+        if not in_position:
+            # BUY: High Score + Bullish Trend (Price > SMA200) + Not Overbought
+            if score[i] >= buy_threshold and price > sma200[i] and rsi[i] < 70:
+                in_position = True
+                entry_idx = i
+                entry_price = price
+        else:
+            # SELL: Score Collapse AND Trend Break, Parabolic (RSI > 80), or 10% Stop
+            trend_broken = price < sma50[i]
+            parabolic = rsi[i] > 80
+            stop_loss = price < entry_price * 0.90
+            if (score[i] <= sell_threshold and trend_broken) or parabolic or stop_loss:
+                entries[count] = entry_idx
+                exits[count] = i
+                if trend_broken: reasons[count] = REASON_TREND_BREAK
+                elif parabolic: reasons[count] = REASON_PARABOLIC
+                else: reasons[count] = REASON_STOP_LOSS
+                count += 1
+                in_position = False
+    if in_position:
+        entries[count] = entry_idx
+        exits[count] = n - 1
+        reasons[count] = REASON_OPEN
+        count += 1
+    return entries[:count], exits[:count], reasons[:count]
+
+_LOOP_KERNELS = {
+    "rolling_linreg": _rolling_linreg_loop,
+    "local_minima": _local_minima_loop,
+    "simulate_trades": _simulate_trades_loop,
+}
+
+BACKENDS = {
+    # The trade simulation is inherently sequential, so the reference backend
+    # runs the same loop in plain Python.
+    "numpy": {
+        "rolling_linreg": _rolling_linreg_numpy,
+        "local_minima": _local_minima_numpy,
+        "simulate_trades": _simulate_trades_loop,
+    }
+}
+if numba is not None:
+    BACKENDS["numba"] = {name: numba.njit(cache=True)(fn) for name, fn in _LOOP_KERNELS.items()}
+
+BACKEND = os.getenv("COMPUTE_BACKEND") or ("numba" if numba is not None else "numpy")
+if BACKEND not in BACKENDS:
+    print(f"Compute backend '{BACKEND}' unavailable. Using numpy.")
+    BACKEND = "numpy"
+_active = BACKENDS[BACKEND]
+
+def rolling_linreg(values, length):
+    return _active["rolling_linreg"](np.ascontiguousarray(values, dtype=np.float64), length)
+
+def local_minima(values, order=2):
+    return _active["local_minima"](np.ascontiguousarray(values, dtype=np.float64), order)
+
+def simulate_trades(close, sma50, sma200, rsi, score, start, buy_threshold, sell_threshold):
+    arr = lambda a: np.ascontiguousarray(a, dtype=np.float64)
+    return _active["simulate_trades"](arr(close), arr(sma50), arr(sma200), arr(rsi), arr(score), int(start), float(buy_threshold), float(sell_threshold))
@@ -1,7 +1,8 @@
 import pandas as pd
 import numpy as np
 import yfinance as yf
-from app.services.data_fetcher import fetch_ticker_data
+from app.services.data_fetcher import fetch_ticker_data, fetch_price_panel, price_cache
+from app.services.cache import ttl_cache, data_path
 
 MACRO_ASSETS = {
     "DXY": "DX-Y.NYB",    # US Dollar Index
@@ -11,149 +12,280 @@ MACRO_ASSETS = {
     "S&P 500": "SPY"
 }
 
-def calculate_macro_correlations(ticker_df):
+MACRO_MATRIX_PERIOD = "6mo"
+MACRO_MATRIX_TTL = 900
+
+@ttl_cache(ttl=MACRO_MATRIX_TTL, maxsize=4)
+def get_macro_return_matrix(period=MACRO_MATRIX_PERIOD):
+    """
+    Daily returns of every MACRO_ASSETS entry on one aligned weekday index,
+    plus each asset's 5-day trend. Built once per refresh window and shared
+    by every analysis.
+    """
+    closes = fetch_price_panel(list(MACRO_ASSETS.values()), period=period)
+    if closes.empty:
+        return None
+    # Equities set the calendar; BTC weekend prints roll into Monday's return
+    closes = closes[closes.index.dayofweek < 5]
+    returns = closes.pct_change().iloc[1:]
+    recent = closes.tail(5)
+    trends = {s: "Rising" if recent[s].iloc[-1] > recent[s].iloc[0] else "Falling" for s in closes.columns}
+    return {"returns": returns, "trends": trends}
+
+def calculate_macro_correlations(ticker_df, window=60):
     """
-    Calculates 90-day correlations between the stock and major macro assets.
+    Calculates 60-day correlations between the stock and major macro assets
+    as one vector-matrix product against the shared macro return matrix.
     """
     if ticker_df is None or ticker_df.empty:
         return {}
 
-    correlations = {}
+    matrix = get_macro_return_matrix()
+    if matrix is None:
+        return {}
+
     # Use returns for correlation to avoid price-level bias
-    ticker_returns = ticker_df['Close'].pct_change().dropna()
-    
+    closes = ticker_df['Close'].set_axis(pd.DatetimeIndex(ticker_df.index.date))
+    ticker_returns = closes.pct_change().dropna()
+    common = matrix["returns"].index.intersection(ticker_returns.index)[-window:]
+    if len(common) < 3:
+        return {}
+
+    macro = matrix["returns"].loc[common].to_numpy()
+    stock = ticker_returns.loc[common].to_numpy()
+    macro = macro - macro.mean(axis=0)
+    stock = stock - stock.mean()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corrs = (macro.T @ stock) / np.sqrt((macro ** 2).sum(axis=0) * (stock ** 2).sum())
+
+    correlations = {}
     for name, symbol in MACRO_ASSETS.items():
-        try:
-            macro_df = fetch_ticker_data(symbol, period="6mo")
-            if macro_df is not None and not macro_df.empty:
-                macro_returns = macro_df['Close'].pct_change().dropna()
-                # Align indices
-                combined = pd.concat([ticker_returns, macro_returns], axis=1).dropna()
-                combined.columns = ['Stock', 'Macro']
-                
-                # Calculate 60-day correlation (approx 3 months of trading days)
-                corr = combined['Stock'].tail(60).corr(combined['Macro'])
-                
-                # Determine current trend of macro asset (5-day slope)
-                recent_macro = macro_df['Close'].tail(5)
-                trend = "Rising" if recent_macro.iloc[-1] > recent_macro.iloc[0] else "Falling"
-                
-                correlations[name] = {
-                    "value": round(float(corr), 2) if not np.isnan(corr) else 0,
-                    "trend": trend,
-                    "symbol": symbol
-                }
-        except Exception as e:
-            print(f"Failed correlation for {name}: {e}")
+        if symbol not in matrix["returns"].columns:
             continue
-            
+        corr = corrs[matrix["returns"].columns.get_loc(symbol)]
+        correlations[name] = {
+            "value": round(float(corr), 2) if np.isfinite(corr) else 0,
+            "trend": matrix["trends"][symbol],
+            "symbol": symbol
+        }
     return correlations
 
-def get_doomsday_score():
+# --- Universe x Macro Alignment Table ---
+ALIGNMENT_WINDOW = 60
+ALIGNMENT_FILE = "macro_alignment.pkl"
+_alignment = {"table": None, "trends": {}, "as_of": None}
+
+def compute_macro_alignment_table(tickers, window=ALIGNMENT_WINDOW):
     """
-    Calculates a 'Doomsday Rating' (0-100) based on macro pillars:
-    1. Yield Curve Inversion (35%)
-    2. Sahm Rule (25%)
-    3. Sector Defensiveness (20%)
-    4. Credit Stress/VIX (20%)
+    60-day correlation and beta of every ticker against every MACRO_ASSETS
+    entry, from one aligned returns panel: a single (N x 60) @ (60 x K)
+    covariance product instead of N x K pairwise calls.
+    Returns a float32 frame indexed by ticker with (metric, asset) columns.
     """
+    matrix = get_macro_return_matrix()
+    if matrix is None or not tickers:
+        return None
+    macro = matrix["returns"]
+    closes = fetch_price_panel(tickers, period=MACRO_MATRIX_PERIOD)
+    if closes.empty:
+        return None
+    returns = closes[closes.index.dayofweek < 5].pct_change().iloc[1:]
+    common = returns.index.intersection(macro.index)[-window:]
+    stocks = returns.loc[common].dropna(axis=1) # Require a full window (drops fresh IPOs)
+    m = macro.loc[common].to_numpy()
+    x = stocks.to_numpy()
+
+    m = m - m.mean(axis=0)
+    x = x - x.mean(axis=0)
+    cov = (x.T @ m) / (len(common) - 1)
+    var_m = (m ** 2).sum(axis=0) / (len(common) - 1)
+    std_x = np.sqrt((x ** 2).sum(axis=0) / (len(common) - 1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov / np.outer(std_x, np.sqrt(var_m))
+        beta = cov / var_m
+
+    names = {v: k for k, v in MACRO_ASSETS.items()}
+    assets = [names[s] for s in macro.columns]
+    columns = pd.MultiIndex.from_product([["corr", "beta"], assets])
+    table = pd.DataFrame(np.hstack([corr, beta]).astype("float32"), index=stocks.columns, columns=columns)
+    table.index.name = "Ticker"
+    return table
+
+def refresh_macro_alignment(tickers=None):
+    """Nightly / on-demand job: rebuilds and persists the alignment table."""
+    from app.services.scanner import get_sp500_tickers
+    tickers = tickers or get_sp500_tickers() or []
+    table = compute_macro_alignment_table(tickers)
+    if table is None:
+        return None
+    matrix = get_macro_return_matrix()
+    names = {v: k for k, v in MACRO_ASSETS.items()}
+    _alignment.update({
+        "table": table,
+        "trends": {names[s]: t for s, t in matrix["trends"].items()},
+        "as_of": pd.Timestamp.now(tz="UTC")
+    })
     try:
-        score = 0
-        pillars = {}
-
-        # 1. Yield Curve Inversion (35%)
-        # 10Y (^TNX) minus 13W (^IRX) - Using 13W as specified in prompt
-        tnx = yf.Ticker("^TNX").history(period="1d")['Close'].iloc[-1]
-        irx = yf.Ticker("^IRX").history(period="1d")['Close'].iloc[-1]
-        spread = tnx - irx
-        
-        yc_score = 100 if spread < 0 else 0
-        score += yc_score * 0.35
-        pillars["yield_curve"] = {"value": round(spread, 3), "risk": "HIGH" if spread < 0 else "LOW", "score": yc_score}
-
-        # 2. Sahm Rule (Mocked due to data availability) (25%)
-        # Trigger: Current 3-month avg unemployment vs 12-month low > 0.5%
-        # Standard value as of late 2024/2025 is ~0.53 (Triggered)
-        sahm_value = 0.53 
-        sahm_score = 100 if sahm_value >= 0.5 else (sahm_value / 0.5 * 100)
-        score += sahm_score * 0.25
-        pillars["sahm_rule"] = {"value": f"{sahm_value}%", "risk": "HIGH" if sahm_value >= 0.5 else "LOW", "score": sahm_score}
-
-        # 3. Sector Defensiveness (20%)
-        # performance of XLU + XLP vs XLK (last 30 days)
-        def get_perf(symbol):
-            df = yf.Ticker(symbol).history(period="1mo")
-            return (df['Close'].iloc[-1] / df['Close'].iloc[0]) - 1
-
-        xlu_perf = get_perf("XLU")
-        xlp_perf = get_perf("XLP")
-        xlk_perf = get_perf("XLK")
-        
-        defensive_avg = (xlu_perf + xlp_perf) / 2
-        rotation_risk = 100 if defensive_avg > xlk_perf else 0
-        score += rotation_risk * 0.20
-        pillars["sector_flow"] = {
-            "value": "DEFENSIVE" if defensive_avg > xlk_perf else "AGGRESSIVE",
-            "risk": "HIGH" if defensive_avg > xlk_perf else "LOW",
-            "score": rotation_risk
+        pd.to_pickle(_alignment, data_path(ALIGNMENT_FILE))
+    except Exception as e:
+        print(f"Could not persist macro alignment table: {e}")
+    return table
+
+def load_macro_alignment():
+    """Warm start from the last persisted table."""
+    try:
+        _alignment.update(pd.read_pickle(data_path(ALIGNMENT_FILE)))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Could not load macro alignment table: {e}")
+    return _alignment["table"]
+
+def get_macro_alignment(ticker):
+    """
+    O(1) lookup in the precomputed table, shaped like
+    calculate_macro_correlations() so the scorer can consume it directly.
+    """
+    table = _alignment["table"]
+    if table is None or ticker not in table.index:
+        return {}
+    row = table.loc[ticker]
+    return {
+        name: {
+            "value": round(float(row[("corr", name)]), 2) if np.isfinite(row[("corr", name)]) else 0,
+            "beta": round(float(row[("beta", name)]), 2) if np.isfinite(row[("beta", name)]) else 0,
+            "trend": _alignment["trends"].get(name, "Neutral"),
+            "symbol": MACRO_ASSETS[name]
         }
+        for name in MACRO_ASSETS if ("corr", name) in row.index
+    }
+
+# Doomsday inputs, pulled together in one batch and cached per symbol
+DOOMSDAY_INPUTS = {
+    "tnx": "^TNX",     # 10Y Yield
+    "irx": "^IRX",     # 13W Yield
+    "xlu": "XLU", "xlp": "XLP", "xlk": "XLK",
+    "vix": "^VIX",
+    "copper": "HG=F", "gold": "GC=F"
+}
+DOOMSDAY_PERIOD = "5y"
+DOOMSDAY_TTL = 900
 
-        # 4. Credit Stress (VIX) (20%)
-        vix = yf.Ticker("^VIX").history(period="1d")['Close'].iloc[-1]
-        vix_score = min(100, (vix / 30) * 100) if vix > 20 else (vix / 20 * 50)
-        score += vix_score * 0.20
-        pillars["credit_stress"] = {"value": f"{round(vix, 2)} (VIX)", "risk": "HIGH" if vix > 30 else "MEDIUM" if vix > 20 else "LOW", "score": vix_score}
+# Sahm Rule (Mocked due to data availability)
+# Trigger: Current 3-month avg unemployment vs 12-month low > 0.5%
+# Standard value as of late 2024/2025 is ~0.53 (Triggered)
+SAHM_VALUE = 0.53
 
-        # 5. Dr. Copper (Copper/Gold Ratio) (20%)
-        # Signal: Falling ratio = Economic Slowdown
-        copper = yf.Ticker("HG=F").history(period="6mo")['Close']
-        gold = yf.Ticker("GC=F").history(period="6mo")['Close']
-        
-        # Align dates and calculate ratio
-        combined = pd.concat([copper, gold], axis=1).dropna()
-        combined.columns = ['Copper', 'Gold']
-        ratio = combined['Copper'] / combined['Gold']
-        
-        current_ratio = ratio.iloc[-1]
-        ma_ratio = ratio.mean() # 6-month average
-        
-        # If Current Ratio is below 6mo Average, it's a slowdown signal
-        commodities_score = 100 if current_ratio < ma_ratio else 0
-        score += commodities_score * 0.20
-        
-        pillars["dr_copper"] = {
-            "value": f"{current_ratio:.4f}",
-            "risk": "HIGH" if current_ratio < ma_ratio else "LOW",
-            "score": commodities_score,
-            "trend": "FALLING" if current_ratio < ma_ratio else "RISING"
+# Re-weighted pillars (Total: 100%)
+DOOMSDAY_WEIGHTS = {
+    "yc_score": 0.30,          # Yield Curve
+    "sahm_score": 0.20,        # Sahm Rule
+    "rotation_risk": 0.15,     # Sector Flow
+    "vix_score": 0.15,         # Credit Stress
+    "commodities_score": 0.20  # Dr. Copper
+}
+
+def fetch_doomsday_inputs(ttl=DOOMSDAY_TTL):
+    """Aligned close panel for all doomsday inputs (one batch download when cold)."""
+    return fetch_price_panel(list(DOOMSDAY_INPUTS.values()), period=DOOMSDAY_PERIOD, ttl=ttl)
+
+def export_doomsday_inputs():
+    """{symbol: (frame, age_seconds)} for every doomsday input still in cache."""
+    out = {}
+    for symbol in DOOMSDAY_INPUTS.values():
+        key = (symbol, DOOMSDAY_PERIOD, "1d")
+        df = price_cache.get(key)
+        if df is not None:
+            out[symbol] = (df, price_cache.age(key))
+    return out
+
+def import_doomsday_inputs(inputs, ttl=DOOMSDAY_TTL):
+    """Seeds the cache from export_doomsday_inputs(); expired inputs are skipped."""
+    for symbol, (df, age) in inputs.items():
+        if age is not None and age < ttl:
+            price_cache.set((symbol, DOOMSDAY_PERIOD, "1d"), df, ttl - age)
+
+def calculate_doomsday_series(panel):
+    """
+    Vectorized pillar scores for every date in the panel.
+    """
+    p = panel.rename(columns={v: k for k, v in DOOMSDAY_INPUTS.items()})
+    out = pd.DataFrame(index=p.index)
+
+    # 1. Yield Curve Inversion: 10Y (^TNX) minus 13W (^IRX)
+    out["spread"] = p["tnx"] - p["irx"]
+    out["yc_score"] = np.where(out["spread"] < 0, 100.0, 0.0)
+
+    # 2. Sahm Rule
+    out["sahm_score"] = 100.0 if SAHM_VALUE >= 0.5 else (SAHM_VALUE / 0.5 * 100)
+
+    # 3. Sector Defensiveness: XLU + XLP vs XLK over the last month (~21 sessions)
+    perf = p[["xlu", "xlp", "xlk"]].pct_change(21)
+    out["defensive_avg"] = (perf["xlu"] + perf["xlp"]) / 2
+    out["xlk_perf"] = perf["xlk"]
+    out["rotation_risk"] = np.where(out["defensive_avg"] > out["xlk_perf"], 100.0, 0.0)
+
+    # 4. Credit Stress (VIX)
+    out["vix"] = p["vix"]
+    out["vix_score"] = np.where(p["vix"] > 20, np.minimum(100, (p["vix"] / 30) * 100), p["vix"] / 20 * 50)
+
+    # 5. Dr. Copper: Copper/Gold ratio below its 6-month (~126 sessions) average = slowdown
+    out["cg_ratio"] = p["copper"] / p["gold"]
+    out["cg_ma"] = out["cg_ratio"].rolling(window=126).mean()
+    out["commodities_score"] = np.where(out["cg_ratio"] < out["cg_ma"], 100.0, 0.0)
+
+    out = out.dropna()
+    out["score"] = sum(out[col] * w for col, w in DOOMSDAY_WEIGHTS.items())
+    return out
+
+def get_doomsday_verdict(score):
+    if score > 70: return "CRITICAL"
+    if score > 40: return "WATCH"
+    return "STABLE"
+
+def get_doomsday_score(ttl=DOOMSDAY_TTL):
+    """
+    Calculates a 'Doomsday Rating' (0-100) based on macro pillars:
+    1. Yield Curve Inversion (30%)
+    2. Sahm Rule (20%)
+    3. Sector Defensiveness (15%)
+    4. Credit Stress/VIX (15%)
+    5. Dr. Copper (20%)
+    Also returns the daily rating history computed from the same inputs.
+    """
+    try:
+        series = calculate_doomsday_series(fetch_doomsday_inputs(ttl))
+        if series.empty:
+            raise ValueError("No doomsday input data available")
+        today = series.iloc[-1]
+
+        spread = today["spread"]
+        defensive = today["defensive_avg"] > today["xlk_perf"]
+        vix = today["vix"]
+        slowdown = today["cg_ratio"] < today["cg_ma"]
+        pillars = {
+            "yield_curve": {"value": round(spread, 3), "risk": "HIGH" if spread < 0 else "LOW", "score": today["yc_score"]},
+            "sahm_rule": {"value": f"{SAHM_VALUE}%", "risk": "HIGH" if SAHM_VALUE >= 0.5 else "LOW", "score": today["sahm_score"]},
+            "sector_flow": {
+                "value": "DEFENSIVE" if defensive else "AGGRESSIVE",
+                "risk": "HIGH" if defensive else "LOW",
+                "score": today["rotation_risk"]
+            },
+            "credit_stress": {"value": f"{round(vix, 2)} (VIX)", "risk": "HIGH" if vix > 30 else "MEDIUM" if vix > 20 else "LOW", "score": today["vix_score"]},
+            "dr_copper": {
+                "value": f"{today['cg_ratio']:.4f}",
+                "risk": "HIGH" if slowdown else "LOW",
+                "score": today["commodities_score"],
+                "trend": "FALLING" if slowdown else "RISING"
+            }
         }
-        
-        # Re-normalize score (Total weights = 1.2 now, need to scale back to 100 if we keep additive)
-        # Actually, let's re-weight:
-        # Yield Curve: 30%
-        # Sahm Rule: 20%
-        # Sector: 15%
-        # Credit: 15%
-        # Copper: 20%
-        # Total: 100%
-        
-        final_score = (
-            (yc_score * 0.30) + 
-            (sahm_score * 0.20) + 
-            (rotation_risk * 0.15) + 
-            (vix_score * 0.15) + 
-            (commodities_score * 0.20)
-        )
-
-        # Strategic Verdict
-        verdict = "STABLE"
-        if final_score > 70: verdict = "CRITICAL"
-        elif final_score > 40: verdict = "WATCH"
+
+        final_score = today["score"]
 
         advice_list = []
-        if yc_score > 50: advice_list.append("Yield Curve Inverted")
-        if sahm_score > 50: advice_list.append("Labor Weakness")
-        if commodities_score > 50: advice_list.append("Industrial Slowdown (Copper/Gold)")
+        if today["yc_score"] > 50: advice_list.append("Yield Curve Inverted")
+        if today["sahm_score"] > 50: advice_list.append("Labor Weakness")
+        if today["commodities_score"] > 50: advice_list.append("Industrial Slowdown (Copper/Gold)")
         
         advice_str = "Macro environment remains supportive."
         if advice_list:
@@ -161,9 +293,11 @@ def get_doomsday_score():
 
         return {
             "overall_score": int(final_score),
-            "verdict": verdict,
+            "verdict": get_doomsday_verdict(final_score),
             "pillars": pillars,
-            "advice": advice_str
+            "advice": advice_str,
+            "as_of": series.index[-1],
+            "history": [{"date": d, "score": int(v)} for d, v in series["score"].items()]
         }
 
     except Exception as e:
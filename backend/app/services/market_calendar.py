@@ -0,0 +1,143 @@
+from datetime import date, datetime, time as dtime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+# NYSE session calendar used to time cache expiry
+NY = ZoneInfo("America/New_York")
+PRE_OPEN = dtime(4, 0)
+OPEN = dtime(9, 30)
+CLOSE = dtime(16, 0)
+EARLY_CLOSE = dtime(13, 0)
+AFTER_HOURS = timedelta(hours=4) # Extended trading runs 4h past the close
+CLOSE_SETTLE = timedelta(minutes=15) # Closing auction prints land shortly after the close
+# Longest hold for "open"/"pre" policies: Friday close to the open after a
+# Monday holiday is ~90h, so only a calendar gap this table misses hits it
+MAX_MARKET_TTL = 4 * 86400
+
+# Seconds an entry stays fresh per session. "open" = until the next regular
+# open (weekends and holidays included), "pre" = until the next pre-market,
+# both capped at MAX_MARKET_TTL; numbers are capped at the next session
+# change so the close and the open always trigger a refresh. Daily bars and
+# fundamentals do not move after the close, so they are held to the open
+# (past CLOSE_SETTLE, which lets the closing prints land first).
+MARKET_TTLS = {
+    "prices": {"pre": "open", "regular": 60, "after": "open", "closed": "open"},
+    "intraday": {"pre": 60, "regular": 30, "after": 60, "closed": "pre"},
+    "screener": {"pre": 1800, "regular": 900, "after": 1800, "closed": "open"},
+    "vix": {"pre": "open", "regular": 60, "after": 900, "closed": "open"},
+    "quote": {"pre": 300, "regular": 30, "after": "open", "closed": "open"},        # Quote-page fundamentals (carry the price)
+    "fundamentals": {"pre": 300, "regular": 300, "after": "open", "closed": "open"}, # Peer rows
+}
+
+def _observed(d):
+    if d.weekday() == 5: return d - timedelta(days=1)
+    if d.weekday() == 6: return d + timedelta(days=1)
+    return d
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th `weekday` of the month (n=-1 for the last one)."""
+    if n > 0:
+        d = date(year, month, 1)
+        d += timedelta(days=(weekday - d.weekday()) % 7)
+        return d + timedelta(weeks=n - 1)
+    d = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return d - timedelta(days=(d.weekday() - weekday) % 7)
+
+def _easter(year):
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+@lru_cache(maxsize=16)
+def nyse_holidays(year):
+    days = {
+        _observed(date(year, 7, 4)),
+        _observed(date(year, 12, 25)),
+        _nth_weekday(year, 1, 0, 3),   # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),   # Washington's Birthday
+        _easter(year) - timedelta(days=2), # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _nth_weekday(year, 9, 0, 1),   # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+    }
+    # New Year's Day on a Saturday is not observed on the Friday before
+    if date(year, 1, 1).weekday() != 5:
+        days.add(_observed(date(year, 1, 1)))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19))) # Juneteenth
+    return frozenset(days)
+
+@lru_cache(maxsize=16)
+def nyse_early_closes(year):
+    candidates = {date(year, 7, 3), _nth_weekday(year, 11, 3, 4) + timedelta(days=1), date(year, 12, 24)}
+    return frozenset(d for d in candidates if is_trading_day(d))
+
+def is_trading_day(d):
+    return d.weekday() < 5 and d not in nyse_holidays(d.year)
+
+def _to_ny(now=None):
+    if now is None:
+        return datetime.now(NY)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=ZoneInfo("UTC"))
+    return now.astimezone(NY)
+
+def session_times(d):
+    """(pre_open, open, close, after_close) for a trading day, else None."""
+    if not is_trading_day(d):
+        return None
+    close = EARLY_CLOSE if d in nyse_early_closes(d.year) else CLOSE
+    at = lambda t: datetime.combine(d, t, tzinfo=NY)
+    return at(PRE_OPEN), at(OPEN), at(close), at(close) + AFTER_HOURS
+
+def market_session(now=None):
+    """'pre', 'regular', 'after' or 'closed' for US equities."""
+    now = _to_ny(now)
+    times = session_times(now.date())
+    if times is None or now < times[0] or now >= times[3]:
+        return "closed"
+    if now < times[1]: return "pre"
+    if now < times[2]: return "regular"
+    return "after"
+
+def _next_time(now, index):
+    """Next session_times()[index] strictly after `now`."""
+    d = now.date()
+    for _ in range(15):
+        times = session_times(d)
+        if times is not None and times[index] > now:
+            return times[index]
+        d += timedelta(days=1)
+    return now + timedelta(days=1)
+
+def next_open(now=None):
+    return _next_time(_to_ny(now), 1)
+
+def next_pre_open(now=None):
+    return _next_time(_to_ny(now), 0)
+
+def next_session_change(now=None):
+    now = _to_ny(now)
+    return min(_next_time(now, i) for i in range(4))
+
+def market_ttl(kind, now=None):
+    """Seconds a `kind` of market data cached now stays fresh (see MARKET_TTLS)."""
+    now = _to_ny(now)
+    session = market_session(now)
+    policy = MARKET_TTLS[kind][session]
+    if policy in ("open", "pre"):
+        until = next_open(now) if policy == "open" else next_pre_open(now)
+        if session == "after":
+            settled = session_times(now.date())[2] + CLOSE_SETTLE
+            until = min(until, settled) if now < settled else until
+        return max(60.0, min(float(MAX_MARKET_TTL), (until - now).total_seconds()))
+    return max(1.0, min(float(policy), (next_session_change(now) - now).total_seconds()))
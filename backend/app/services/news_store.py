@@ -0,0 +1,180 @@
+import bisect
+import pickle
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+import pandas as pd
+from app.services.cache import data_path
+from app.services.jobs import spawn_background
+
+# Local headline store: per-ticker Finviz feeds polled incrementally, deduped
+# by URL and normalized title, indexed by ticker and publish time.
+NEWS_FILE = "news_store.pkl"
+NEWS_TZ = "America/New_York" # Finviz prints Eastern time
+NEWS_POLL_INTERVAL = 120     # A feed is re-polled at most this often
+NEWS_RETENTION = 7 * 86400
+VELOCITY_WINDOW_HOURS = 24
+WATCH_TTL = 6 * 3600         # Tickers looked up recently keep being polled
+WATCH_BATCH = 20             # Feeds per background polling pass
+
+# Opinion / retail outlets on the Finviz feed, used for the "social" pulse
+SOCIAL_SOURCES = {"Motley Fool", "Seeking Alpha", "InvestorPlace", "Insider Monkey", "GuruFocus.com",
+                  "TipRanks", "24/7 Wall St.", "Benzinga", "Zacks"}
+
+_store = {
+    "items": {},     # key -> {title, url, source, published (UTC), tickers}
+    "titles": {},    # normalized title -> key
+    "by_ticker": {}, # ticker -> sorted [(published, key)]
+    "feeds": {},     # ticker -> {polled_at, latest}
+}
+_watched = {} # ticker -> last lookup
+_lock = threading.RLock()
+
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    return f"{parts.netloc.lower().removeprefix('www.')}{parts.path.rstrip('/')}"
+
+def normalize_title(title):
+    return re.sub(r"[^a-z0-9]+", " ", title.lower()).strip()
+
+def ingest(ticker, news_df):
+    """
+    Adds a Finviz news frame (Date/Title/Link/Source) to the store. Rows
+    older than the feed's last seen headline are skipped; a headline already
+    stored under another URL or title is linked to `ticker` instead of duplicated.
+    Returns the number of new headlines.
+    """
+    now = time.time()
+    added = 0
+    with _lock:
+        feed = _store["feeds"].setdefault(ticker, {"polled_at": 0, "latest": None})
+        feed["polled_at"] = now
+        if news_df is None or news_df.empty:
+            return 0
+        published = pd.to_datetime(news_df["Date"]).dt.tz_localize(NEWS_TZ, ambiguous="NaT", nonexistent="shift_forward").dt.tz_convert("UTC")
+        latest = feed["latest"]
+        index = _store["by_ticker"].setdefault(ticker, [])
+        for (_, row), at in zip(news_df.iterrows(), published):
+            # Finviz stamps to the minute: keep the boundary minute, dedup drops repeats
+            if pd.isna(at) or (latest is not None and at < latest):
+                continue
+            key = normalize_url(row["Link"])
+            title_key = normalize_title(row["Title"])
+            key = key if key in _store["items"] else _store["titles"].get(title_key, key)
+            item = _store["items"].get(key)
+            if item is None:
+                item = {"title": row["Title"], "url": row["Link"], "source": row.get("Source", ""), "published": at, "tickers": set()}
+                _store["items"][key] = item
+                _store["titles"][title_key] = key
+                added += 1
+            if ticker not in item["tickers"]:
+                item["tickers"].add(ticker)
+                bisect.insort(index, (item["published"], key))
+        if index:
+            feed["latest"] = max(index[-1][0], latest) if latest is not None else index[-1][0]
+    return added
+
+def prune(now=None):
+    """Drops headlines older than NEWS_RETENTION."""
+    cutoff = pd.Timestamp(now or time.time(), unit="s", tz="UTC") - pd.Timedelta(seconds=NEWS_RETENTION)
+    with _lock:
+        for ticker, index in _store["by_ticker"].items():
+            _store["by_ticker"][ticker] = index[bisect.bisect_left(index, (cutoff, "")):]
+        old = [k for k, item in _store["items"].items() if item["published"] < cutoff]
+        for key in old:
+            item = _store["items"].pop(key)
+            _store["titles"].pop(normalize_title(item["title"]), None)
+
+def poll_feed(ticker):
+    """Scrapes the ticker's Finviz feed once and ingests what is new."""
+    from app.services.data_fetcher import finviz_quote
+    try:
+        return ingest(ticker, finviz_quote(ticker).ticker_news())
+    except Exception as e:
+        print(f"News poll failed for {ticker}: {e}")
+        with _lock:
+            _store["feeds"].setdefault(ticker, {"polled_at": 0, "latest": None})["polled_at"] = time.time()
+        return 0
+
+def ensure_fresh(ticker):
+    """
+    Stale-while-revalidate over the feed: a never-polled ticker is polled
+    inline, a stale one is served as is and re-polled in the background.
+    """
+    with _lock:
+        _watched[ticker] = time.time()
+        feed = _store["feeds"].get(ticker)
+    if feed is None:
+        poll_feed(ticker)
+    elif time.time() - feed["polled_at"] > NEWS_POLL_INTERVAL:
+        with _lock:
+            feed["polled_at"] = time.time() # One refresh in flight per feed
+        spawn_background(poll_feed, ticker)
+
+def poll_watched(batch=WATCH_BATCH):
+    """Background job: re-polls the stalest feeds of recently viewed tickers, prunes, persists."""
+    now = time.time()
+    with _lock:
+        for ticker in [t for t, seen in _watched.items() if now - seen > WATCH_TTL]:
+            del _watched[ticker]
+        due = [t for t in _watched if now - _store["feeds"].get(t, {}).get("polled_at", 0) > NEWS_POLL_INTERVAL]
+        due.sort(key=lambda t: _store["feeds"].get(t, {}).get("polled_at", 0))
+    for ticker in due[:batch]:
+        poll_feed(ticker)
+    prune(now)
+    save_news_store()
+
+def save_news_store():
+    """Persists the store. Serialized under the lock (the nested sets and lists
+    are mutated by ingest), written to disk outside it."""
+    try:
+        with _lock:
+            payload = pickle.dumps(_store, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(data_path(NEWS_FILE), "wb") as f:
+            f.write(payload)
+    except Exception as e:
+        print(f"Could not persist news store: {e}")
+
+def load_news_store():
+    """Warm start from the persisted store (feeds are re-polled on first use)."""
+    try:
+        saved = pd.read_pickle(data_path(NEWS_FILE))
+        with _lock:
+            _store.update(saved)
+            for feed in _store["feeds"].values():
+                feed["polled_at"] = 0
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Could not load news store: {e}")
+    return _store["items"]
+
+def get_news(ticker, limit=10, since=None, sources=None):
+    """Newest-first headline dicts for `ticker` from the store (no network)."""
+    with _lock:
+        index = _store["by_ticker"].get(ticker, [])
+        start = bisect.bisect_left(index, (since, "")) if since is not None else 0
+        out = []
+        for _, key in reversed(index[start:]):
+            item = _store["items"].get(key)
+            if item is None or (sources is not None and item["source"] not in sources):
+                continue
+            out.append({k: v for k, v in item.items() if k != "tickers"})
+            if len(out) >= limit:
+                break
+    return out
+
+def format_headline(item):
+    published = item["published"].tz_convert(NEWS_TZ)
+    return f"[{published:%Y-%m-%d %H:%M:%S}] {item['title']} (Source: {item['url']})"
+
+def news_velocity(ticker, hours=VELOCITY_WINDOW_HOURS):
+    """Headlines per hour over the last `hours`; None when the feed was never polled."""
+    with _lock:
+        if ticker not in _store["feeds"]:
+            return None
+        index = _store["by_ticker"].get(ticker, [])
+        since = pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=hours)
+        count = len(index) - bisect.bisect_left(index, (since, ""))
+    return round(count / hours, 3)
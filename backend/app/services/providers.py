@@ -0,0 +1,248 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from app.services.cache import TTLCache
+from app.services.jobs import PRIORITIES, current_priority
+
+# Unknown tickers and other definitive misses, remembered per provider
+NEGATIVE_TTL = 300
+negative_cache = TTLCache(ttl=NEGATIVE_TTL, maxsize=4096)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open."""
+
+class TickerNotFound(Exception):
+    """The provider answered, and the symbol does not exist there."""
+
+class QueueTimeout(Exception):
+    """A call waited longer than its priority's queue deadline for a slot."""
+
+# Longest a call may wait for a provider slot, per priority
+QUEUE_DEADLINES = {"interactive": 20, "peers": 5, "background": 600}
+
+class _Waiter:
+    """A queued bulkhead caller; `notify` wakes it (a thread event or a loop future)."""
+
+    def __init__(self, notify):
+        self.notify = notify
+        self.granted = False
+        self.cancelled = False
+
+class Bulkhead:
+    """
+    Bounded concurrency per provider. Waiting calls are admitted by priority
+    (interactive > peers > background), FIFO within a level, and give up with
+    QueueTimeout once their queue deadline passes. Threads and coroutines
+    share one queue; release() hands the slot straight to the head waiter.
+    """
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self._active = 0
+        self._waiting = [] # heap of (priority, seq, waiter); cancelled waiters are skipped lazily
+        self._queued = 0   # live (not cancelled) waiters
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._timeouts = 0
+
+    def _enqueue(self, level, notify):
+        """Takes a free slot (returns None) or queues a waiter for one."""
+        with self._lock:
+            if self._active < self.limit and not self._queued:
+                self._active += 1
+                return None
+            waiter = _Waiter(notify)
+            heapq.heappush(self._waiting, (PRIORITIES[level], next(self._seq), waiter))
+            self._queued += 1
+            return waiter
+
+    def _give_up(self, waiter):
+        """True when the slot was granted anyway (the race with release() was lost)."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            waiter.cancelled = True
+            self._queued -= 1
+            self._timeouts += 1
+            return False
+
+    def _timeout_error(self, level):
+        return QueueTimeout(f"{self.name}: no slot within {QUEUE_DEADLINES[level]}s ({level})")
+
+    def acquire(self, level="interactive"):
+        event = threading.Event()
+        waiter = self._enqueue(level, event.set)
+        if waiter is None or event.wait(QUEUE_DEADLINES[level]) or self._give_up(waiter):
+            return
+        raise self._timeout_error(level)
+
+    async def acquire_async(self, level="interactive"):
+        """acquire() for coroutines: waits on the running loop, holding no thread."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+        waiter = self._enqueue(level, wake)
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(future), QUEUE_DEADLINES[level])
+        except asyncio.TimeoutError:
+            if not self._give_up(waiter):
+                raise self._timeout_error(level)
+        except asyncio.CancelledError:
+            if self._give_up(waiter):
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiting:
+                _, _, waiter = heapq.heappop(self._waiting)
+                if waiter.cancelled:
+                    continue
+                waiter.granted = True # The slot passes on; _active is unchanged
+                self._queued -= 1
+                waiter.notify()
+                return
+            self._active -= 1
+
+    def status(self):
+        with self._lock:
+            return {"active": self._active, "limit": self.limit, "queued": self._queued, "queue_timeouts": self._timeouts}
+
+class CircuitBreaker:
+    """
+    Closed: calls go through and consecutive failures are counted.
+    Open: calls fail fast for `reset_timeout` seconds.
+    Half-open: one trial call decides between closed and open again.
+    TickerNotFound is a valid answer and never counts as a failure.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def _allow(self):
+        with self._lock:
+            if self.state == "open" and time.time() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def _record(self, ok):
+        with self._lock:
+            if ok:
+                self.state = "closed"
+                self._failures = 0
+            else:
+                self._failures += 1
+                if self.state == "half_open" or self._failures >= self.failure_threshold:
+                    if self.state != "open":
+                        print(f"Circuit '{self.name}' opened after {self._failures} failures")
+                    self.state = "open"
+                    self._opened_at = time.time()
+            self._trial = False
+
+    def call(self, fn, *args, **kwargs):
+        if not self._allow():
+            raise CircuitOpenError(f"{self.name} unavailable (circuit open, retry in {self.retry_in():.0f}s)")
+        try:
+            result = fn(*args, **kwargs)
+        except TickerNotFound:
+            self._record(True)
+            raise
+        except Exception:
+            self._record(False)
+            raise
+        self._record(True)
+        return result
+
+    async def acall(self, fn, *args, **kwargs):
+        """call() for coroutine functions."""
+        if not self._allow():
+            raise CircuitOpenError(f"{self.name} unavailable (circuit open, retry in {self.retry_in():.0f}s)")
+        try:
+            result = await fn(*args, **kwargs)
+        except TickerNotFound:
+            self._record(True)
+            raise
+        except Exception:
+            self._record(False)
+            raise
+        self._record(True)
+        return result
+
+    def retry_in(self):
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.time() - self._opened_at))
+
+    def status(self):
+        with self._lock:
+            return {"state": self.state, "failures": self._failures}
+
+BREAKERS = {
+    "finviz": CircuitBreaker("finviz", failure_threshold=5, reset_timeout=60),
+    "yahoo": CircuitBreaker("yahoo", failure_threshold=5, reset_timeout=60),
+    "ddg": CircuitBreaker("ddg", failure_threshold=3, reset_timeout=120),
+    "openrouter": CircuitBreaker("openrouter", failure_threshold=3, reset_timeout=120),
+}
+
+# Concurrent upstream calls allowed per provider
+BULKHEADS = {
+    "finviz": Bulkhead("finviz", 4),
+    "yahoo": Bulkhead("yahoo", 8),
+    "ddg": Bulkhead("ddg", 2),
+    "openrouter": Bulkhead("openrouter", 6),
+}
+
+def call_provider(provider, fn, *args, **kwargs):
+    """Runs one upstream call inside the provider's bulkhead and circuit breaker."""
+    bulkhead = BULKHEADS[provider]
+    bulkhead.acquire(current_priority.get())
+    try:
+        return BREAKERS[provider].call(fn, *args, **kwargs)
+    finally:
+        bulkhead.release()
+
+async def acall_provider(provider, fn, *args, **kwargs):
+    """
+    call_provider() for coroutine functions. Shares the provider's bulkhead
+    (and its priority queue) with the threaded callers; waiting holds no thread.
+    """
+    bulkhead = BULKHEADS[provider]
+    await bulkhead.acquire_async(current_priority.get())
+    try:
+        return await BREAKERS[provider].acall(fn, *args, **kwargs)
+    finally:
+        bulkhead.release()
+
+def remember_missing(provider, key, kind):
+    """
+    Records a definitive miss (the provider answered "no such symbol") for
+    one kind of lookup ("quote", "chart", ...). Never call it for empty or
+    failed answers: those are not proof the symbol is gone.
+    """
+    negative_cache.set((provider, key, kind), True)
+
+def is_known_missing(provider, key, kind):
+    return negative_cache.get((provider, key, kind), False)
+
+def get_provider_status():
+    return {name: {**b.status(), "retry_in": round(b.retry_in()), **BULKHEADS[name].status()} for name, b in BREAKERS.items()}
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from app.services.cache import data_path
+from app.services.data_fetcher import fetch_price_panel
+
+# IBD-style weighting: the latest quarter counts double
+RS_HORIZONS = {"ret_3m": (63, 0.4), "ret_6m": (126, 0.2), "ret_9m": (189, 0.2), "ret_12m": (252, 0.2)}
+RS_PERIOD = "1y"
+RS_FILE = "rs_rating.pkl"
+
+_rs = {"table": None, "as_of": None}
+
+def compute_rs_ratings(panel):
+    """
+    RS rating (1-99) per column of a close panel: weighted multi-horizon
+    returns ranked against the rest of the universe. Horizons longer than
+    the panel fall back to its first row.
+    """
+    panel = panel.dropna(axis=1, how="all").ffill()
+    last = panel.iloc[-1]
+    table = pd.DataFrame(index=panel.columns)
+    score = pd.Series(0.0, index=panel.columns)
+    for name, (bars, weight) in RS_HORIZONS.items():
+        base = panel.iloc[max(len(panel) - 1 - bars, 0)]
+        table[name] = last / base - 1
+        score += weight * table[name]
+    table["rs_score"] = score
+    pct = score.rank(pct=True)
+    table["rs_rating"] = np.clip(np.floor(pct * 99), 1, 99).where(score.notna())
+    table.index.name = "Ticker"
+    return table.astype("float32")
+
+def refresh_rs_ratings(tickers=None):
+    """Daily job: one batched close panel for the universe -> ratings, persisted."""
+    from app.services.scanner import get_sp500_tickers
+    tickers = tickers or get_sp500_tickers() or []
+    if not tickers:
+        return None
+    panel = fetch_price_panel(tickers, period=RS_PERIOD)
+    if panel is None or panel.empty:
+        return None
+    table = compute_rs_ratings(panel)
+    _rs.update({"table": table, "as_of": panel.index[-1]})
+    try:
+        pd.to_pickle(_rs, data_path(RS_FILE))
+    except Exception as e:
+        print(f"Could not persist RS ratings: {e}")
+    return table
+
+def load_rs_ratings():
+    """Warm start from the last persisted ratings."""
+    try:
+        _rs.update(pd.read_pickle(data_path(RS_FILE)))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Could not load RS ratings: {e}")
+    return _rs["table"]
+
+def get_rs_rating(ticker):
+    """{rs_rating, rs_score, ret_3m..ret_12m, as_of} for one ticker, {} when not rated."""
+    table = _rs["table"]
+    if table is None or ticker not in table.index:
+        return {}
+    row = table.loc[ticker]
+    if not np.isfinite(row["rs_rating"]):
+        return {}
+    out = {k: round(float(v), 4) for k, v in row.items() if np.isfinite(v)}
+    out["rs_rating"] = int(row["rs_rating"])
+    out["as_of"] = _rs["as_of"]
+    return out
+
+def get_rs_table():
+    return _rs["table"]
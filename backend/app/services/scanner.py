@@ -1,18 +1,29 @@
 import pandas as pd
-import time
-from finvizfinance.screener.custom import Custom
-from finvizfinance.screener.overview import Overview
 import finvizfinance.constants as constants
+from app.services.macro import get_macro_alignment
+from app.services.scorer import calculate_macro_boost
+from app.services.rs_rating import get_rs_rating
+from app.services import http_provider
+from app.services.jobs import with_priority
+from app.services.universe import get_universe_snapshot
 
 # MANUALLY INJECT missing signal into the library's constant dictionary
 if 'Volatility Squeeze' not in constants.signal_dict:
     constants.signal_dict['Volatility Squeeze'] = 'ta_volatilitysqueeze'
 
 def get_sp500_tickers():
-    """Placeholder."""
-    return ["SPY"]
+    """
+    S&P 500 constituents (by market cap) from the universe snapshot, so the
+    index is crawled once per snapshot instead of once more for the list.
+    """
+    universe = get_universe_snapshot()
+    if universe is None or universe.empty:
+        return None
+    return universe.sort_values("market_cap").index.astype(str).tolist()
 
-def scan_market(signal=None):
+# A 26-page crawl: queued behind interactive analyses for Finviz slots
+@with_priority("background")
+def scan_market(signal=None, min_rs=None, sort_by="Market Cap"):
     """
     ULTRA-FAST MANUAL PAGINATING SCANNER.
     Iterates through Finviz pages to ensure all 500+ S&P companies 
@@ -37,43 +48,20 @@ def scan_market(signal=None):
 
         print(f"Starting Scan... Signal: {internal_signal}, Filters: {filters_dict}")
         
-        # 1. Configuration
-        all_frames = []
-        fcustom = Custom()
-        
-        # Apply filters and the requested signal
-        fcustom.set_filter(filters_dict=filters_dict, signal=internal_signal)
-        
         # Correct Column Indices from finvizfinance metadata:
         # 1: Ticker, 6: Market Cap, 62: Analyst Recom, 59: RSI, 64: Rel Vol, 65: Price, 69: Target Price
         custom_cols = [1, 6, 62, 59, 64, 65, 69]
         
-        # 2. Manual Pagination Loop
+        # 2. Concurrent page crawl (Finviz bulkhead caps the parallelism)
         # S&P 500 is ~503 companies. at 20 per page = 26 pages.
         print(f"Fetching pages for signal: {internal_signal}...")
-        for page in range(1, 27):
-            try:
-                # Rate limit respect
-                time.sleep(1.0)
-                
-                # select_page returns 20 rows for that specific page
-                df_page = fcustom.screener_view(select_page=page, columns=custom_cols, verbose=0)
-                if df_page is not None and not df_page.empty:
-                    all_frames.append(df_page)
-                    # If we got fewer than 20 rows, it's the last page
-                    if len(df_page) < 20:
-                        break
-                else:
-                    break
-            except Exception as e:
-                print(f"Error on page {page}: {e}")
-                break 
+        df = http_provider.run(http_provider.finviz_screener, filters_dict=filters_dict, signal=internal_signal,
+                               columns=custom_cols, max_pages=26)
 
-        if not all_frames:
+        if df is None or df.empty:
             print("Scanner Error: No data returned from Finviz.")
             return pd.DataFrame()
 
-        df = pd.concat(all_frames, ignore_index=True)
         print(f"Data retrieved. Count: {len(df)}")
 
         # 3. Robust Column Mapping & Filtering
@@ -129,7 +117,11 @@ def scan_market(signal=None):
                     "Recommendation": verdict,
                     "Upside %": round(float(upside), 1),
                     "Market Cap": mkt_cap,
-                    "is_squeeze": is_sqz
+                    "is_squeeze": is_sqz,
+                    # Precomputed nightly table, no request-time cost
+                    "Macro Boost": calculate_macro_boost(get_macro_alignment(ticker)),
+                    # Daily universe RS table (1-99), None when unrated
+                    "RS Rating": get_rs_rating(ticker).get("rs_rating")
                 })
             except Exception as e:
                 print(f"Row error: {e}")
@@ -137,7 +129,11 @@ def scan_market(signal=None):
 
         final_df = pd.DataFrame(results)
         final_df.drop_duplicates(subset=['Ticker'], inplace=True)
-        final_df.sort_values(by="Market Cap", ascending=False, inplace=True)
+        if min_rs is not None:
+            final_df = final_df[final_df["RS Rating"].fillna(0) >= min_rs]
+        if sort_by not in final_df.columns:
+            sort_by = "Market Cap"
+        final_df.sort_values(by=sort_by, ascending=False, inplace=True, na_position="last")
         final_df.reset_index(drop=True, inplace=True)
         final_df['Rank'] = final_df.index + 1
         
@@ -82,14 +82,7 @@ def calculate_score(signals, info, ai_result, options_data=None, analyst_actions
     elif rot == "Lagging": e_points -= 15
     
     # Macro Correlation Boost (Alpha Hunter)
-    macro_corrs = info.get('macro_correlations', {})
-    macro_boost = 0
-    for asset, data in macro_corrs.items():
-        corr = data.get('value', 0)
-        trend = data.get('trend', 'Neutral')
-        if corr < -0.6 and trend == "Falling": macro_boost += 10
-        elif corr > 0.6 and trend == "Rising": macro_boost += 10
-    e_points += min(20, macro_boost)
+    e_points += calculate_macro_boost(info.get('macro_correlations', {}))
 
     # News Velocity & "Sell The News" Trap
     velocity = info.get('news_velocity', 0)
@@ -121,6 +114,16 @@ def calculate_score(signals, info, ai_result, options_data=None, analyst_actions
     
     return int(final), score_breakdown
 
+def calculate_macro_boost(macro_corrs):
+    """+10 per macro asset the stock tracks (|corr| > 0.6) that is trending its way, capped at 20."""
+    macro_boost = 0
+    for asset, data in macro_corrs.items():
+        corr = data.get('value', 0)
+        trend = data.get('trend', 'Neutral')
+        if corr < -0.6 and trend == "Falling": macro_boost += 10
+        elif corr > 0.6 and trend == "Rising": macro_boost += 10
+    return min(20, macro_boost)
+
 def calculate_hedge_fund_score(info, risk_metrics):
     score = 50
     inst = info.get('institutions_percent')
@@ -0,0 +1,64 @@
+import pandas as pd
+from app.services.cache import TTLCache
+from app.services.data_fetcher import fetch_ticker_data, fetch_finviz_fundamentals, fetch_company_info, fetch_company_info_fallback, FALLBACK_ERRORS
+
+SNAPSHOT_TTL = 300
+# A snapshot missing prices or info (provider error, open breaker) is only
+# held long enough to coalesce concurrent requests; the next one refetches
+PARTIAL_SNAPSHOT_TTL = 10
+# Longest history any consumer needs (backtest: 2y for SMA200 warm-up)
+SNAPSHOT_PERIOD = "2y"
+PERIOD_OFFSETS = {"1mo": pd.DateOffset(months=1), "3mo": pd.DateOffset(months=3), "6mo": pd.DateOffset(months=6),
+                  "1y": pd.DateOffset(years=1), "2y": pd.DateOffset(years=2)}
+
+_snapshots = TTLCache(ttl=SNAPSHOT_TTL, maxsize=256)
+
+class TickerSnapshot:
+    """
+    Everything the per-ticker views read, fetched once per SNAPSHOT_TTL:
+    the raw Finviz fundamentals, the parsed company info and the price frame.
+    """
+
+    def __init__(self, symbol, fundamentals, info, prices):
+        self.symbol = symbol
+        self.fundamentals = fundamentals or {}
+        self.info = info or {}
+        self.prices = prices
+
+    def history(self, period="1y"):
+        """Price frame trimmed to `period` (no new download)."""
+        if self.prices is None or self.prices.empty:
+            return None
+        offset = PERIOD_OFFSETS.get(period)
+        if offset is None:
+            return self.prices
+        return self.prices.loc[self.prices.index > self.prices.index[-1] - offset]
+
+    @property
+    def complete(self):
+        return self.prices is not None and not self.prices.empty and bool(self.info)
+
+    def company_info(self):
+        """Copy of the parsed info, safe for callers that add keys to it."""
+        return dict(self.info)
+
+def build_ticker_snapshot(symbol):
+    fund, info = None, {}
+    try:
+        fund = fetch_finviz_fundamentals(symbol)
+    except FALLBACK_ERRORS as e:
+        # Finviz is down or unreachable: Yahoo is asked instead
+        print(f"Finviz fetch failed for {symbol}: {e}")
+        info = fetch_company_info_fallback(symbol)
+    except Exception as e:
+        # Unknown on Finviz (or unparsable): Yahoo would not know more
+        print(f"Finviz fetch failed for {symbol}: {e}")
+    if fund:
+        info = fetch_company_info(symbol, fund=fund)
+    prices = fetch_ticker_data(symbol, period=SNAPSHOT_PERIOD)
+    return TickerSnapshot(symbol, fund, info, prices)
+
+def get_ticker_snapshot(symbol):
+    symbol = symbol.upper().strip()
+    return _snapshots.get_or_set(symbol, lambda: build_ticker_snapshot(symbol),
+                                 ttl_for=lambda snapshot: SNAPSHOT_TTL if snapshot.complete else PARTIAL_SNAPSHOT_TTL)
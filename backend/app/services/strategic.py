@@ -1,11 +1,12 @@
+import asyncio
 import pandas as pd
 import numpy as np
-import yfinance as yf
-from app.services.data_fetcher import fetch_company_info, fetch_news, fetch_vix_level
-from app.services.technicals import calculate_technicals, get_latest_signals, detect_chart_patterns
-from finvizfinance.screener.financial import Financial
-from finvizfinance.screener.overview import Overview
-from finvizfinance.quote import finvizfinance
+from app.services.snapshot import get_ticker_snapshot
+from app.services.technicals import calculate_latest_signals, detect_chart_patterns
+from app.services.data_fetcher import fetch_price_history_batch
+from app.services.cache import ttl_cache
+from app.services.universe import get_universe_snapshot, universe_ttl
+from app.services.cross_section import get_cross_section
 
 def parse_finviz_float(val):
     if not val or val == '-': return 0.0
@@ -27,33 +28,30 @@ def parse_finviz_percent(val):
     except:
         return 0.0
 
+# Metrics reported relative to the universe in the drill-down
+RELATIVE_METRICS = ["roe", "roi", "pe", "peg", "debt_eq"]
+
 async def get_strategic_analysis(ticker: str):
     """
     Aggregates 'Rocket & Moat' Strategic Analysis for a single ticker.
     """
     ticker = ticker.upper().strip()
     
-    # 1. Fetch Core Data (YFinance)
-    info = fetch_company_info(ticker)
+    # 1. Fetch Core Data (shared per-ticker snapshot: one Finviz scrape + one history pull)
+    snapshot = await asyncio.to_thread(get_ticker_snapshot, ticker)
+    info = snapshot.info
+    fv_fund = snapshot.fundamentals
     
     # 2. Fetch Technicals (for Patterns & Entry)
-    df = yf.Ticker(ticker).history(period="1y")
+    df = snapshot.history("1y")
     if df is not None and not df.empty:
-        df_tech = calculate_technicals(df)
-        signals = get_latest_signals(df_tech)
-        patterns = detect_chart_patterns(df_tech)
+        # Only the latest bar is used here, so skip the full-history pass
+        signals = calculate_latest_signals(df, columns=("RSI_14", "Cup_Handle", "Double_Bottom"))
+        patterns = {"Cup_Handle": signals.get("cup_handle", False), "Double_Bottom": signals.get("double_bottom", False)}
     else:
         signals = {}
         patterns = {"Cup_Handle": False, "Double_Bottom": False}
 
-    # 3. Fetch Finviz Data (Detailed Fundamentals)
-    try:
-        fv_stock = finvizfinance(ticker)
-        fv_fund = fv_stock.ticker_fundament()
-    except Exception as e:
-        print(f"Finviz fetch failed for {ticker}: {e}")
-        fv_fund = {}
-
     # 4. Moat & Quality
     # Prefer Finviz data if available, fallback to YF info
     roe = parse_finviz_percent(fv_fund.get('ROE')) if 'ROE' in fv_fund else (info.get('roe', 0) or 0)
@@ -69,6 +67,10 @@ async def get_strategic_analysis(ticker: str):
     # Let's rely on P/E from Finviz for consistency.
     pe = parse_finviz_float(fv_fund.get('P/E'))
     earnings_yield = (1.0 / pe) if pe > 0 else 0.0
+    # True position in the index-wide Greenblatt ranking (cached table)
+    magic_rank = await asyncio.to_thread(get_magic_formula_rank, ticker)
+    # Where the quality/value metrics sit versus the index and the sector
+    relative = await asyncio.to_thread(get_cross_section, ticker, RELATIVE_METRICS)
     
     # 6. Policy & Catalysts
     sector = fv_fund.get('Sector') or info.get('sector', 'Unknown')
@@ -117,8 +119,12 @@ async def get_strategic_analysis(ticker: str):
         },
         "magic_formula": {
             "earnings_yield": earnings_yield,
-            "roc_rank": "Top 10%" if earnings_yield > 0.08 else "Average"
+            "roc_rank": format_magic_formula_label(magic_rank),
+            "rank": magic_rank.get("rank") if magic_rank else None,
+            "percentile": magic_rank.get("percentile") if magic_rank else None,
+            "universe_size": magic_rank.get("universe_size") if magic_rank else None
         },
+        "relative": relative,
         "smart_money": {
             "insider_trans": insider_trans,
             "inst_trans": inst_trans,
@@ -158,56 +164,129 @@ def calculate_final_verdict(data):
     Computes a 0-100 score based on 5 categories.
     Weights: Moat (25%), Smart Money & Value (25%), Safety (20%), Policy (15%), Technicals (15%)
     """
-    scores = {}
-    
-    # 1. Moat (25 pts)
-    moat_score = 0
-    if data["moat"]["roe"] > 0.15: moat_score += 10
-    if data["moat"]["roic"] > 0.15: moat_score += 10
-    if data["moat"]["fcf"] > 0: moat_score += 5
-    scores["Moat Check"] = moat_score
-
-    # 2. Smart Money & Value (25 pts)
-    val_score = 0
-    if data["smart_money"]["insider"] > 0: val_score += 8
-    if data["smart_money"]["inst"] > 0: val_score += 7
-    peg = data["smart_money"]["peg"]
-    if 0 < peg < 1.2: val_score += 10
-    elif 0 < peg < 2.0: val_score += 5
-    scores["Smart Money & Value"] = val_score
-
-    # 3. Safety (20 pts)
-    safety_score = 0
-    debt = data["safety"]["debt_eq"]
-    if debt < 0.5: safety_score += 20
-    elif debt < 1.5: safety_score += 15
-    elif debt < 2.5: safety_score += 10
-    scores["Risk & Safety"] = safety_score
-
-    # 4. Policy & Trend (15 pts)
-    policy_score = 0
-    catalysts = data["policy"]["catalysts"]
-    bullish_count = len([c for c in catalysts if "Bullish" in c["direction"]])
-    if bullish_count >= 2: policy_score += 15
-    elif bullish_count == 1: policy_score += 10
-    else: policy_score += 5
-    scores["Policy & Trend"] = policy_score
-
-    # 5. Technicals (15 pts)
-    tech_score = 0
     patterns = data["technicals"]["patterns"]
-    if patterns.get("Cup_Handle") or patterns.get("Double_Bottom"): tech_score += 10
-    if data["technicals"]["signals"].get("macd_bullish"): tech_score += 5
-    scores["Entry Patterns"] = tech_score
+    row = pd.DataFrame([{
+        "roe": data["moat"]["roe"], "roic": data["moat"]["roic"], "fcf": data["moat"]["fcf"],
+        "insider": data["smart_money"]["insider"], "inst": data["smart_money"]["inst"],
+        "peg": data["smart_money"]["peg"], "debt_eq": data["safety"]["debt_eq"],
+        "bullish_catalysts": len([c for c in data["policy"]["catalysts"] if "Bullish" in c["direction"]]),
+        "pattern": bool(patterns.get("Cup_Handle") or patterns.get("Double_Bottom")),
+        "macd_bullish": bool(data["technicals"]["signals"].get("macd_bullish"))
+    }])
+    scores = score_verdicts(row).iloc[0]
 
-    total_score = sum(scores.values())
-    
     return {
-        "score": total_score,
-        "label": "BUY" if total_score >= 70 else "ACCUMULATE" if total_score >= 55 else "WATCH" if total_score >= 40 else "AVOID",
-        "breakdown": scores
+        "score": int(scores["score"]),
+        "label": scores["label"],
+        "breakdown": {c: int(scores[c]) for c in VERDICT_CATEGORIES}
     }
 
+def score_verdicts(df):
+    """
+    calculate_final_verdict() over a whole frame at once (one row per ticker).
+    Expects columns roe, roic, fcf, insider, inst, peg, debt_eq,
+    bullish_catalysts, pattern and macd_bullish.
+    """
+    peg, debt, bullish = df["peg"], df["debt_eq"], df["bullish_catalysts"]
+    scores = pd.DataFrame(index=df.index)
+    scores["Moat Check"] = 10 * (df["roe"] > 0.15) + 10 * (df["roic"] > 0.15) + 5 * (df["fcf"] > 0)
+    scores["Smart Money & Value"] = 8 * (df["insider"] > 0) + 7 * (df["inst"] > 0) + \
+        np.select([(peg > 0) & (peg < 1.2), (peg > 0) & (peg < 2.0)], [10, 5], 0)
+    scores["Risk & Safety"] = np.select([debt < 0.5, debt < 1.5, debt < 2.5], [20, 15, 10], 0)
+    scores["Policy & Trend"] = np.select([bullish >= 2, bullish == 1], [15, 10], 5)
+    scores["Entry Patterns"] = 10 * df["pattern"].astype(bool) + 5 * df["macd_bullish"].astype(bool)
+    scores = scores.astype(int)
+
+    total = scores.sum(axis=1)
+    scores["score"] = total
+    scores["label"] = np.select([total >= 70, total >= 55, total >= 40], ["BUY", "ACCUMULATE", "WATCH"], "AVOID")
+    return scores
+
+# --- Verdict leaderboard over the index ---
+
+LEADERBOARD_TTL = 3600
+# Patterns look at the last 60 bars; 6mo of cached daily history covers it
+LEADERBOARD_PRICE_PERIOD = "6mo"
+VERDICT_CATEGORIES = ["Moat Check", "Smart Money & Value", "Risk & Safety", "Policy & Trend", "Entry Patterns"]
+
+_leaderboard = {"table": None, "as_of": None}
+
+def compute_verdict_leaderboard(universe, histories):
+    """
+    Rocket & Moat verdict for every row of the universe snapshot, using the
+    same inputs the per-ticker drill-down reads (missing values count as 0).
+    """
+    sector = universe["sector"].fillna("Unknown")
+    bullish = {s: sum("Bullish" in c["direction"] for c in get_policy_catalysts(s)) for s in sector.unique()}
+
+    patterns = {}
+    for ticker in universe.index:
+        df = histories.get(ticker)
+        found = detect_chart_patterns(df) if df is not None and not df.empty else {}
+        patterns[ticker] = bool(found.get("Cup_Handle") or found.get("Double_Bottom"))
+
+    inputs = pd.DataFrame({
+        "roe": universe["roe"], "roic": universe["roi"],
+        # P/FCF > 0 <=> positive free cash flow (the drill-down's fcf > 0)
+        "fcf": universe["p_fcf"],
+        "insider": universe["insider_trans"], "inst": universe["inst_trans"],
+        "peg": universe["peg"], "debt_eq": universe["debt_eq"],
+        "bullish_catalysts": sector.map(bullish),
+        "pattern": pd.Series(patterns),
+        # The drill-down's MACD check reads keys the latest-signal pass does not emit
+        "macd_bullish": False
+    }, index=universe.index).fillna(0)
+
+    scores = score_verdicts(inputs)
+    table = pd.concat([universe[["company", "industry", "price", "market_cap"]], scores], axis=1)
+    table.insert(1, "sector", sector)
+    table = table.sort_values(["score", "market_cap"], ascending=False)
+    table["rank"] = np.arange(1, len(table) + 1)
+    return table
+
+def refresh_verdict_leaderboard():
+    """Batch job: scores the whole index from the screener snapshot and cached prices."""
+    universe = get_universe_snapshot()
+    if universe is None or universe.empty:
+        return None
+    histories = fetch_price_history_batch(list(universe.index), period=LEADERBOARD_PRICE_PERIOD)
+    table = compute_verdict_leaderboard(universe, histories)
+    _leaderboard.update({"table": table, "as_of": pd.Timestamp.now(tz="UTC")})
+    return table
+
+def get_verdict_leaderboard(sector=None, label=None, min_score=None, limit=50):
+    """Ranked, filterable leaderboard rows (computed on first use, then by the job)."""
+    table = _leaderboard["table"]
+    if table is None or _leaderboard["as_of"] < pd.Timestamp.now(tz="UTC") - pd.Timedelta(seconds=LEADERBOARD_TTL):
+        table = refresh_verdict_leaderboard()
+        if table is None:
+            return {"as_of": None, "total": 0, "results": []}
+
+    view = table
+    if sector:
+        view = view[view["sector"].str.lower() == sector.lower()]
+    if label:
+        view = view[view["label"] == label.upper()]
+    if min_score is not None:
+        view = view[view["score"] >= min_score]
+    total = len(view)
+    if limit:
+        view = view.head(limit)
+
+    results = [{
+        "rank": int(row["rank"]),
+        "ticker": ticker,
+        "company": row["company"],
+        "sector": row["sector"],
+        "industry": row["industry"],
+        "price": row["price"],
+        "market_cap": row["market_cap"],
+        "score": int(row["score"]),
+        "label": row["label"],
+        "breakdown": {c: int(row[c]) for c in VERDICT_CATEGORIES}
+    } for ticker, row in view.iterrows()]
+    return {"as_of": _leaderboard["as_of"], "total": total, "results": results}
+
 def get_policy_catalysts(sector):
     """
     Returns potential legislative catalysts based on sector.
@@ -237,75 +316,93 @@ def generate_second_level_thought(ticker, sector, signals):
         return f"{ticker} is hated (RSI < 30). Is the business broken, or just the stock price?"
     return f"Consensus is neutral on {ticker}. What catalyst is the market missing in the {sector} sector?"
 
+# --- Magic Formula (Greenblatt) ranking over the index ---
+
+MAGIC_FORMULA_COLUMNS = ["company", "sector", "price", "market_cap", "pe", "earnings_yield", "roc",
+                         "ey_rank", "roc_rank", "magic_score", "magic_rank", "percentile", "perf_half"]
+
+def compute_magic_formula_table(universe):
+    """
+    Greenblatt ranking: earnings yield and return on capital are ranked
+    separately (1 = best), the ranks are summed and the sum ranked again.
+    Names without positive earnings or ROC data stay in the table unranked.
+    ROIC stands in for return on capital (ROE when missing) and 1/PE for
+    earnings yield, the screener has no EBIT/EV.
+    """
+    df = universe.copy()
+    df["earnings_yield"] = (1.0 / df["pe"]).where(df["pe"] > 0)
+    df["roc"] = df["roi"].fillna(df["roe"])
+    ranked = df["earnings_yield"].notna() & df["roc"].notna()
+
+    df["ey_rank"] = df["earnings_yield"].where(ranked).rank(ascending=False, method="min")
+    df["roc_rank"] = df["roc"].where(ranked).rank(ascending=False, method="min")
+    df["magic_score"] = df["ey_rank"] + df["roc_rank"]
+    # Ties on the combined score go to the higher earnings yield
+    order = df.loc[ranked].sort_values(["magic_score", "ey_rank"]).index
+    df["magic_rank"] = pd.Series(np.arange(1, len(order) + 1, dtype=float), index=order)
+    # Share of the ranked universe at or above this name (0.03 = top 3%)
+    df["percentile"] = df["magic_rank"] / max(len(order), 1)
+    return df[MAGIC_FORMULA_COLUMNS].sort_values(["magic_rank", "market_cap"], ascending=[True, False], na_position="last")
+
+@ttl_cache(ttl=universe_ttl, maxsize=1)
+def get_magic_formula_table():
+    universe = get_universe_snapshot()
+    if universe is None or universe.empty:
+        return None
+    return compute_magic_formula_table(universe)
+
+def get_magic_formula_rank(ticker):
+    """O(1) lookup of a ticker's Magic Formula position in the index."""
+    table = get_magic_formula_table()
+    if table is None or ticker not in table.index:
+        return None
+    row = table.loc[ticker]
+    if pd.isna(row["magic_rank"]):
+        return {"rank": None, "percentile": None, "universe_size": int(table["magic_rank"].count())}
+    return {
+        "rank": int(row["magic_rank"]),
+        "percentile": float(row["percentile"]),
+        "ey_rank": int(row["ey_rank"]),
+        "roc_rank": int(row["roc_rank"]),
+        "roc": float(row["roc"]),
+        "universe_size": int(table["magic_rank"].count())
+    }
+
+def format_magic_formula_label(rank):
+    """'Top 4%' style label from get_magic_formula_rank()."""
+    if not rank:
+        return "N/A"
+    if rank["percentile"] is None:
+        return "Unranked"
+    return f"Top {max(1, int(np.ceil(rank['percentile'] * 100)))}%"
+
 def get_magic_formula_list():
     """
-    Scans for Magic Formula candidates: High ROC + High Earnings Yield.
-    Uses Finviz Financial Screener.
+    Magic Formula candidates for the S&P 500, best combined rank first.
+    Unranked names (losses or no ROC data) follow by market cap.
     """
     try:
-        # We need ROE (proxy for ROC) and P/E (inverse of EY).
-        # We also want S&P 500 to ensure quality.
-        # Finviz 'Financial' view has: Ticker, P/E, ROE, ROA, ROI...
-        
-        # Note: finvizfinance is synchronous and web-scraping based.
-        # We perform a targeted scan.
-        
-        # Filters: Index = S&P 500.
-        # Removed ROE filter to show all S&P 500 companies as requested.
-        filters_dict = {
-            'Index': 'S&P 500'
-        }
-        
-        f_overview = Overview()
-        f_overview.set_filter(filters_dict=filters_dict)
-        
-        # Get all S&P 500 companies (Limit > 505)
-        # We sort by Market Cap to establish "Position in the Index"
-        # order parameter requires 'Market Cap.' (with dot)
-        df = f_overview.screener_view(order='Market Cap.', limit=600, verbose=0)
-        
+        table = get_magic_formula_table()
+        if table is None:
+            return []
+
         results = []
-        if df is not None and not df.empty:
-            # Resulting DataFrame column is 'Market Cap' (no dot)
-            mc_col = 'Market Cap' if 'Market Cap' in df.columns else 'Market Cap.'
-            
-            df = df.sort_values(by=mc_col, ascending=False)
-            
-            for i, row in df.iterrows():
-                try:
-                    # Parse
-                    ticker = row['Ticker']
-                    
-                    # Helper to safely parse float
-                    def parse_float(val):
-                        if isinstance(val, str):
-                            if val == '-': return 0
-                            return float(val.replace('%', '').replace(',', ''))
-                        return float(val)
-
-                    pe = parse_float(row['P/E'])
-                    price = parse_float(row['Price'])
-                    market_cap = parse_float(row[mc_col])
-                    
-                    # Change might be string "1.5%" or float 0.015
-                    change_val = row['Change']
-                    if isinstance(change_val, str):
-                        change = parse_float(change_val) / 100
-                    else:
-                        change = float(change_val)
-                    
-                    results.append({
-                        "rank": len(results) + 1, # Position in the index (by Market Cap)
-                        "ticker": ticker,
-                        "price": price,
-                        "pe": pe,
-                        "market_cap": market_cap,
-                        "earnings_yield": round(1/pe if pe > 0 else 0, 4),
-                        "momentum_6m": change, 
-                        "sector": row['Sector']
-                    })
-                except: continue
-        
+        for ticker, row in table.iterrows():
+            ranked = pd.notna(row["magic_rank"])
+            results.append({
+                "rank": int(row["magic_rank"]) if ranked else None,
+                "ticker": ticker,
+                "price": row["price"],
+                "pe": row["pe"],
+                "market_cap": row["market_cap"],
+                "earnings_yield": round(float(row["earnings_yield"]), 4) if ranked else 0,
+                "roc": row["roc"],
+                "ey_rank": int(row["ey_rank"]) if ranked else None,
+                "roc_rank": int(row["roc_rank"]) if ranked else None,
+                "percentile": row["percentile"],
+                "momentum_6m": row["perf_half"],
+                "sector": row["sector"]
+            })
         return results
 
     except Exception as e:
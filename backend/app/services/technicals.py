@@ -2,80 +2,205 @@ import pandas as pd
 import numpy as np
 from ta.momentum import RSIIndicator
 from ta.trend import MACD, SMAIndicator, EMAIndicator, ADXIndicator
-from ta.volatility import AverageTrueRange, BollingerBands
+from ta.volatility import AverageTrueRange
 from ta.volume import VolumeWeightedAveragePrice
+from app.services.kernels import rolling_linreg, local_minima
 
-def calculate_technicals(df, sector_df=None):
-    """
-    Calculates technical signals with robust fallbacks and high-fidelity squeeze logic.
-    """
-    if df is None or df.empty:
-        return None
+# Covers the longest look-back (SMA 200) plus enough bars for the Wilder/EMA
+# smoothers (ADX is the slowest) to forget their seed: tail-mode values match
+# the full-history ones to ~1e-8.
+TAIL_WARMUP = 300
+
+# --- Indicator Graph ---
+# Every indicator is a node declaring the nodes it reads. Callers request named
+# outputs and only that sub-graph is evaluated. Names starting with "_" are
+# shared intermediates (SMA20, ATR, rolling high/low) computed once per call
+# and never written to the returned frame. `min_bars` is the shortest frame a
+# node can be computed on (shorter ones raise inside `ta`).
+INDICATORS = {}
+
+def indicator(*outputs, inputs=(), min_bars=1):
+    def register(fn):
+        node = {"fn": fn, "outputs": outputs, "inputs": inputs, "min_bars": min_bars}
+        for name in outputs:
+            INDICATORS[name] = node
+        return fn
+    return register
 
-    df = df.copy()
+@indicator("RSI_14")
+def _rsi(df, v, opts):
+    return {"RSI_14": RSIIndicator(close=df["Close"], window=14).rsi()}
 
-    # 1. Standard Indicators
-    df["RSI_14"] = RSIIndicator(close=df["Close"], window=14).rsi()
+@indicator("MACD", "MACD_Signal", "MACD_Hist")
+def _macd(df, v, opts):
     macd_ind = MACD(close=df["Close"])
-    df["MACD"] = macd_ind.macd()
-    df["MACD_Signal"] = macd_ind.macd_signal()
-    df["MACD_Hist"] = macd_ind.macd_diff()
-    df["ADX"] = ADXIndicator(high=df["High"], low=df["Low"], close=df["Close"], window=14).adx()
-    
-    # Moving Averages
-    df["SMA_50"] = df["Close"].rolling(window=50).mean()
-    df["SMA_200"] = df["Close"].rolling(window=200).mean()
-    
-    # 2. Bollinger Bands & Keltner Channels (for Squeeze)
-    bb = BollingerBands(close=df["Close"], window=20, window_dev=2)
-    df["BB_Upper"] = bb.bollinger_hband()
-    df["BB_Lower"] = bb.bollinger_lband()
-    
+    return {"MACD": macd_ind.macd(), "MACD_Signal": macd_ind.macd_signal(), "MACD_Hist": macd_ind.macd_diff()}
+
+@indicator("ADX", min_bars=2 * 14) # Two 14-bar Wilder passes
+def _adx(df, v, opts):
+    return {"ADX": ADXIndicator(high=df["High"], low=df["Low"], close=df["Close"], window=14).adx()}
+
+@indicator("SMA_50")
+def _sma50(df, v, opts):
+    return {"SMA_50": df["Close"].rolling(window=50).mean()}
+
+@indicator("SMA_200")
+def _sma200(df, v, opts):
+    return {"SMA_200": df["Close"].rolling(window=200).mean()}
+
+@indicator("_SMA20")
+def _sma20(df, v, opts):
+    return {"_SMA20": df["Close"].rolling(window=20).mean()}
+
+@indicator("_ATR20", min_bars=20)
+def _atr20(df, v, opts):
+    return {"_ATR20": AverageTrueRange(high=df["High"], low=df["Low"], close=df["Close"], window=20).average_true_range()}
+
+@indicator("_HH14", "_LL14")
+def _hl14(df, v, opts):
+    return {"_HH14": df["High"].rolling(window=14).max(), "_LL14": df["Low"].rolling(window=14).min()}
+
+@indicator("BB_Upper", "BB_Lower", inputs=("_SMA20",))
+def _bollinger(df, v, opts):
+    # Same as ta's BollingerBands (population std), sharing the SMA20 basis
+    dev = 2 * df["Close"].rolling(window=20).std(ddof=0)
+    return {"BB_Upper": v["_SMA20"] + dev, "BB_Lower": v["_SMA20"] - dev}
+
+@indicator("KC_Upper", "KC_Lower", inputs=("_SMA20", "_ATR20"))
+def _keltner(df, v, opts):
     # Keltner Channel Approximation (for Squeeze)
-    atr = AverageTrueRange(high=df["High"], low=df["Low"], close=df["Close"], window=20).average_true_range()
-    sma20 = df["Close"].rolling(window=20).mean()
-    df["KC_Upper"] = sma20 + (1.5 * atr)
-    df["KC_Lower"] = sma20 - (1.5 * atr)
-    
-    # 3. Squeeze Detection (BB inside KC)
-    df["BB_Squeeze"] = (df["BB_Upper"] < df["KC_Upper"]) & (df["BB_Lower"] > df["KC_Lower"])
+    return {"KC_Upper": v["_SMA20"] + (1.5 * v["_ATR20"]), "KC_Lower": v["_SMA20"] - (1.5 * v["_ATR20"])}
+
+@indicator("BB_Squeeze", inputs=("BB_Upper", "BB_Lower", "KC_Upper", "KC_Lower"))
+def _bb_squeeze(df, v, opts):
+    # Squeeze Detection (BB inside KC)
+    return {"BB_Squeeze": (v["BB_Upper"] < v["KC_Upper"]) & (v["BB_Lower"] > v["KC_Lower"])}
 
-    # 4. Weekly VWAP
-    df["VWAP_Weekly"] = VolumeWeightedAveragePrice(high=df["High"], low=df["Low"], close=df["Close"], volume=df["Volume"], window=5).volume_weighted_average_price()
+@indicator("VWAP_Weekly")
+def _vwap_weekly(df, v, opts):
+    if "PV" not in df.columns:
+        return {"VWAP_Weekly": VolumeWeightedAveragePrice(high=df["High"], low=df["Low"], close=df["Close"], volume=df["Volume"], window=5).volume_weighted_average_price()}
+    # Resampled bars carry the summed daily typical-price x volume, so the
+    # VWAP stays volume-weighted at daily granularity
+    return {"VWAP_Weekly": df["PV"].rolling(window=5).sum() / df["Volume"].rolling(window=5).sum()}
 
-    # 5. Relative Strength (Robust Fallback)
+@indicator("Relative_Strength")
+def _relative_strength(df, v, opts):
     # 63 days = ~3 months of trading
     lookback = min(63, len(df) - 1)
     stock_perf = (df["Close"] / df["Close"].shift(lookback)) - 1
-    
+
+    sector_df = opts.get("sector_df")
     if sector_df is not None and not sector_df.empty:
         sector_perf = (sector_df["Close"] / sector_df["Close"].shift(min(63, len(sector_df)-1))) - 1
-        df["Relative_Strength"] = stock_perf - sector_perf
-    else:
-        # Fallback to general market (SPY proxy not available, use simple momentum)
-        df["Relative_Strength"] = stock_perf
-
-    # 6. Squeeze Momentum (Lazy LinReg)
-    sqz_on, sqz_mom = calculate_squeeze_momentum(df)
-    df["SQZ_ON"] = sqz_on
-    df["SQZ_MOM"] = sqz_mom
-    
-    # 7. SMI & Vol Ratio
-    smi, smi_sig = calculate_smi(df)
-    df["SMI"] = smi
-    df["SMI_SIGNAL"] = smi_sig
+        return {"Relative_Strength": (stock_perf - sector_perf).reindex(df.index)}
+    # Fallback to general market (SPY proxy not available, use simple momentum)
+    return {"Relative_Strength": stock_perf}
+
+@indicator("SQZ_ON", "SQZ_MOM", inputs=("_SMA20",))
+def _squeeze_momentum(df, v, opts):
+    sqz_on, sqz_mom = calculate_squeeze_momentum(df, tail=opts.get("tail"), basis=v["_SMA20"])
+    return {"SQZ_ON": sqz_on, "SQZ_MOM": sqz_mom}
+
+@indicator("SMI", "SMI_SIGNAL", inputs=("_HH14", "_LL14"))
+def _smi(df, v, opts):
+    smi, smi_sig = calculate_smi(df, hh=v["_HH14"], ll=v["_LL14"])
+    return {"SMI": smi, "SMI_SIGNAL": smi_sig}
+
+@indicator("is_up")
+def _is_up(df, v, opts):
+    return {"is_up": df['Close'] > df['Open']}
+
+@indicator("Vol_Ratio", inputs=("is_up",))
+def _vol_ratio(df, v, opts):
+    up_vol = df['Volume'].where(v['is_up'], 0).rolling(window=20).sum()
+    dn_vol = df['Volume'].where(~v['is_up'], 0).rolling(window=20).sum()
+    return {"Vol_Ratio": up_vol / (dn_vol + 1)}
 
-    df['is_up'] = df['Close'] > df['Open']
-    up_vol = df['Volume'].where(df['is_up'], 0).rolling(window=20).sum()
-    dn_vol = df['Volume'].where(~df['is_up'], 0).rolling(window=20).sum()
-    df['Vol_Ratio'] = up_vol / (dn_vol + 1)
+@indicator("Cup_Handle", "Double_Bottom")
+def _patterns(df, v, opts):
+    return detect_chart_patterns(df)
 
-    # 8. Chart Patterns
-    patterns = detect_chart_patterns(df)
-    for k, v in patterns.items():
-        df[k] = v
+# Columns read by get_latest_signals
+SIGNAL_COLUMNS = (
+    "RSI_14", "ADX", "Relative_Strength", "BB_Squeeze", "VWAP_Weekly", "SQZ_ON", "SQZ_MOM",
+    "SMI", "Vol_Ratio", "SMA_50", "SMA_200", "BB_Upper", "BB_Lower", "Double_Bottom", "Cup_Handle"
+)
 
-    return df
+# yfinance-style interval -> pandas resample rule (None = native daily bars)
+TIMEFRAMES = {"1d": None, "1wk": "W-FRI", "1mo": "ME"}
+
+# Fewest bars a timeframe is reported on: RSI 14, the trend label's fallback
+# input, needs that many. Indicators needing more are left out on shorter
+# frames (see columns_for_bars); SMA 50/200 may still be NaN.
+MIN_TIMEFRAME_BARS = 14
+
+def min_bars(name):
+    """Shortest frame `name` and everything it reads can be computed on."""
+    node = INDICATORS.get(name)
+    if node is None:
+        return 1 # Raw OHLCV column
+    return max([node["min_bars"]] + [min_bars(i) for i in node["inputs"]])
+
+def columns_for_bars(bars, columns=SIGNAL_COLUMNS):
+    """The subset of `columns` computable on `bars` bars."""
+    return tuple(c for c in columns if min_bars(c) <= bars)
+
+def resample_ohlcv(df, timeframe):
+    """
+    Builds weekly/monthly OHLCV bars from a daily frame. Each bar is labelled
+    with its last trading day and keeps `PV` (sum of typical price x volume)
+    for VWAP.
+    """
+    rule = TIMEFRAMES.get(timeframe)
+    if rule is None or df is None or df.empty:
+        return df
+    daily = df[["Open", "High", "Low", "Close", "Volume"]].copy()
+    daily["PV"] = ((daily["High"] + daily["Low"] + daily["Close"]) / 3) * daily["Volume"]
+    daily["Bar_Date"] = daily.index
+    bars = daily.resample(rule).agg({
+        "Open": "first", "High": "max", "Low": "min", "Close": "last",
+        "Volume": "sum", "PV": "sum", "Bar_Date": "last"
+    }).dropna(subset=["Close"])
+    bars.index = pd.DatetimeIndex(bars.pop("Bar_Date"), name=df.index.name)
+    return bars
+
+def _evaluate(df, names, values, opts):
+    for name in names:
+        if name in values or name not in INDICATORS:
+            continue # Already computed, or a raw OHLCV column
+        node = INDICATORS[name]
+        _evaluate(df, node["inputs"], values, opts)
+        values.update(node["fn"](df, values, opts))
+
+def calculate_technicals(df, sector_df=None, tail=None, columns=None, timeframe="1d"):
+    """
+    Calculates technical signals with robust fallbacks and high-fidelity squeeze logic.
+    With `tail=N` only the last N rows (plus TAIL_WARMUP bars of warm-up) are
+    computed and returned - use it when only the latest values are needed.
+    `columns` limits the work to the named indicators and their inputs
+    (default: every registered indicator). `timeframe` ("1d", "1wk", "1mo")
+    resamples the daily frame first, so no extra download is needed.
+    """
+    if df is None or df.empty:
+        return None
+
+    if timeframe != "1d":
+        df = resample_ohlcv(df, timeframe)
+        sector_df = resample_ohlcv(sector_df, timeframe)
+
+    df = df.iloc[-(tail + TAIL_WARMUP):].copy() if tail else df.copy()
+
+    values = {}
+    wanted = columns if columns is not None else [n for n in INDICATORS if not n.startswith("_")]
+    _evaluate(df, wanted, values, {"sector_df": sector_df, "tail": tail})
+
+    # Registration order keeps the frame layout stable regardless of request order
+    for name in INDICATORS:
+        if name in values and not name.startswith("_"):
+            df[name] = values[name]
+
+    return df.iloc[-tail:] if tail else df
 
 def detect_chart_patterns(df, window=60):
     """
@@ -93,10 +218,7 @@ def detect_chart_patterns(df, window=60):
     # Double Bottom (W Pattern)
     # Logic: Two minima separated by a peak, with the second minima within 3% of first
     # 1. Find local minima
-    min_indices = []
-    for i in range(2, len(lows)-2):
-        if lows[i] < lows[i-1] and lows[i] < lows[i-2] and lows[i] < lows[i+1] and lows[i] < lows[i+2]:
-            min_indices.append(i)
+    min_indices = local_minima(lows, order=2)
             
     if len(min_indices) >= 2:
         # Check last two minima
@@ -144,8 +266,8 @@ def detect_chart_patterns(df, window=60):
 
     return patterns
 
-def calculate_squeeze_momentum(df, length=20, mult=2.0, length_kc=20, mult_kc=1.5):
-    basis = df['Close'].rolling(window=length).mean()
+def calculate_squeeze_momentum(df, length=20, mult=2.0, length_kc=20, mult_kc=1.5, tail=None, basis=None):
+    if basis is None: basis = df['Close'].rolling(window=length).mean()
     dev = mult * df['Close'].rolling(window=length).std()
     ma_tr = (df['High'] - df['Low']).rolling(window=length_kc).mean()
     upper_kc = basis + (ma_tr * mult_kc)
@@ -154,15 +276,15 @@ def calculate_squeeze_momentum(df, length=20, mult=2.0, length_kc=20, mult_kc=1.
     avg_hl = (df['High'] + df['Low']) / 2
     avg_val = (avg_hl + basis) / 2
     delta = df['Close'] - avg_val
-    def linreg(series):
-        y = series.values; x = np.arange(len(y))
-        try: slope, intercept = np.polyfit(x, y, 1); return slope * (len(y) - 1) + intercept
-        except: return 0.0
-    mom = delta.rolling(window=length).apply(linreg, raw=False)
+    if tail:
+        # Only regress the windows ending in the last `tail` bars
+        delta = delta.iloc[-(tail + length - 1):]
+    mom = pd.Series(rolling_linreg(delta.values, length), index=delta.index).reindex(df.index)
     return sqz_on, mom
 
-def calculate_smi(df, q_period=14, r_period=9):
-    hh = df['High'].rolling(window=q_period).max(); ll = df['Low'].rolling(window=q_period).min()
+def calculate_smi(df, q_period=14, r_period=9, hh=None, ll=None):
+    if hh is None: hh = df['High'].rolling(window=q_period).max()
+    if ll is None: ll = df['Low'].rolling(window=q_period).min()
     c = (hh + ll) / 2; diff = df['Close'] - c; r = hh - ll
     def double_ema(series, span): return series.ewm(span=span).mean().ewm(span=span).mean()
     num = double_ema(diff, r_period); den = double_ema(r, r_period)
@@ -180,7 +302,10 @@ def calculate_risk_metrics(df):
 def get_latest_signals(df):
     if df is None or df.empty: return {}
     latest = df.iloc[-1]; prev = df.iloc[-2] if len(df) > 1 else latest
-    smi, smi_sig = calculate_smi(df)
+    smi = latest.get("SMI")
+    if smi is None:
+        # Frame did not come from calculate_technicals; only the warm-up tail is needed
+        smi = calculate_smi(df.iloc[-TAIL_WARMUP:])[0].iloc[-1]
     return {
         "rsi": latest.get("RSI_14", 50), "rsi_prev": prev.get("RSI_14", 50),
         "macd_div": bool(latest.get("MACD_Divergence", False)),
@@ -188,7 +313,7 @@ def get_latest_signals(df):
         "bb_squeeze": bool(latest.get("BB_Squeeze", False)),
         "close": latest["Close"], "vwap_weekly": latest.get("VWAP_Weekly", 0),
         "sqz_on": bool(latest.get("SQZ_ON", False)), "sqz_mom": latest.get("SQZ_MOM", 0),
-        "smi": smi.iloc[-1] if not smi.empty else 0, "volume": latest["Volume"],
+        "smi": smi, "volume": latest["Volume"],
         "volume_ratio": latest.get("Vol_Ratio", 1.0),
         "r1": latest.get("R1"), "s1": latest.get("S1"),
         # New Context for AI
@@ -198,3 +323,48 @@ def get_latest_signals(df):
         "double_bottom": bool(latest.get("Double_Bottom", False)),
         "cup_handle": bool(latest.get("Cup_Handle", False))
     }
+
+
+def calculate_latest_signals(df, sector_df=None, columns=SIGNAL_COLUMNS, timeframe="1d"):
+    """
+    Latest-bar signals via tail mode. Charts and backtests still need the
+    full-history calculate_technicals frame.
+    """
+    return get_latest_signals(calculate_technicals(df, sector_df, tail=2, columns=columns, timeframe=timeframe))
+
+def get_multi_timeframe_signals(df, sector_df=None, timeframes=("1d", "1wk", "1mo")):
+    """
+    Latest signals per timeframe, all derived from the same daily frame.
+    Each entry is tagged with its bar date so callers can see the alignment.
+    Short timeframes (2y of daily data is ~24 monthly bars) get the indicator
+    subset their bar count allows; one with fewer than MIN_TIMEFRAME_BARS
+    bars, or whose indicators fail, comes back as {}.
+    """
+    result = {tf: {} for tf in timeframes}
+    if df is None or df.empty:
+        return result
+    for tf in timeframes:
+        rule = TIMEFRAMES.get(tf)
+        bars = len(df) if rule is None else len(resample_ohlcv(df, tf))
+        if bars < MIN_TIMEFRAME_BARS:
+            continue
+        try:
+            tech = calculate_technicals(df, sector_df, tail=2, columns=columns_for_bars(bars), timeframe=tf)
+        except Exception as e:
+            print(f"{tf} signals failed: {e}")
+            continue
+        signals = get_latest_signals(tech)
+        if signals:
+            signals["bar_date"] = tech.index[-1]
+            signals["trend"] = get_trend_label(signals)
+        result[tf] = signals
+    return result
+
+def get_trend_label(signals):
+    """Bullish/Bearish from price vs SMA 50, falling back to RSI on short histories."""
+    close, sma50 = signals.get("close"), signals.get("sma_50")
+    if sma50 is not None and pd.notna(sma50):
+        return "Bullish" if close > sma50 else "Bearish"
+    rsi = signals.get("rsi")
+    if rsi is None or pd.isna(rsi): return "Neutral"
+    return "Bullish" if rsi > 50 else "Bearish"
@@ -0,0 +1,144 @@
+import time
+import numpy as np
+import pandas as pd
+from app.services.cache import ttl_cache, data_path
+from app.services.market_calendar import market_ttl
+from app.services import http_provider
+from app.services.jobs import with_priority
+
+# One bulk screener pull per session window serves every index-wide table
+UNIVERSE_FILE = "universe.pkl"
+UNIVERSE_PAGES = 30 # 20 rows per page, S&P 500 fits in 26
+
+# Custom screener columns (finvizfinance.constants.CUSTOM_SCREENER_COLUMNS)
+SCREENER_COLUMNS = [1, 2, 3, 4, 6, 7, 8, 9, 13, 16, 27, 29, 32, 33, 34, 38, 45, 46, 48, 59, 62, 65, 66, 69]
+
+# field -> (table headers it may appear under, value is a percentage)
+FIELDS = {
+    "company": (("Company",), None),
+    "sector": (("Sector",), None),
+    "industry": (("Industry",), None),
+    "market_cap": (("Market Cap", "Market Cap."), False),
+    "pe": (("P/E",), False),
+    "forward_pe": (("Fwd P/E", "Forward P/E"), False),
+    "peg": (("PEG",), False),
+    "p_fcf": (("P/FCF", "P/Free Cash Flow"), False),
+    "eps": (("EPS", "EPS (ttm)"), False),
+    "insider_trans": (("Insider Trans",), True),
+    "inst_trans": (("Inst Trans",), True),
+    "roa": (("ROA",), True),
+    "roe": (("ROE",), True),
+    "roi": (("ROIC", "ROI"), True),
+    "debt_eq": (("Debt/Eq",), False),
+    "perf_half": (("Perf Half", "Perf Half Y"), True),
+    "perf_year": (("Perf Year",), True),
+    "beta": (("Beta",), False),
+    "rsi": (("RSI",), False),
+    "recom": (("Recom",), False),
+    "price": (("Price",), False),
+    "change": (("Change",), True),
+    "target_price": (("Target Price",), False),
+}
+
+def _to_number(series, percent):
+    """Screener cells arrive as floats (already parsed) or strings like '12.5%' / '1.2B'."""
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(series, errors="coerce")
+    s = series.astype(str).str.strip().str.replace(",", "", regex=False)
+    is_pct = s.str.endswith("%")
+    scale = pd.Series(1.0, index=s.index)
+    for suffix, mult in (("B", 1e9), ("M", 1e6), ("K", 1e3)):
+        scale[s.str.endswith(suffix)] = mult
+    num = pd.to_numeric(s.str.rstrip("%BMK"), errors="coerce") * scale
+    return num.where(~is_pct, num / 100) if percent else num
+
+def normalize_screener_frame(raw):
+    """Raw Finviz screener table -> one row per ticker with the FIELDS columns."""
+    df = raw.drop_duplicates(subset=["Ticker"]).set_index("Ticker")
+    df.index = df.index.astype(str)
+    out = pd.DataFrame(index=df.index)
+    for field, (headers, percent) in FIELDS.items():
+        col = next((h for h in headers if h in df.columns), None)
+        if col is None:
+            out[field] = np.nan if percent is not None else None
+        elif percent is None:
+            out[field] = df[col].astype(str)
+        else:
+            out[field] = _to_number(df[col], percent)
+    out.index.name = "Ticker"
+    return out
+
+def universe_ttl():
+    """Screener data refreshes through the session and holds overnight and on weekends."""
+    return market_ttl("screener")
+
+@with_priority("background")
+def fetch_universe_screener(filters_dict=None):
+    """All Custom screener pages in one concurrent crawl over the pooled session."""
+    try:
+        df = http_provider.run(http_provider.finviz_screener, filters_dict=filters_dict or {'Index': 'S&P 500'},
+                               columns=SCREENER_COLUMNS, max_pages=UNIVERSE_PAGES)
+    except Exception as e:
+        print(f"Universe screener error: {e}")
+        return None
+    if df is None or df.empty:
+        return None
+    return normalize_screener_frame(df)
+
+def fetch_screener_rows(tickers):
+    """FIELDS rows for an arbitrary ticker list from ONE ticker-filtered screener query."""
+    if not tickers:
+        return None
+    try:
+        df = http_provider.run(http_provider.finviz_screener, ticker=",".join(tickers), columns=SCREENER_COLUMNS)
+    except Exception as e:
+        print(f"Screener lookup failed for {tickers}: {e}")
+        return None
+    if df is None or df.empty:
+        return None
+    return normalize_screener_frame(df)
+
+def peek_universe_snapshot():
+    """The snapshot if it is already loaded; never starts a crawl."""
+    return get_universe_snapshot.cache.get(((), ()))
+
+def lookup_universe_rows(tickers):
+    """
+    FIELDS rows for `tickers`: served from the loaded universe snapshot where
+    possible, the rest from one screener query. Symbols neither knows are absent.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    universe = peek_universe_snapshot()
+    found = universe.loc[[t for t in tickers if t in universe.index]] if universe is not None else None
+    missing = [t for t in tickers if found is None or t not in found.index]
+    extra = fetch_screener_rows(missing)
+    frames = [f for f in (found, extra) if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=list(FIELDS))
+    return pd.concat(frames)
+
+@ttl_cache(ttl=universe_ttl, maxsize=1)
+def get_universe_snapshot():
+    """
+    Fundamentals and quote fields for every S&P 500 constituent, indexed by
+    ticker. Persisted so a restart before it expires skips the scrape.
+    """
+    path = data_path(UNIVERSE_FILE)
+    try:
+        saved = pd.read_pickle(path)
+        if time.time() < saved.get("expires_at", 0):
+            return saved["table"]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Could not load universe snapshot: {e}")
+
+    table = fetch_universe_screener()
+    if table is None or table.empty:
+        print("Universe snapshot: no data returned from Finviz.")
+        return None
+    try:
+        pd.to_pickle({"table": table, "saved_at": time.time(), "expires_at": time.time() + universe_ttl()}, path)
+    except Exception as e:
+        print(f"Could not persist universe snapshot: {e}")
+    return table
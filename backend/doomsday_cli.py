@@ -1,24 +1,21 @@
+import argparse
 import os
 import sys
+import time
 
 # Add the current directory to sys.path to allow importing from 'app'
 sys.path.append(os.path.join(os.path.dirname(__file__)))
 
-from app.services.macro import get_doomsday_score
+import pandas as pd
+from app.services.cache import data_path
+from app.services.macro import get_doomsday_score, export_doomsday_inputs, import_doomsday_inputs, DOOMSDAY_TTL
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 
-def run_cli():
-    console = Console()
-    console.print("[bold red]INITIALIZING DOOMSDAY ENGINE...[/bold red]")
-    
-    data = get_doomsday_score()
-    
-    if "error" in data:
-        console.print(f"[bold red]ERROR: {data['error']}[/bold red]")
-        return
+STATE_FILE = "doomsday_state.pkl"
 
+def render(console, data):
     score = data['overall_score']
     verdict = data['verdict']
     pillars = data['pillars']
@@ -51,5 +48,83 @@ def run_cli():
     console.print(f"[bold white]ACTIONABLE ADVICE:[/bold white] {advice}")
     console.print("-" * 50)
 
+def pillar_signature(data):
+    """What the table shows; a redraw is only needed when this changes."""
+    pillars = data['pillars']
+    return (data['overall_score'], data['verdict']) + tuple(
+        (name, str(p['value']), p['risk'], p.get('trend')) for name, p in sorted(pillars.items())
+    )
+
+def load_state(path):
+    try:
+        return pd.read_pickle(path)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Ignoring unreadable state file {path}: {e}")
+        return {}
+
+def save_state(path, data):
+    try:
+        pd.to_pickle({"inputs": export_doomsday_inputs(), "score": data, "saved_at": time.time()}, path)
+    except Exception as e:
+        print(f"Could not save state to {path}: {e}")
+
+def run_cli():
+    console = Console()
+    console.print("[bold red]INITIALIZING DOOMSDAY ENGINE...[/bold red]")
+    
+    data = get_doomsday_score()
+    
+    if "error" in data:
+        console.print(f"[bold red]ERROR: {data['error']}[/bold red]")
+        return
+
+    render(console, data)
+
+def run_watch(interval, ttl, state_path):
+    """
+    Long-running mode: refreshes every `interval` seconds, re-downloading only
+    inputs older than `ttl`, and redraws only when a pillar changes. Inputs and
+    the last score are persisted so a restart comes up warm.
+    """
+    console = Console()
+    state = load_state(state_path)
+    elapsed = time.time() - state.get("saved_at", time.time())
+    import_doomsday_inputs({s: (df, age + elapsed) for s, (df, age) in state.get("inputs", {}).items()}, ttl)
+    last_signature = None
+    if state.get("score"):
+        console.clear()
+        render(console, state["score"])
+        console.print("[dim](restored from last run)[/dim]")
+        last_signature = pillar_signature(state["score"])
+
+    while True:
+        data = get_doomsday_score(ttl)
+        if "error" in data:
+            console.print(f"[bold red]ERROR: {data['error']}[/bold red]")
+        else:
+            save_state(state_path, data)
+            signature = pillar_signature(data)
+            if signature != last_signature:
+                console.clear()
+                render(console, data)
+                console.print(f"[dim]Updated {time.strftime('%Y-%m-%d %H:%M:%S')} | refresh every {interval}s[/dim]")
+                last_signature = signature
+        time.sleep(interval)
+
 if __name__ == "__main__":
-    run_cli()
+    parser = argparse.ArgumentParser(description="Doomsday macro rating")
+    parser.add_argument("--watch", action="store_true", help="keep running and refresh on an interval")
+    parser.add_argument("--interval", type=int, default=300, help="seconds between refreshes in watch mode")
+    parser.add_argument("--ttl", type=int, default=DOOMSDAY_TTL, help="seconds before an input is re-downloaded")
+    parser.add_argument("--state", default=None, help=f"state file (default: DATA_DIR/{STATE_FILE})")
+    args = parser.parse_args()
+
+    if args.watch:
+        try:
+            run_watch(args.interval, args.ttl, args.state or data_path(STATE_FILE))
+        except KeyboardInterrupt:
+            pass
+    else:
+        run_cli()
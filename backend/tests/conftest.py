@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Services read these at import time; keep the suite offline and out of the repo's data dir
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="ticker-analyzer-tests-"))
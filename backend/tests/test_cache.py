@@ -0,0 +1,40 @@
+from app.services import cache
+from app.services.cache import SWRCache
+
+def loader(*values):
+    """fn for get_or_set returning `values` in turn; records each call."""
+    calls, pending = [], list(values)
+    def fn():
+        calls.append(1)
+        return pending.pop(0)
+    return fn, calls
+
+def test_stale_entries_are_served_while_one_refresh_runs(monkeypatch):
+    jobs = []
+    monkeypatch.setattr(cache, "spawn_background", lambda fn, *args: jobs.append((fn, args)))
+    swr = SWRCache(soft_ttl=0, hard_ttl=60)
+    fn, calls = loader("v1", "v2")
+    assert swr.get_or_set("k", fn) == "v1"
+    assert swr.get_or_set("k", fn) == "v1"
+    assert swr.get_or_set("k", fn) == "v1"
+    assert len(jobs) == 1 and len(calls) == 1 # One refresh queued, nothing blocked on it
+    refresh, args = jobs.pop()
+    refresh(*args)
+    assert swr.get_or_set("k", fn) == "v2"
+    assert swr.stats()["stale"] == 3
+
+def test_empty_results_are_not_stored_and_stale_values_cover_errors():
+    swr = SWRCache(soft_ttl=0, hard_ttl=0)
+    fn, calls = loader({}, "v1", None)
+    assert swr.get_or_set("k", fn) == {}
+    assert swr.stats()["size"] == 0
+    assert swr.get_or_set("k", fn) == "v1"
+    assert swr.get_or_set("k", fn) == "v1" # Expired, but the reload came back empty
+    assert len(calls) == 3 and swr.stats()["stale_error"] == 1
+
+def test_callable_ttls_are_evaluated_per_key():
+    swr = SWRCache(soft_ttl=lambda key: 60 if key == "slow" else 0, hard_ttl=0)
+    for key in ("slow", "fast"):
+        fn, calls = loader("a", "b")
+        swr.get_or_set(key, fn)
+        assert swr.get_or_set(key, fn) == ("a" if key == "slow" else "b")
@@ -0,0 +1,48 @@
+import asyncio
+import numpy as np
+import pandas as pd
+from app.services import commodities
+
+def test_ai_errors_are_not_cached_or_returned(monkeypatch):
+    entry = {"id": "gold", "name": "Gold", "technicals": {}, "macro_context": {}, "veteran_metrics": {"score": 72}}
+    monkeypatch.setattr(commodities, "get_commodity_snapshot", lambda: {"as_of": "2026-10-16", "commodities": {"gold": entry}})
+    monkeypatch.setattr(commodities, "fetch_news", lambda ticker: [])
+    answers = [{"verdict": "Neutral", "action_plan": "unavailable", "ai_error": True}, {"verdict": "Buy", "action_plan": "Buy dips"}]
+    calls = []
+    def strategy(*args):
+        calls.append(args[0])
+        return dict(answers[len(calls) - 1])
+    monkeypatch.setattr(commodities, "analyze_commodity_strategy", strategy)
+    commodities._strategy_cache.clear()
+
+    first = asyncio.run(commodities.analyze_commodity("gold"))["strategy"]
+    assert "ai_error" not in first and first["relevance_score"] == 72
+    second = asyncio.run(commodities.analyze_commodity("gold"))["strategy"]
+    third = asyncio.run(commodities.analyze_commodity("gold"))["strategy"]
+    assert calls == ["Gold", "Gold"] # The error was retried, the good answer cached
+    assert second == third == {"verdict": "Buy", "action_plan": "Buy dips", "relevance_score": 72}
+
+def ohlcv(seed, rows=260):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    index = pd.bdate_range(end="2026-10-16", periods=rows, name="Date")
+    return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close, "Volume": 1e5}, index=index)
+
+def test_snapshot_computes_every_commodity_from_one_batch(monkeypatch):
+    batches = []
+    def batch(symbols, period):
+        batches.append(list(symbols))
+        return {s: ohlcv(i) for i, s in enumerate(symbols) if s != "KC=F"} # Coffee has no data
+    monkeypatch.setattr(commodities, "fetch_price_history_batch", batch)
+    commodities.get_commodity_snapshot.cache.clear()
+
+    snapshot = commodities.get_commodity_snapshot()
+    commodities.get_commodity_snapshot()
+    assert len(batches) == 1
+    assert all(c["ticker"] in batches[0] for c in commodities.COMMODITY_MAP.values())
+    assert set(snapshot["commodities"]) == set(commodities.COMMODITY_MAP) - {"coffee"}
+    regimes = {e["macro_context"]["market_regime"] for e in snapshot["commodities"].values()}
+    assert len(regimes) == 1 # The macro leg is computed once and shared
+    overview = commodities.get_commodity_overview()
+    assert [row["id"] for row in overview] == list(snapshot["commodities"])
+    assert all(row["price"] is not None for row in overview)
@@ -0,0 +1,30 @@
+from app.services import competitors as comp
+
+def seeded(monkeypatch, tickers):
+    asked = []
+    def identify(ticker):
+        asked.append(ticker)
+        return ["PEER1", "PEER2", "PEER3"]
+    monkeypatch.setattr(comp, "identify_competitors", identify)
+    monkeypatch.setattr(comp, "_save", lambda: None)
+    monkeypatch.setitem(comp._competitors, "map", {t: {"peers": [], "source": "seed", "updated_at": 0} for t in tickers})
+    monkeypatch.setitem(comp._competitors, "budget", {"day": None, "used": 0})
+    comp._pending.clear()
+    return asked
+
+def test_analysed_tickers_are_refined_first(monkeypatch):
+    asked = seeded(monkeypatch, [f"T{i}" for i in range(50)])
+    monkeypatch.setattr(comp, "REFINE_DAILY_BUDGET", 0)
+    comp.get_competitors("T42")
+    assert comp.refine_competitors() == 1
+    assert asked == ["T42"]
+    assert comp._competitors["map"]["T42"]["source"] == "llm"
+
+def test_unrequested_seeds_share_a_daily_budget(monkeypatch):
+    asked = seeded(monkeypatch, [f"T{i}" for i in range(50)])
+    monkeypatch.setattr(comp, "REFINE_DAILY_BUDGET", 12)
+    for _ in range(5):
+        comp.refine_competitors(batch=10)
+    assert len(asked) == 12
+    sources = [e["source"] for e in comp._competitors["map"].values()]
+    assert sources.count("llm") == 12 and sources.count("seed") == 38
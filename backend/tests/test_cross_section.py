@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+from app.services import cross_section as cs
+
+UNIVERSE = pd.DataFrame({
+    "sector": ["Technology", "Technology", "Technology", "Energy", "Energy"],
+    "pe": [10.0, 20.0, 30.0, 5.0, 15.0],
+    "roe": [0.1, 0.2, None, 0.3, 0.3],
+}, index=pd.Index(["A", "B", "C", "D", "E"], name="Ticker"))
+
+@pytest.fixture
+def table(monkeypatch):
+    monkeypatch.setattr(cs, "get_universe_snapshot", lambda: UNIVERSE)
+    cs.get_cross_section_table.cache.clear()
+    yield cs.get_cross_section_table()
+    cs.get_cross_section_table.cache.clear()
+
+def test_percentiles_are_universe_and_sector_wide(table):
+    assert cs.get_percentile("C", "pe") == 1.0
+    assert cs.get_percentile("D", "pe") == pytest.approx(0.2)
+    assert cs.get_percentile("E", "pe", within_sector=True) == 1.0
+    assert cs.get_sector_zscore("B", "pe") == pytest.approx(0.0)
+    assert cs.get_sector_zscore("C", "pe") == pytest.approx(1.0)
+
+def test_missing_values_and_flat_sectors_have_no_score(table):
+    assert cs.get_percentile("C", "roe") is None
+    assert cs.get_sector_zscore("D", "roe") is None # Zero spread within Energy
+    assert cs.get_percentile("ZZZ", "pe") is None
+    assert cs.get_cross_section("ZZZ") == {}
+    assert cs.get_cross_section("A", metrics=["pe"]) == {"pe": {"value": 10.0, "pct": 0.4, "sector_pct": 0.333, "sector_z": -1.0}}
@@ -0,0 +1,83 @@
+import pandas as pd
+from app.services import data_fetcher as df, providers
+
+FUND = {"Company": "Acme", "Sector": "Technology", "Price": "100", "PEG": "1.5", "P/FCF": "20", "Altman Z-Score": "4.2"}
+
+def stub_statements(monkeypatch):
+    calls = []
+    def build(symbol, with_info=True):
+        calls.append((symbol, with_info))
+        return {"altman_z": 3.0, "months_runway": 18.0, "monthly_burn": 1e6, "total_liab": 5e9}
+    monkeypatch.setattr(df, "build_statement_metrics", build)
+    monkeypatch.setattr(df, "fetch_vix_level", lambda: 20.0)
+    monkeypatch.setattr(df, "fetch_sector_rotation", lambda sector: "Neutral")
+    df.statement_cache.clear()
+    return calls
+
+def test_complete_finviz_fundamentals_skip_yahoo(monkeypatch):
+    calls = stub_statements(monkeypatch)
+    info = df.fetch_company_info.__wrapped__("ACME", fund=FUND)
+    assert calls == []
+    assert info["altman_z"] == 4.2 and info["months_runway"] is None
+
+def test_missing_inputs_pull_only_the_statements_needed(monkeypatch):
+    calls = stub_statements(monkeypatch)
+    info = df.fetch_company_info.__wrapped__("ACME", fund={**FUND, "PEG": "-"})
+    assert calls == [("ACME", False)]
+    assert info["altman_z"] == 4.2 and info["months_runway"] == 18.0
+
+    info = df.fetch_company_info.__wrapped__("ACME", fund={**FUND, "Altman Z-Score": "-"})
+    assert calls[-1] == ("ACME", True)
+    assert info["altman_z"] == 3.0
+
+def test_only_upstream_failures_fall_back_to_yahoo(monkeypatch):
+    fallbacks = []
+    monkeypatch.setattr(df, "fetch_company_info_fallback", lambda symbol: fallbacks.append(symbol) or {"symbol": symbol})
+    for error, expected in ((df.TickerNotFound("NOPE"), {}), (ValueError("bad page"), {}),
+                            (df.CircuitOpenError("finviz open"), {"symbol": "DOWN"}), (ConnectionError("reset"), {"symbol": "DOWN"})):
+        def scrape(symbol, error=error):
+            raise error
+        monkeypatch.setattr(df, "fetch_finviz_fundamentals", scrape)
+        symbol = "DOWN" if expected else "NOPE"
+        assert df.fetch_company_info.__wrapped__(symbol) == expected
+    assert fallbacks == ["DOWN", "DOWN"]
+
+def test_negative_cache_records_only_definitive_misses(monkeypatch):
+    answers = {"1d": None, "1m": "frame"}
+    def chart(fn, symbol, period, interval):
+        answer = answers[interval]
+        if answer == "404":
+            raise df.TickerNotFound(symbol)
+        return pd.DataFrame({"Close": [1.0]}) if answer else pd.DataFrame()
+    monkeypatch.setattr(df.http_provider, "run", chart)
+    providers.negative_cache.clear()
+
+    # An empty daily chart is not proof the symbol is gone: intraday still polls
+    assert df.fetch_ticker_data.__wrapped__("EMPTY") is None
+    assert df.fetch_ticker_data.__wrapped__("EMPTY", period="1d", interval="1m") is not None
+    assert not df.is_known_missing("yahoo", "EMPTY", "chart")
+
+    answers["1d"] = "404"
+    assert df.fetch_ticker_data.__wrapped__("GONE") is None
+    assert df.is_known_missing("yahoo", "GONE", "chart")
+    assert not df.is_known_missing("finviz", "GONE", "quote")
+    assert df.fetch_company_info_fallback("GONE") == {}
+
+def test_peer_batch_scrapes_only_symbols_the_screener_lacks(monkeypatch):
+    from app.services import universe
+    def raw(*tickers):
+        return pd.DataFrame({"Ticker": list(tickers), "Price": ["100"] * len(tickers), "P/E": ["20"] * len(tickers),
+                             "Market Cap": ["2.5B"] * len(tickers), "Recom": ["1.8"] * len(tickers)})
+    queries, scraped = [], []
+    def screener(fn, ticker, columns):
+        queries.append(ticker)
+        return raw(*[t for t in ticker.split(",") if t != "NOPE"])
+    monkeypatch.setattr(universe, "peek_universe_snapshot", lambda: universe.normalize_screener_frame(raw("AAPL")))
+    monkeypatch.setattr(universe.http_provider, "run", screener)
+    monkeypatch.setattr(df, "fetch_fundamentals_lean", lambda symbol: scraped.append(symbol) or {"Ticker": symbol, "Price": 1.0})
+
+    table = df.fetch_fundamentals_batch(["MSFT", "AAPL", "NOPE", "MSFT"])
+    assert queries == ["MSFT,NOPE"] # One screener query for everything the snapshot lacks
+    assert scraped == ["NOPE"]
+    assert table["Ticker"].tolist() == ["MSFT", "AAPL", "NOPE"]
+    assert table.iloc[1][["Price", "P/E", "Mkt Cap", "Rec"]].tolist() == [100.0, 20.0, 2.5e9, "buy"]
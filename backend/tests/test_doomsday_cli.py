@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+import doomsday_cli
+from app.services import macro
+from app.services.data_fetcher import price_cache
+
+def score(overall, vix):
+    pillars = {name: {"value": 1, "risk": "LOW"} for name in ("yield_curve", "sahm_rule", "sector_flow")}
+    pillars["credit_stress"] = {"value": f"{vix} (VIX)", "risk": "LOW"}
+    pillars["dr_copper"] = {"value": "0.0020", "risk": "LOW", "trend": "RISING"}
+    return {"overall_score": overall, "verdict": "STABLE", "pillars": pillars, "advice": "Hold"}
+
+class Stop(Exception):
+    pass
+
+def watch(monkeypatch, state_path, answers, ttl=900):
+    """Runs run_watch through `answers` (one per refresh); returns the scores it drew."""
+    drawn, pending = [], list(answers)
+    def sleep(seconds):
+        if not pending:
+            raise Stop
+    monkeypatch.setattr(doomsday_cli, "get_doomsday_score", lambda ttl: pending.pop(0))
+    monkeypatch.setattr(doomsday_cli, "render", lambda console, data: drawn.append(data["overall_score"]))
+    monkeypatch.setattr(doomsday_cli.time, "sleep", sleep)
+    with pytest.raises(Stop):
+        doomsday_cli.run_watch(60, ttl, state_path)
+    return drawn
+
+def test_watch_redraws_only_when_a_pillar_changes(monkeypatch, tmp_path):
+    drawn = watch(monkeypatch, tmp_path / "state.pkl", [score(30, 15), score(30, 15), score(30, 16), score(45, 16)])
+    assert drawn == [30, 30, 45]
+
+def test_watch_restarts_warm_from_the_state_file(monkeypatch, tmp_path):
+    path = tmp_path / "state.pkl"
+    key = (macro.DOOMSDAY_INPUTS["vix"], macro.DOOMSDAY_PERIOD, "1d")
+    frame = pd.DataFrame({"Close": [15.0]}, index=pd.DatetimeIndex(["2026-10-16"], name="Date"))
+    price_cache.set(key, frame, 900)
+    watch(monkeypatch, path, [score(30, 15)])
+
+    price_cache.clear()
+    drawn = watch(monkeypatch, path, [score(30, 15)])
+    # The last score is drawn straight from the state file; the unchanged refresh is not redrawn
+    assert drawn == [30]
+    assert price_cache.get(key) is not None
+
+    price_cache.clear()
+    watch(monkeypatch, path, [score(30, 15)], ttl=0)
+    assert price_cache.get(key) is None # Inputs older than the TTL are not restored
@@ -0,0 +1,24 @@
+from app.services.headlines import cluster_headlines, compact_headlines, estimate_tokens
+
+FED = [
+    "[2026-10-16 09:30:00] Fed holds rates steady as inflation cools (Source: https://a.example/1)",
+    "[2026-10-16 09:10:00] Fed holds rates steady as inflation cools (Reuters)",
+    "[2026-10-16 08:55:00] Fed holds rates steady as inflation cools, markets rally (Source: https://b.example/2)",
+]
+OIL = "[2026-10-16 08:00:00] Oil slips on rising US crude inventories (Source: https://c.example/3)"
+
+def test_syndicated_copies_form_one_cluster():
+    assert cluster_headlines(FED + [OIL, "", "  "]) == [(FED[0], 3), (OIL, 1)]
+
+def test_compact_lines_carry_the_count_and_drop_urls():
+    assert compact_headlines(FED + [OIL], token_budget=1000) == [
+        "[2026-10-16 09:30:00] Fed holds rates steady as inflation cools (x3 similar)",
+        "[2026-10-16 08:00:00] Oil slips on rising US crude inventories",
+    ]
+
+def test_budget_and_exclude():
+    first = compact_headlines(FED + [OIL], token_budget=1000)[0]
+    assert compact_headlines(FED + [OIL], token_budget=estimate_tokens(first)) == [first]
+    # A story already in the prompt is not repeated, whichever copy it was
+    assert compact_headlines(FED + [OIL], token_budget=1000, exclude=[FED[1]]) == [
+        "[2026-10-16 08:00:00] Oil slips on rising US crude inventories"]
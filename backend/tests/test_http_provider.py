@@ -0,0 +1,55 @@
+from pathlib import Path
+import pandas as pd
+import pytest
+from app.services import http_provider
+from app.services.providers import TickerNotFound
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+def serve(monkeypatch, pages):
+    """Answers Finviz requests from saved pages: `pages(url, params)` -> fixture file name."""
+    requests = []
+    async def fake_call(provider, fn, url, params=None):
+        requests.append(params)
+        return (FIXTURES / pages(url, params)).read_text()
+    monkeypatch.setattr(http_provider, "acall_provider", fake_call)
+    return requests
+
+def test_quote_page_parses_fundamentals_and_news(monkeypatch):
+    serve(monkeypatch, lambda url, params: "finviz_quote_acme.html")
+    quote = http_provider.run(http_provider.finviz_quote_page, "ACME")
+    fund = quote.ticker_fundament()
+    assert fund["Company"] == "Acme Corp" and fund["Sector"] == "Technology"
+    assert fund["Price"] == "100.00" and fund["PEG"] == "1.52" and fund["Inst Own"] == "71.20%"
+    news = quote.ticker_news()
+    assert list(news.columns) == ["Date", "Title", "Link", "Source"]
+    assert news["Source"].tolist() == ["Reuters", "Motley Fool", "Bloomberg"]
+    # Time-only rows inherit the date of the row above
+    assert pd.Timestamp(news["Date"].iloc[1]) == pd.Timestamp("2026-10-16 08:05")
+
+def test_quote_page_for_an_unknown_symbol(monkeypatch):
+    serve(monkeypatch, lambda url, params: "finviz_quote_not_found.html")
+    with pytest.raises(TickerNotFound):
+        http_provider.run(http_provider.finviz_quote_page, "NOPE")
+
+def screener_page(url, params):
+    return "finviz_screener_page2.html" if params.get("r") == 21 else "finviz_screener_page1.html"
+
+def test_screener_assembles_every_page(monkeypatch):
+    requests = serve(monkeypatch, screener_page)
+    df = http_provider.run(http_provider.finviz_screener, filters_dict={"Index": "S&P 500"}, columns=[1, 2, 3, 6, 65], order="Market Cap.", ascend=False)
+    assert df["Ticker"].tolist() == ["AAPL", "MSFT", "NVDA"]
+    assert list(df.columns) == ["Ticker", "Company", "Sector", "Market Cap", "Price"]
+    assert df["Price"].tolist() == [227.5, 402.1, 114.2]
+    first, second = requests
+    assert first["f"] == "idx_sp500" and first["c"] == "0,1,2,3,6,65" and first["o"] == "-marketcap"
+    assert "r" not in first and second["r"] == 21
+
+def test_screener_stops_at_a_failed_page(monkeypatch):
+    def pages(url, params):
+        if params.get("r"):
+            raise ConnectionError("reset")
+        return "finviz_screener_page1.html"
+    serve(monkeypatch, pages)
+    df = http_provider.run(http_provider.finviz_screener)
+    assert df["Ticker"].tolist() == ["AAPL", "MSFT"]
@@ -0,0 +1,57 @@
+import threading
+import time
+import pandas as pd
+import pytest
+from app.services import intraday
+from app.services.intraday import BarRingBuffer, IntradayStore
+
+START = pd.Timestamp("2026-01-05 14:30", tz="UTC")
+
+def minute(i):
+    return START + pd.Timedelta(minutes=i)
+
+def test_frame_is_not_overwritten_by_later_bars():
+    buf = BarRingBuffer(capacity=3)
+    for i in range(3):
+        buf.append(minute(i), i, i, i, i, i)
+    with buf.lock:
+        df = buf.frame()
+    for i in range(3, 6):
+        buf.append(minute(i), i, i, i, i, i)
+    assert df["Close"].tolist() == [0, 1, 2]
+    assert df.index[0] == minute(0)
+
+def test_concurrent_polls_fetch_once(monkeypatch):
+    calls = []
+    def fetch(symbol, period, interval):
+        calls.append(symbol)
+        time.sleep(0.05)
+        return pd.DataFrame({f: [1.0] for f in intraday.FIELDS}, index=pd.DatetimeIndex([minute(0)]))
+    monkeypatch.setattr(intraday.fetch_ticker_data, "__wrapped__", fetch)
+    store = IntradayStore()
+    threads = [threading.Thread(target=store.poll, args=("ACME", "1m", 30)) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert calls == ["ACME"]
+    assert len(store.frame("ACME")) == 1
+
+def test_view_is_read_only():
+    buf = BarRingBuffer(capacity=3)
+    buf.append(minute(0), 1, 2, 0.5, 1.5, 100)
+    times, data = buf.view()
+    with pytest.raises(ValueError):
+        data[0, 0] = 0
+    buf.append(minute(1), 1, 2, 0.5, 1.5, 100) # The ring itself stays writable
+    assert len(buf) == 2
+
+def test_unsupported_intervals_open_no_buffer():
+    store = IntradayStore()
+    with pytest.raises(ValueError):
+        store.push("ACME", "7m", [])
+    assert store.symbols() == []
+
+def test_push_endpoint_rejects_unknown_interval():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    response = TestClient(app).post("/api/intraday/ACME/bars?interval=bogus", json=[])
+    assert response.status_code == 400
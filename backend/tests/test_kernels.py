@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from app.services import kernels
+
+# Every backend is checked against the plain-Python loop kernels
+BACKENDS = [pytest.param(name, marks=pytest.mark.skipif(name not in kernels.BACKENDS, reason=f"{name} not installed"))
+            for name in ("numpy", "numba")]
+
+def random_walk(n=750, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    close[5] = np.nan # NaN windows must propagate identically
+    return rng, close
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_rolling_linreg_matches_reference(backend):
+    _, close = random_walk()
+    for length in (2, 20, 50):
+        expected = kernels._rolling_linreg_loop(close, length)
+        got = kernels.BACKENDS[backend]["rolling_linreg"](close, length)
+        assert np.allclose(got, expected, equal_nan=True, rtol=1e-9, atol=1e-9)
+    assert np.isnan(kernels.BACKENDS[backend]["rolling_linreg"](close[:10], 20)).all()
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_local_minima_matches_reference(backend):
+    _, close = random_walk()
+    for order in (1, 2, 5):
+        assert np.array_equal(kernels.BACKENDS[backend]["local_minima"](close, order), kernels._local_minima_loop(close, order))
+    assert len(kernels.BACKENDS[backend]["local_minima"](close[:3], 2)) == 0
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_simulate_trades_matches_reference(backend):
+    for seed in (7, 11, 23):
+        rng, close = random_walk(seed=seed)
+        smooth = np.convolve(np.nan_to_num(close, nan=100.0), np.ones(50) / 50, mode="same")
+        rsi = rng.uniform(20, 90, len(close))
+        score = rng.uniform(20, 90, len(close))
+        args = (close, smooth, smooth, rsi, score, 30, 60.0, 40.0)
+        expected = kernels._simulate_trades_loop(*args)
+        got = kernels.BACKENDS[backend]["simulate_trades"](*args)
+        assert len(expected[0]) > 0
+        assert all(np.array_equal(x, y) for x, y in zip(got, expected))
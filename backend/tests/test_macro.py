@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+from app.services import macro
+
+def doomsday_panel(rows=200):
+    index = pd.bdate_range(end="2026-10-16", periods=rows)
+    t = np.arange(rows, dtype=float)
+    panel = pd.DataFrame({
+        "tnx": 4.0, "irx": 5.0,                            # Inverted curve
+        "xlu": 60 + t * 0.1, "xlp": 70 + t * 0.1, "xlk": 200 - t * 0.2, # Defensive rotation
+        "vix": np.where(t < rows - 10, 15.0, 25.0),
+        "copper": 5 - t * 0.005, "gold": 2000.0,           # Falling copper/gold
+    }, index=index)
+    return panel.rename(columns=macro.DOOMSDAY_INPUTS)
+
+def test_doomsday_series_scores_every_date():
+    series = macro.calculate_doomsday_series(doomsday_panel())
+    # Warm-up: the copper/gold average needs 126 sessions
+    assert len(series) == 200 - 125
+    calm, stressed = series.iloc[0], series.iloc[-1]
+    assert calm["vix_score"] == 37.5 and stressed["vix_score"] == 25 / 30 * 100
+    assert (series[["yc_score", "rotation_risk", "commodities_score"]] == 100).all().all()
+    assert np.isclose(stressed["score"], 0.30 * 100 + 0.20 * 100 + 0.15 * 100 + 0.15 * 25 / 30 * 100 + 0.20 * 100)
+
+def test_doomsday_score_reads_today_off_the_series(monkeypatch):
+    monkeypatch.setattr(macro, "fetch_doomsday_inputs", lambda ttl=macro.DOOMSDAY_TTL: doomsday_panel())
+    result = macro.get_doomsday_score()
+    assert result["overall_score"] == 97 and result["verdict"] == "CRITICAL"
+    assert result["pillars"]["yield_curve"]["risk"] == "HIGH"
+    assert len(result["history"]) == 75 and result["history"][-1]["score"] == 97
+    assert result["history"][0]["score"] == int(0.30 * 100 + 0.20 * 100 + 0.15 * 100 + 0.15 * 37.5 + 0.20 * 100)
+
+def macro_closes(rows=130, seed=1):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2026-10-16", periods=rows)
+    symbols = list(macro.MACRO_ASSETS.values())
+    return pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (rows, len(symbols))), axis=0)), index=index, columns=symbols)
+
+def stock_frame(closes, seed=2):
+    rng = np.random.default_rng(seed)
+    # Half SPY, half noise, so the correlations are far from zero
+    returns = 0.5 * closes["SPY"].pct_change().fillna(0) + rng.normal(0, 0.01, len(closes))
+    close = 50 * (1 + returns).cumprod()
+    return pd.DataFrame({"Close": close.to_numpy()}, index=closes.index.tz_localize("America/New_York"))
+
+def test_macro_correlations_share_one_return_matrix(monkeypatch):
+    closes = macro_closes()
+    panels = []
+    monkeypatch.setattr(macro, "fetch_price_panel", lambda symbols, period: panels.append(symbols) or closes)
+    macro.get_macro_return_matrix.cache.clear()
+
+    stock = stock_frame(closes)
+    first = macro.calculate_macro_correlations(stock)
+    second = macro.calculate_macro_correlations(stock_frame(closes, seed=3))
+    assert len(panels) == 1 and set(first) == set(second) == set(macro.MACRO_ASSETS)
+
+    returns = closes.pct_change().iloc[1:].tail(60)
+    stock_returns = stock["Close"].pct_change().iloc[1:].tail(60).to_numpy()
+    for name, symbol in macro.MACRO_ASSETS.items():
+        expected = np.corrcoef(returns[symbol].to_numpy(), stock_returns)[0, 1]
+        assert first[name]["value"] == round(expected, 2)
+    assert first["S&P 500"]["value"] > 0.3
+
+def test_alignment_table_matches_pairwise_corr_and_beta(monkeypatch):
+    closes = macro_closes()
+    stocks = pd.DataFrame({t: stock_frame(closes, seed=s)["Close"].to_numpy() for s, t in enumerate(["AAA", "BBB", "CCC"])}, index=closes.index)
+    stocks.iloc[:100, 2] = np.nan # A fresh listing without a full window is dropped
+    monkeypatch.setattr(macro, "fetch_price_panel", lambda symbols, period: closes if symbols == list(macro.MACRO_ASSETS.values()) else stocks[symbols])
+    macro.get_macro_return_matrix.cache.clear()
+
+    table = macro.refresh_macro_alignment(["AAA", "BBB", "CCC"])
+    assert list(table.index) == ["AAA", "BBB"] and table.dtypes.eq("float32").all()
+    window = closes.pct_change().iloc[1:].tail(60)
+    aaa = stocks["AAA"].pct_change().iloc[1:].tail(60)
+    spy = window["SPY"]
+    assert np.isclose(table.loc["AAA", ("corr", "S&P 500")], aaa.corr(spy), atol=1e-5)
+    assert np.isclose(table.loc["AAA", ("beta", "S&P 500")], aaa.cov(spy) / spy.var(), atol=1e-5)
+
+    looked_up = macro.get_macro_alignment("AAA")
+    assert looked_up["S&P 500"]["value"] == round(aaa.corr(spy), 2)
+    assert looked_up["S&P 500"]["beta"] == round(aaa.cov(spy) / spy.var(), 2)
+    assert macro.get_macro_alignment("CCC") == {}
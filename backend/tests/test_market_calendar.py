@@ -0,0 +1,31 @@
+from datetime import datetime
+from app.services import market_calendar as cal
+from app.services.market_calendar import NY, market_ttl
+
+def at(*args):
+    return datetime(*args, tzinfo=NY)
+
+def hours(seconds):
+    return round(seconds / 3600, 2)
+
+def test_daily_prices_are_held_over_the_weekend():
+    # Friday evening -> Monday 09:30
+    assert hours(market_ttl("prices", at(2026, 10, 16, 16, 30))) == 65.0
+    assert hours(market_ttl("prices", at(2026, 10, 17, 12, 0))) == 45.5
+
+def test_holidays_extend_the_hold():
+    # Friday before Martin Luther King Jr. Day -> Tuesday 09:30
+    assert hours(market_ttl("prices", at(2026, 1, 16, 17, 0))) == 88.5
+
+def test_closing_prints_settle_before_the_long_hold():
+    assert market_ttl("prices", at(2026, 10, 16, 16, 5)) == 600
+    assert market_ttl("quote", at(2026, 10, 16, 16, 5)) == 600
+
+def test_fundamentals_follow_the_session():
+    assert market_ttl("quote", at(2026, 10, 16, 11, 0)) == 30
+    assert market_ttl("fundamentals", at(2026, 10, 16, 11, 0)) == 300
+    assert hours(market_ttl("fundamentals", at(2026, 10, 18, 9, 0))) == 24.5
+
+def test_long_holds_are_capped(monkeypatch):
+    monkeypatch.setattr(cal, "MAX_MARKET_TTL", 3600)
+    assert market_ttl("prices", at(2026, 10, 17, 12, 0)) == 3600
@@ -0,0 +1,72 @@
+import pandas as pd
+from app.services import data_fetcher, http_provider, news_store
+from app.services import snapshot as snap
+
+class FakeQuote:
+    def ticker_fundament(self):
+        return {"Sector": "Technology", "Price": "100"}
+
+    def ticker_news(self):
+        now = pd.Timestamp.now(tz=news_store.NEWS_TZ).tz_localize(None).floor("min")
+        return pd.DataFrame([
+            {"Date": now, "Title": "Acme beats estimates", "Link": "https://a.com/1", "Source": "Reuters"},
+            {"Date": now - pd.Timedelta(hours=1), "Title": "Acme upgraded", "Link": "https://b.com/2", "Source": "Motley Fool"},
+        ])
+
+def test_cold_analysis_scrapes_the_quote_page_once(monkeypatch):
+    scrapes = []
+    def fake_run(fn, *args, **kwargs):
+        assert fn is http_provider.finviz_quote_page
+        scrapes.append(args[0])
+        return FakeQuote()
+    monkeypatch.setattr(http_provider, "run", fake_run)
+    monkeypatch.setattr(snap, "fetch_company_info", lambda symbol, fund=None: {"sector": fund["Sector"]})
+    monkeypatch.setattr(snap, "fetch_ticker_data", lambda symbol, period="1y": None)
+    monkeypatch.setattr(news_store, "spawn_background", lambda fn, *args: fn(*args))
+    snap._snapshots.clear()
+
+    # Same order as the analysis stream: snapshot, headlines, social pulse
+    snap.get_ticker_snapshot("ACME")
+    headlines = data_fetcher.fetch_news("ACME", limit=10)
+    social = data_fetcher.fetch_social_news("ACME", limit=5)
+
+    assert scrapes == ["ACME"]
+    assert len(headlines) == 2 and "Acme beats estimates" in headlines[0]
+    assert len(social) == 1 and "Acme upgraded" in social[0]
+    assert news_store.news_velocity("ACME") > 0
+
+def test_dedup_by_url_and_title():
+    frame = FakeQuote().ticker_news().assign(Link=["https://a.com/dupe", "https://b.com/dupe"],
+                                            Title=["Dupe Corp beats estimates", "Dupe Corp upgraded"])
+    assert news_store.ingest("DUPE", frame) == 2
+    repeat = frame.assign(Link=["https://www.a.com/dupe/", "https://c.com/other"], Title=["Dupe Corp beats estimates", "DUPE corp upgraded!"])
+    assert news_store.ingest("DUPE", repeat) == 0
+    assert len(news_store.get_news("DUPE")) == 2
+
+def test_save_while_ingesting_writes_a_consistent_store(capsys):
+    import threading
+    stop = threading.Event()
+    def ingest_forever():
+        i = 0
+        now = pd.Timestamp.now(tz=news_store.NEWS_TZ).tz_localize(None).floor("min")
+        while not stop.is_set():
+            frame = pd.DataFrame([{"Date": now, "Title": f"Story {i}", "Link": f"https://save.example/{i}", "Source": "Reuters"}])
+            for ticker in ("SAVE1", "SAVE2", "SAVE3"):
+                news_store.ingest(ticker, frame)
+            i += 1
+    writer = threading.Thread(target=ingest_forever)
+    writer.start()
+    try:
+        for _ in range(50):
+            news_store.save_news_store()
+    finally:
+        stop.set()
+        writer.join()
+    assert "Could not persist" not in capsys.readouterr().out
+
+    news_store.save_news_store()
+    saved = pd.read_pickle(news_store.data_path(news_store.NEWS_FILE))
+    for ticker in ("SAVE1", "SAVE2", "SAVE3"):
+        keys = {key for _, key in saved["by_ticker"][ticker]}
+        assert keys <= saved["items"].keys()
+        assert all(ticker in saved["items"][key]["tickers"] for key in keys)
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.services import providers
+from app.services.providers import Bulkhead, CircuitBreaker, CircuitOpenError, QueueTimeout, TickerNotFound
+
+async def held_call(bulkhead, level, seconds, done):
+    await bulkhead.acquire_async(level)
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        bulkhead.release()
+    done.append((level, time.monotonic()))
+
+def test_interactive_call_overtakes_a_background_backlog():
+    async def scenario():
+        bulkhead = Bulkhead("test", 4)
+        done = []
+        start = time.monotonic()
+        background = [asyncio.create_task(held_call(bulkhead, "background", 0.05, done)) for _ in range(40)]
+        await asyncio.sleep(0.01)
+        await held_call(bulkhead, "interactive", 0.05, done)
+        interactive_at = done[-1][1] - start
+        await asyncio.gather(*background)
+        return interactive_at, done[-1][1] - start
+    interactive_at, total = asyncio.run(scenario())
+    # Admitted at the next free slot, not after the 40 queued background calls
+    assert interactive_at < 0.2 < total
+
+def test_threads_and_coroutines_share_one_priority_queue():
+    bulkhead = Bulkhead("test", 1)
+    bulkhead.acquire()
+    order = []
+    def thread_waiter(level):
+        bulkhead.acquire(level)
+        order.append(level)
+        bulkhead.release()
+    async def async_waiter():
+        await bulkhead.acquire_async("peers")
+        order.append("peers")
+        bulkhead.release()
+    bg = threading.Thread(target=thread_waiter, args=("background",))
+    bg.start()
+    time.sleep(0.05)
+    loop_thread = threading.Thread(target=asyncio.run, args=(async_waiter(),))
+    loop_thread.start()
+    time.sleep(0.05)
+    fg = threading.Thread(target=thread_waiter, args=("interactive",))
+    fg.start()
+    time.sleep(0.05)
+    bulkhead.release()
+    for t in (bg, loop_thread, fg):
+        t.join(2)
+    assert order == ["interactive", "peers", "background"]
+    assert bulkhead.status()["active"] == 0
+
+def test_queue_deadline(monkeypatch):
+    monkeypatch.setitem(providers.QUEUE_DEADLINES, "peers", 0.05)
+    bulkhead = Bulkhead("test", 1)
+    bulkhead.acquire()
+    with pytest.raises(QueueTimeout):
+        bulkhead.acquire("peers")
+    with pytest.raises(QueueTimeout):
+        asyncio.run(bulkhead.acquire_async("peers"))
+    bulkhead.release()
+    assert bulkhead.status() == {"active": 0, "limit": 1, "queued": 0, "queue_timeouts": 2}
+
+def fail(error):
+    def fn():
+        raise error
+    return fn
+
+def fail_async(error):
+    async def fn():
+        raise error
+    return fn
+
+def test_breaker_opens_fails_fast_and_recovers_through_one_trial():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail(ConnectionError("reset")))
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "never called")
+
+    time.sleep(0.06)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail(ConnectionError("still down"))) # The half-open trial fails: open again
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
+
+def test_unknown_tickers_do_not_trip_the_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    for _ in range(5):
+        with pytest.raises(TickerNotFound):
+            breaker.call(fail(TickerNotFound("NOPE")))
+        with pytest.raises(TickerNotFound):
+            asyncio.run(breaker.acall(fail_async(TickerNotFound("NOPE"))))
+    assert breaker.state == "closed"
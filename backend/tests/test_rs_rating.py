@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from app.services import rs_rating as rs
+
+def panel(days=300):
+    index = pd.bdate_range("2025-08-01", periods=days, name="Date")
+    growth = {"FAST": 0.004, "MID": 0.001, "FLAT": 0.0, "SLOW": -0.002}
+    frame = pd.DataFrame({t: 100 * np.exp(g * np.arange(days)) for t, g in growth.items()}, index=index)
+    frame["GONE"] = np.nan
+    return frame
+
+def test_ratings_rank_weighted_returns():
+    table = rs.compute_rs_ratings(panel())
+    assert "GONE" not in table.index
+    assert table["rs_rating"].idxmax() == "FAST" and table["rs_rating"].idxmin() == "SLOW"
+    assert table["rs_rating"].between(1, 99).all()
+    assert table.loc["FLAT", "ret_12m"] == 0.0
+
+def test_short_panels_fall_back_to_the_first_row():
+    table = rs.compute_rs_ratings(panel(days=40))
+    assert (table["ret_12m"] == table["ret_3m"]).all()
+
+def test_refresh_persists_and_warm_starts(monkeypatch):
+    fetched = []
+    def fetch(tickers, period):
+        fetched.append((tuple(tickers), period))
+        return panel()
+    monkeypatch.setattr(rs, "fetch_price_panel", fetch)
+    rs.refresh_rs_ratings(["FAST", "MID", "FLAT", "SLOW"])
+    assert fetched == [(("FAST", "MID", "FLAT", "SLOW"), rs.RS_PERIOD)]
+    rating = rs.get_rs_rating("FAST")
+
+    rs._rs.update({"table": None, "as_of": None})
+    assert rs.get_rs_rating("FAST") == {}
+    rs.load_rs_ratings()
+    assert rs.get_rs_rating("FAST") == rating
+    assert rating["as_of"] == panel().index[-1]
@@ -0,0 +1,14 @@
+import pandas as pd
+from app.services import scanner
+
+def test_sp500_tickers_come_from_the_universe_snapshot(monkeypatch):
+    universe = pd.DataFrame({"market_cap": [3e12, 2e11, 9e11]}, index=pd.Index(["AAPL", "KO", "JPM"], name="Ticker"))
+    monkeypatch.setattr(scanner, "get_universe_snapshot", lambda: universe)
+    def no_crawl(*args, **kwargs):
+        raise AssertionError("get_sp500_tickers must not crawl the screener")
+    monkeypatch.setattr(scanner.http_provider, "run", no_crawl)
+    assert scanner.get_sp500_tickers() == ["KO", "JPM", "AAPL"]
+
+def test_sp500_tickers_without_a_snapshot(monkeypatch):
+    monkeypatch.setattr(scanner, "get_universe_snapshot", lambda: None)
+    assert scanner.get_sp500_tickers() is None
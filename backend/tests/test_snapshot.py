@@ -0,0 +1,29 @@
+import pandas as pd
+from app.services import snapshot as snap
+
+def prices():
+    return pd.DataFrame({"Close": [1.0, 2.0]}, index=pd.date_range("2026-01-01", periods=2))
+
+def build_with(monkeypatch, info, frame):
+    calls = []
+    def build(symbol):
+        calls.append(symbol)
+        return snap.TickerSnapshot(symbol, {}, info, frame)
+    monkeypatch.setattr(snap, "build_ticker_snapshot", build)
+    snap._snapshots.clear()
+    return calls
+
+def test_complete_snapshot_is_cached(monkeypatch):
+    calls = build_with(monkeypatch, {"sector": "Tech"}, prices())
+    snap.get_ticker_snapshot("aapl")
+    snap.get_ticker_snapshot("AAPL")
+    assert calls == ["AAPL"]
+
+def test_partial_snapshot_expires_quickly(monkeypatch):
+    for info, frame in (({"sector": "Tech"}, None), ({}, prices())):
+        build_with(monkeypatch, info, frame)
+        snap.get_ticker_snapshot("AAPL")
+        assert snap._snapshots.get("AAPL") is not None
+        expires_at = snap._snapshots._data["AAPL"][0]
+        stored_at = snap._snapshots._data["AAPL"][1]
+        assert expires_at - stored_at == snap.PARTIAL_SNAPSHOT_TTL
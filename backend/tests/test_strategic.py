@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from app.services import strategic
+
+def universe(rows):
+    columns = ["company", "sector", "industry", "price", "market_cap", "pe", "roi", "roe", "perf_half"]
+    df = pd.DataFrame(rows, columns=["Ticker"] + columns).set_index("Ticker")
+    return df
+
+def test_magic_formula_ranks_earnings_yield_plus_return_on_capital(monkeypatch):
+    table = strategic.compute_magic_formula_table(universe([
+        # ticker, company, sector, industry, price, cap, P/E, ROI, ROE, 6m perf
+        ("AAA", "A", "Tech", "Software", 10, 5e9, 10, 0.30, 0.20, 0.1),    # EY 2nd, ROC 1st -> 3
+        ("BBB", "B", "Tech", "Software", 10, 6e9, 5, 0.10, 0.10, 0.1),     # EY 1st, ROC 3rd -> 4
+        ("CCC", "C", "Energy", "Oil", 10, 7e9, 20, np.nan, 0.25, 0.1),     # ROE stands in: EY 3rd, ROC 2nd -> 5
+        ("DDD", "D", "Energy", "Oil", 10, 8e9, -4, 0.40, 0.40, 0.1),       # Losses: unranked
+        ("EEE", "E", "Utilities", "Power", 10, 9e9, 8, np.nan, np.nan, 0.1), # No ROC data: unranked
+    ]))
+    assert list(table.index) == ["AAA", "BBB", "CCC", "EEE", "DDD"] # Unranked names follow by market cap
+    assert table.loc["AAA", ["ey_rank", "roc_rank", "magic_rank"]].tolist() == [2, 1, 1]
+    assert table.loc["CCC", "roc"] == 0.25
+    assert np.isclose(table.loc["AAA", "percentile"], 1 / 3)
+
+    monkeypatch.setattr(strategic, "get_magic_formula_table", lambda: table)
+    assert strategic.format_magic_formula_label(strategic.get_magic_formula_rank("BBB")) == "Top 67%"
+    assert strategic.format_magic_formula_label(strategic.get_magic_formula_rank("DDD")) == "Unranked"
+    assert strategic.get_magic_formula_rank("ZZZ") is None
+    listing = strategic.get_magic_formula_list()
+    assert [r["rank"] for r in listing] == [1, 2, 3, None, None]
+
+def verdict_universe():
+    df = universe([
+        ("AAA", "A", "Technology", "Semis", 10, 9e9, 10, 0.30, 0.25, 0.1),
+        ("BBB", "B", "Energy", "Oil", 10, 8e9, 12, 0.05, 0.05, 0.1),
+        ("CCC", "C", "Financial", "Banks", 10, 7e9, 9, 0.20, 0.18, 0.1),
+    ])
+    return df.assign(p_fcf=[15, -1, 20], insider_trans=[1.0, -2.0, 0.0], inst_trans=[0.5, 0.2, -0.1],
+                     peg=[1.0, 3.0, 1.5], debt_eq=[0.3, 2.0, 1.0])
+
+def drilldown(row, sector):
+    """The per-ticker verdict input calculate_final_verdict reads."""
+    return {
+        "moat": {"roe": row["roe"], "roic": row["roi"], "fcf": row["p_fcf"]},
+        "smart_money": {"insider": row["insider_trans"], "inst": row["inst_trans"], "peg": row["peg"]},
+        "safety": {"debt_eq": row["debt_eq"]},
+        "policy": {"catalysts": strategic.get_policy_catalysts(sector)},
+        "technicals": {"patterns": {}, "signals": {"macd_bullish": False}},
+    }
+
+def test_leaderboard_matches_the_drilldown_verdict(monkeypatch):
+    df = verdict_universe()
+    monkeypatch.setattr(strategic, "get_universe_snapshot", lambda: df)
+    monkeypatch.setattr(strategic, "fetch_price_history_batch", lambda tickers, period: {})
+    monkeypatch.setitem(strategic._leaderboard, "table", None)
+
+    board = strategic.get_verdict_leaderboard(limit=None)
+    assert board["total"] == 3
+    for row in board["results"]:
+        expected = strategic.calculate_final_verdict(drilldown(df.loc[row["ticker"]], row["sector"]))
+        assert (row["score"], row["label"], row["breakdown"]) == (expected["score"], expected["label"], expected["breakdown"])
+    scores = [row["score"] for row in board["results"]]
+    assert scores == sorted(scores, reverse=True) and [row["rank"] for row in board["results"]] == [1, 2, 3]
+
+    assert [r["ticker"] for r in strategic.get_verdict_leaderboard(sector="energy")["results"]] == ["BBB"]
+    top = board["results"][0]
+    assert strategic.get_verdict_leaderboard(min_score=top["score"])["total"] == 1
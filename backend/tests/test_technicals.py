@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from app.services.technicals import (get_multi_timeframe_signals, columns_for_bars, SIGNAL_COLUMNS, calculate_technicals,
+                                     calculate_latest_signals, get_latest_signals)
+
+def daily_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, rows))
+    index = pd.bdate_range(end="2026-10-16", periods=rows, tz="America/New_York")
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": rng.integers(1_000_000, 2_000_000, rows).astype(float)}, index=index)
+
+def test_one_year_of_daily_bars_does_not_raise():
+    result = get_multi_timeframe_signals(daily_frame(252), None, ("1wk", "1mo"))
+    assert result["1wk"]["trend"] in ("Bullish", "Bearish", "Neutral")
+    # 12 monthly bars are too few even for RSI: skipped, not raised
+    assert result["1mo"] == {}
+
+def test_short_histories_skip_every_higher_timeframe():
+    for rows in (120, 40):
+        result = get_multi_timeframe_signals(daily_frame(rows), None, ("1wk", "1mo"))
+        assert result["1mo"] == {}
+
+def test_two_years_fill_the_weekly_timeframe():
+    result = get_multi_timeframe_signals(daily_frame(504), None, ("1wk",))
+    assert pd.notna(result["1wk"]["sma_50"])
+
+def test_two_years_fill_the_monthly_timeframe():
+    # ~24 month-end bars: too few for ADX and the squeeze's ATR20, enough for the rest
+    result = get_multi_timeframe_signals(daily_frame(504), None, ("1mo",))
+    monthly = result["1mo"]
+    assert monthly["trend"] in ("Bullish", "Bearish")
+    assert pd.notna(monthly["rsi"]) and pd.notna(monthly["bb_upper"])
+
+def test_columns_for_bars_follows_indicator_inputs():
+    assert "ADX" not in columns_for_bars(24) and "BB_Squeeze" in columns_for_bars(24)
+    assert "BB_Squeeze" not in columns_for_bars(19) and "RSI_14" in columns_for_bars(19)
+    assert columns_for_bars(28) == SIGNAL_COLUMNS
+
+def test_empty_frame():
+    assert get_multi_timeframe_signals(None, None, ("1wk",)) == {"1wk": {}}
+
+def test_tail_mode_matches_full_history():
+    df = daily_frame(800, seed=3)
+    full = calculate_technicals(df)
+    tail = calculate_technicals(df, tail=5)
+    assert len(tail) == 5 and tail.index.equals(full.index[-5:])
+    for col in ("RSI_14", "ADX", "SMA_200", "BB_Upper", "SQZ_MOM", "SMI", "Vol_Ratio"):
+        assert np.allclose(tail[col], full[col].iloc[-5:], rtol=1e-6, atol=1e-6), col
+
+def test_latest_signals_match_full_history():
+    df = daily_frame(800, seed=4)
+    latest = calculate_latest_signals(df)
+    full = get_latest_signals(calculate_technicals(df))
+    for key in ("rsi", "adx", "sma_200", "sqz_mom", "smi", "volume_ratio"):
+        assert np.isclose(latest[key], full[key], rtol=1e-6, atol=1e-6), key
+    assert latest["bb_squeeze"] == full["bb_squeeze"]
+
+def test_column_selection_evaluates_only_the_requested_subgraph():
+    df = daily_frame(300, seed=5)
+    full = calculate_technicals(df)
+    picked = calculate_technicals(df, columns=["BB_Squeeze", "RSI_14"])
+    added = [c for c in picked.columns if c not in df.columns]
+    # Inputs are written in registration order; "_" intermediates never are
+    assert added == ["RSI_14", "BB_Upper", "BB_Lower", "KC_Upper", "KC_Lower", "BB_Squeeze"]
+    assert picked["BB_Squeeze"].equals(full["BB_Squeeze"])
+    assert np.allclose(picked["RSI_14"], full["RSI_14"], equal_nan=True)
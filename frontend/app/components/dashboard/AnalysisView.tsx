@@ -79,7 +79,7 @@ export const AnalysisView = React.memo(({ data, onTickerSelect, backtestResult,
   return (
     <div className="space-y-6">
       {/* 1. Global Metrics Bar */}
-      <div className="grid grid-cols-2 md:grid-cols-4 lg:grid-cols-8 gap-4">
+      <div className="grid grid-cols-2 md:grid-cols-4 lg:grid-cols-9 gap-4">
         <Metric 
             label="Asset" 
             value={data.ticker} 
@@ -88,6 +88,7 @@ export const AnalysisView = React.memo(({ data, onTickerSelect, backtestResult,
         />
         <Metric label="Price" value={`$${data.price?.toFixed(2) ?? "N/A"}`} tip="Current real-time price." />
         <Metric label="Rel Strength" value={`${(data.signals.rel_strength*100).toFixed(1)}%`} tip="Leader vs Laggard check. Stock performance vs its Sector ETF over 3 months." />
+        <Metric label="RS Rating" value={data.rs_rating?.rs_rating?.toString() ?? "N/A"} color={(data.rs_rating?.rs_rating ?? 0) >= 80 ? "text-green-400" : undefined} tip="1-99 rank vs the S&P 500 on weighted 3/6/9/12-month returns (recomputed daily)." />
         <Metric label="ADX" value={data.signals.adx?.toFixed(1) ?? "N/A"} tip="Average Directional Index. Measures trend strength. > 25 is strong, < 20 is choppy/non-trending." />
         <Metric label="RSI" value={data.signals.rsi?.toFixed(1) ?? "N/A"} tip="Relative Strength Index. We watch 40 as Bull Market Support and 60 as Bear Market Resistance." />
         <Metric label="P/C Ratio" value={data.options_data?.pcr.toFixed(2) || "N/A"} tip="Put/Call Volume Ratio. > 1.2 suggests extreme fear (contrarian buy), < 0.6 suggests extreme greed (hedge/sell)." />
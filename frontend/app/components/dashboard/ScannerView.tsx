@@ -205,6 +205,7 @@ export const ScannerView = ({
                         <th className="p-4 text-center cursor-pointer hover:bg-zinc-800/50 group" onClick={() => handleSort('Recommendation')}>Rec <SortIcon column="Recommendation" /></th>
                         <th className="p-4 text-center cursor-pointer hover:bg-zinc-800/50 group" onClick={() => handleSort('RSI')}>RSI <SortIcon column="RSI" /></th>
                         <th className="p-4 text-center cursor-pointer hover:bg-zinc-800/50 group" onClick={() => handleSort('Rel Vol')}>Rel Vol <SortIcon column="Rel Vol" /></th>
+                        <th className="p-4 text-center cursor-pointer hover:bg-zinc-800/50 group" onClick={() => handleSort('RS Rating')}>RS <SortIcon column="RS Rating" /></th>
                         <th className="p-4 text-right cursor-pointer hover:bg-zinc-800/50 group" onClick={() => handleSort('Upside %')}>Upside <SortIcon column="Upside %" /></th>
                         <th className="p-4 text-right">Action</th>
                     </tr>
@@ -237,6 +238,7 @@ export const ScannerView = ({
                             </span>
                         </td>
                         <td className="p-3 text-center font-mono text-xs text-zinc-400">{r["Rel Vol"]?.toFixed(1) ?? "N/A"}x</td>
+                        <td className={`p-3 text-center font-mono text-xs font-bold ${(r["RS Rating"] ?? 0) >= 80 ? "text-green-400" : "text-zinc-500"}`}>{r["RS Rating"] ?? "—"}</td>
                         <td className={`p-3 text-right font-mono font-bold ${!r['Upside %'] ? 'text-zinc-600' : r['Upside %']>0 ? 'text-blue-400' : 'text-zinc-600'}`}>
                             {r['Upside %'] > 0 ? '+' : ''}{r['Upside %']?.toFixed(1) ?? "N/A"}%
                         </td>
@@ -249,7 +251,7 @@ export const ScannerView = ({
                     ))}
                     {filteredData.length === 0 && (
                         <tr>
-                            <td colSpan={8} className="p-10 text-center text-zinc-500 text-xs uppercase tracking-widest">No tickers match your filters</td>
+                            <td colSpan={9} className="p-10 text-center text-zinc-500 text-xs uppercase tracking-widest">No tickers match your filters</td>
                         </tr>
                     )}
                 </tbody>
@@ -33,7 +33,11 @@ interface StrategicData {
   magic_formula: {
     earnings_yield: number;
     roc_rank: string;
+    rank?: number | null;
+    percentile?: number | null;
+    universe_size?: number | null;
   };
+  relative?: Record<string, { value: number | null; pct: number | null; sector_pct: number | null; sector_z: number | null }>;
   policy: {
     catalysts: { name: string; impact: string; direction: string }[];
     sector: string;
@@ -51,12 +55,13 @@ interface StrategicData {
 }
 
 interface MagicStock {
-  rank: number;
+  rank: number | null;
   ticker: string;
   price: number;
   pe: number;
   market_cap: number;
   earnings_yield: number;
+  roc: number | null;
   sector: string;
 }
 
@@ -151,8 +156,8 @@ export const StrategicView = ({ discoveryList, setDiscoveryList, analysisCache,
     if (!sortConfig.key) return list;
     
     return [...list].sort((a, b) => {
-        const valA = a[sortConfig.key!];
-        const valB = b[sortConfig.key!];
+        const valA = a[sortConfig.key!] ?? Infinity;
+        const valB = b[sortConfig.key!] ?? Infinity;
 
         if (valA < valB) return sortConfig.direction === 'asc' ? -1 : 1;
         if (valA > valB) return sortConfig.direction === 'asc' ? 1 : -1;
@@ -411,7 +416,7 @@ export const StrategicView = ({ discoveryList, setDiscoveryList, analysisCache,
                     <thead className="text-xs text-zinc-500 uppercase bg-zinc-900/50">
                         <tr>
                             <th className="px-4 py-3 cursor-pointer hover:text-zinc-300 transition-colors group" onClick={() => handleSort('rank')}>
-                                <div className="flex items-center gap-1">Pos <ArrowUpDown className="w-3 h-3 opacity-50 group-hover:opacity-100"/></div>
+                                <div className="flex items-center gap-1">Rank <ArrowUpDown className="w-3 h-3 opacity-50 group-hover:opacity-100"/></div>
                             </th>
                             <th className="px-4 py-3 cursor-pointer hover:text-zinc-300 transition-colors group" onClick={() => handleSort('ticker')}>
                                 <div className="flex items-center gap-1">Ticker <ArrowUpDown className="w-3 h-3 opacity-50 group-hover:opacity-100"/></div>
@@ -428,6 +433,9 @@ export const StrategicView = ({ discoveryList, setDiscoveryList, analysisCache,
                             <th className="px-4 py-3 cursor-pointer hover:text-zinc-300 transition-colors group" onClick={() => handleSort('earnings_yield')}>
                                 <div className="flex items-center gap-1">Yield <ArrowUpDown className="w-3 h-3 opacity-50 group-hover:opacity-100"/></div>
                             </th>
+                            <th className="px-4 py-3 cursor-pointer hover:text-zinc-300 transition-colors group" onClick={() => handleSort('roc')}>
+                                <div className="flex items-center gap-1">ROC <ArrowUpDown className="w-3 h-3 opacity-50 group-hover:opacity-100"/></div>
+                            </th>
                             <th className="px-4 py-3 cursor-pointer hover:text-zinc-300 transition-colors group" onClick={() => handleSort('sector')}>
                                 <div className="flex items-center gap-1">Sector <ArrowUpDown className="w-3 h-3 opacity-50 group-hover:opacity-100"/></div>
                             </th>
@@ -438,12 +446,13 @@ export const StrategicView = ({ discoveryList, setDiscoveryList, analysisCache,
                         {(sortedList || []).map((stock) => (
                             <Fragment key={stock.ticker}>
                                 <tr className={`hover:bg-zinc-800/30 transition-colors ${expandedTicker === stock.ticker ? "bg-zinc-800/20" : ""}`}>
-                                    <td className="px-4 py-3 font-mono text-zinc-500">#{stock.rank}</td>
+                                    <td className="px-4 py-3 font-mono text-zinc-500">{stock.rank ? `#${stock.rank}` : "—"}</td>
                                     <td className="px-4 py-3 font-bold text-white">{stock.ticker}</td>
                                     <td className="px-4 py-3">${stock.price?.toFixed(2) ?? "0.00"}</td>
                                     <td className="px-4 py-3 font-mono text-xs">{formatMarketCap(stock.market_cap)}</td>
                                     <td className="px-4 py-3 text-green-400">{stock.pe?.toFixed(1) ?? "0.0"}x</td>
                                     <td className="px-4 py-3">{(stock.earnings_yield ? stock.earnings_yield * 100 : 0).toFixed(1)}%</td>
+                                    <td className="px-4 py-3">{stock.roc != null ? `${(stock.roc * 100).toFixed(1)}%` : "—"}</td>
                                     <td className="px-4 py-3 text-xs opacity-70">{stock.sector}</td>
                                     <td className="px-4 py-3">
                                         <Button 
@@ -464,7 +473,7 @@ export const StrategicView = ({ discoveryList, setDiscoveryList, analysisCache,
                                 </tr>
                                 {expandedTicker === stock.ticker && (
                                     <tr>
-                                        <td colSpan={8} className="px-0 py-0 border-b-0">
+                                        <td colSpan={9} className="px-0 py-0 border-b-0">
                                             {analysisCache[stock.ticker] ? (
                                                 renderAnalysisContent(analysisCache[stock.ticker])
                                             ) : (
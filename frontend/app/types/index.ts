@@ -35,6 +35,13 @@ export interface TickerData {
     volume_ratio: number;
     [key: string]: any;
   };
+  mtf_signals?: {
+    [timeframe: string]: {
+      trend: "Bullish" | "Bearish" | "Neutral";
+      bar_date: string;
+      [key: string]: any;
+    };
+  };
   info: {
     recommendation: string;
     company_name?: string;
@@ -54,6 +61,14 @@ export interface TickerData {
   analyst_actions: any[];
   chart_data: any[];
   options_data: any;
+  rs_rating?: {
+    rs_rating?: number;
+    ret_3m?: number;
+    ret_6m?: number;
+    ret_9m?: number;
+    ret_12m?: number;
+    as_of?: string;
+  };
   macro_correlations?: {
     [key: string]: {
       value: number;
@@ -99,6 +114,7 @@ export interface ScannerResult {
   "Upside %": number;
   Recommendation: string;
   "Market Cap": number;
+  "RS Rating"?: number | null;
   is_squeeze?: boolean;
 }
 